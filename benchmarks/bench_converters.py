@@ -0,0 +1,52 @@
+import timeit
+from pathlib import Path
+
+import svgelements
+from bench_suite import default_dispatch
+from generators import star_points
+from warg import ensure_in_sys_path
+
+ensure_in_sys_path(Path(__file__).parent.parent, position=0)
+
+from svaguely.conversion import (  # noqa: E402
+    polygon_converter,
+    polyline_converter,
+    simpleline_converter,
+)
+
+__author__ = "Christian Heider Lindbjerg <chen(at)mapspeople.com>"
+
+
+def bench_converters(num_vertices: int = 10_000, repeat: int = 5) -> None:
+    cases = {
+        "polygon_converter": (
+            polygon_converter,
+            svgelements.Polygon(star_points(num_vertices), transform="rotate(30)"),
+        ),
+        "polyline_converter": (
+            polyline_converter,
+            svgelements.Polyline(star_points(num_vertices), transform="rotate(30)"),
+        ),
+        # Rects are converted as reified paths
+        "default_dispatch[rect]": (
+            default_dispatch,
+            svgelements.Rect(10, 20, 30, 40, transform="rotate(30)"),
+        ),
+        "simpleline_converter": (
+            simpleline_converter,
+            svgelements.SimpleLine(10, 20, 30, 40, transform="rotate(30)"),
+        ),
+    }
+
+    for name, (converter, element) in cases.items():
+        number = 1 if hasattr(element, "points") else 10_000
+        best = min(
+            timeit.repeat(
+                lambda: converter(element, w=1000, h=1000), number=number, repeat=repeat
+            )
+        )
+        print(f"{name:>24}: {best / number * 1e3:10.4f} ms/call")
+
+
+if __name__ == "__main__":
+    bench_converters()
@@ -0,0 +1,297 @@
+"""
+Benchmark suite of the converters and parse_svg on synthetic svgs
+
+    python benchmarks/bench_suite.py --output baseline.json
+    python benchmarks/bench_suite.py --baseline baseline.json --output current.json
+
+Run from a checkout, the svaguely package next to this directory is benchmarked, not an installed one.
+
+Times are the best and median of repeated runs, peak memory is measured in a separate traced run so tracing does
+not skew the times. Comparing against a baseline exits with 1 if any case got slower than the threshold.
+"""
+
+import argparse
+import io
+import json
+import platform
+import statistics
+import sys
+import timeit
+import tracemalloc
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import shapely
+import svgelements
+from generators import GENERATORS, SIZE, star_points
+from warg import ensure_in_sys_path
+
+ensure_in_sys_path(Path(__file__).parent.parent, position=0)
+
+import svaguely  # noqa: E402
+from svaguely import DEFAULT_CONVERTERS, convert_elements, parse_svg  # noqa: E402
+from svaguely.conversion import (  # noqa: E402
+    ellipse_converter,
+    image_converter,
+    path_converter,
+    point_converter,
+    polygon_converter,
+    polyline_converter,
+    simpleline_converter,
+    text_converter,
+)
+
+__author__ = "Christian Heider Lindbjerg <chen(at)mapspeople.com>"
+
+DEFAULT_SIZES = {
+    "rects": 5_000,
+    "circles": 5_000,
+    "nested_groups": 200,  # Depth, svgelements parses nested transforms in quadratic time
+    "deep_nesting": 1_000,  # Depth of the groups converted by convert_elements
+    "compound_path": 500,
+    "uses": 1_000,
+    "bezier_path": 5_000,
+    "lines": 5_000,
+    "texts": 5_000,
+    "images": 5_000,
+    "star_points": 10_000,  # Vertices of the polygon and polyline, and points
+}
+
+Case = Tuple[str, int, Callable[[], Any]]
+"""Kind of the case, size of its input and the timed callable"""
+
+
+def default_dispatch(
+    element: svgelements.SVGElement, **kwargs: Any
+) -> Optional[shapely.geometry.base.BaseGeometry]:
+    """Convert an element as parse_svg does, through the converter DEFAULT_CONVERTERS resolves for its type"""
+    geometry_converter, _ = DEFAULT_CONVERTERS.resolve(type(element))(element, **kwargs)
+    return geometry_converter()
+
+
+# Converter, generator of the svg and the svgelements type of the elements it converts
+CONVERTER_CASES = {
+    "default_dispatch[rects]": (default_dispatch, "rects", svgelements.Rect),
+    "ellipse_converter": (ellipse_converter, "circles", svgelements.Ellipse),
+    "path_converter[compound_path]": (
+        path_converter,
+        "compound_path",
+        svgelements.Path,
+    ),
+    "path_converter[bezier_path]": (path_converter, "bezier_path", svgelements.Path),
+    "simpleline_converter": (simpleline_converter, "lines", svgelements.SimpleLine),
+    "text_converter": (text_converter, "texts", svgelements.Text),
+    "image_converter": (image_converter, "images", svgelements.Image),
+}
+
+
+def measure(fn: Callable[[], Any], *, repeat: int, number: int = 1) -> Dict[str, float]:
+    """
+    :param fn: The case
+    :param repeat: Number of timed runs
+    :param number: Calls per timed run
+    :return: Best and median seconds per call and the peak traced memory of one call in bytes
+    """
+    fn()  # Warm up caches and lazy imports, so they are not attributed to the first run
+    times = [t / number for t in timeit.repeat(fn, number=number, repeat=repeat)]
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return dict(
+        best_seconds=min(times),
+        median_seconds=statistics.median(times),
+        peak_bytes=peak,
+    )
+
+
+def _svg_elements(svg: str, element_type: type) -> List[svgelements.Shape]:
+    return [
+        e
+        for e in svgelements.SVG.parse(io.StringIO(svg)).elements()
+        if isinstance(e, element_type)
+    ]
+
+
+def _convert_each(converter: Callable, elements: Sequence[Any]) -> List[Any]:
+    return [converter(e, w=SIZE, h=SIZE) for e in elements]
+
+
+def _deep_nesting_case(depth: int) -> Case:
+    # Built directly, svgelements parses nested groups recursively and nested transforms in quadratic time
+    root = group = svgelements.Group(id="g0")
+    for i in range(1, depth):
+        group.append(svgelements.Rect(i % 900, i % 900, 10, 10, id=f"r{i}"))
+        child = svgelements.Group(id=f"g{i}")
+        group.append(child)
+        group = child
+    return "converter", depth, partial(convert_elements, root)
+
+
+def _case_builders(
+    sizes: Dict[str, int], svg_of: Callable[[str], str]
+) -> Dict[str, Callable[[], Case]]:
+    """Builders of the cases by name, only the selected cases generate their svgs and elements"""
+    builders = {}
+
+    for name, (converter, generator, element_type) in CONVERTER_CASES.items():
+        builders[name] = lambda c=converter, g=generator, t=element_type: (
+            "converter",
+            sizes[g],
+            partial(_convert_each, c, _svg_elements(svg_of(g), t)),
+        )
+
+    num_vertices = sizes["star_points"]
+    for name, converter, element_type in (
+        ("polygon_converter", polygon_converter, svgelements.Polygon),
+        ("polyline_converter", polyline_converter, svgelements.Polyline),
+    ):
+        builders[name] = lambda c=converter, t=element_type: (
+            "converter",
+            num_vertices,
+            partial(_convert_each, c, [t(star_points(num_vertices))]),
+        )
+
+    # Points are not parsed from svg, only created by converter registries or by hand
+    builders["point_converter"] = lambda: (
+        "converter",
+        num_vertices,
+        partial(
+            _convert_each,
+            point_converter,
+            svgelements.Polyline(star_points(num_vertices)).points,
+        ),
+    )
+
+    builders["convert_elements[deep_nesting]"] = partial(
+        _deep_nesting_case, sizes["deep_nesting"]
+    )
+
+    for generator in GENERATORS:
+        builders[f"parse_svg[{generator}]"] = lambda g=generator: (
+            "parse_svg",
+            sizes[g],
+            partial(parse_svg, svg_of(g)),
+        )
+
+    builders["parse_svg[rects_tile]"] = lambda: (
+        "parse_svg",
+        sizes["rects"],
+        partial(parse_svg, svg_of("rects"), bbox=(0, 0, 0.25, 0.25)),
+    )
+
+    return builders
+
+
+def run_suite(
+    *, scale: float = 1.0, repeat: int = 5, only: Optional[Sequence[str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    :param scale: Factor on the default sizes of the synthetic svgs
+    :param repeat: Number of timed runs of every case
+    :param only: Names of the cases to run, substrings match, None runs all
+    :return: A result per case
+    """
+    sizes = {k: max(1, int(v * scale)) for k, v in DEFAULT_SIZES.items()}
+    svgs = {}
+
+    def svg_of(generator: str) -> str:
+        if generator not in svgs:
+            svgs[generator] = GENERATORS[generator](sizes[generator])
+        return svgs[generator]
+
+    cases = {
+        name: build()
+        for name, build in _case_builders(sizes, svg_of).items()
+        if only is None or any(o in name for o in only)
+    }
+
+    results = []
+    for name, (kind, size, fn) in cases.items():
+        result = dict(name=name, kind=kind, size=size, **measure(fn, repeat=repeat))
+        print(
+            f"{name:>32} {size:8d}: {result['best_seconds'] * 1e3:10.3f} ms "
+            f"(median {result['median_seconds'] * 1e3:10.3f} ms) "
+            f"peak {result['peak_bytes'] / 2 ** 20:8.2f} MiB",
+            file=sys.stderr,
+            flush=True,
+        )
+        results.append(result)
+
+    return results
+
+
+def environment() -> Dict[str, Any]:
+    return dict(
+        python=platform.python_version(),
+        platform=platform.platform(),
+        svaguely=svaguely.__version__,
+        shapely=shapely.__version__,
+        svgelements=svgelements.SVGELEMENTS_VERSION,
+    )
+
+
+def compare(
+    results: Sequence[Dict[str, Any]],
+    baseline: Sequence[Dict[str, Any]],
+    *,
+    threshold: float = 1.2,
+) -> List[str]:
+    """
+    :param results: Results of this run
+    :param baseline: Results of the baseline run
+    :param threshold: Ratio of best times above which a case counts as regressed
+    :return: Names of the regressed cases, cases of a different size or missing in the baseline are not compared
+    """
+    baseline = {b["name"]: b for b in baseline}
+    regressed = []
+    for result in results:
+        base = baseline.get(result["name"])
+        if base is None or base["size"] != result["size"]:
+            continue
+
+        time_ratio = result["best_seconds"] / base["best_seconds"]
+        memory_ratio = result["peak_bytes"] / max(base["peak_bytes"], 1)
+        flag = "REGRESSED" if time_ratio > threshold else ""
+        print(
+            f"{result['name']:>32}: time x{time_ratio:6.2f} memory x{memory_ratio:6.2f} {flag}",
+            file=sys.stderr,
+        )
+        if flag:
+            regressed.append(result["name"])
+
+    return regressed
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", type=float, default=1.0, help="Factor on sizes")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="*", help="Run the cases matching these")
+    parser.add_argument("-o", "--output", help="Write the results as json here")
+    parser.add_argument("--baseline", help="Json results to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2)
+    args = parser.parse_args(argv)
+
+    results = run_suite(scale=args.scale, repeat=args.repeat, only=args.only)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(dict(environment=environment(), results=results), f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        if compare(results, baseline, threshold=args.threshold):
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+import math
+import random
+from typing import Callable, Dict
+
+__all__ = [
+    "star_points",
+    "rects_svg",
+    "circles_svg",
+    "nested_groups_svg",
+    "compound_path_svg",
+    "uses_svg",
+    "bezier_path_svg",
+    "lines_svg",
+    "texts_svg",
+    "images_svg",
+    "GENERATORS",
+]
+__author__ = "Christian Heider Lindbjerg <chen(at)mapspeople.com>"
+
+SIZE = 1000
+
+
+def _svg(body: str) -> str:
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+        f'width="{SIZE}" height="{SIZE}" viewBox="0 0 {SIZE} {SIZE}">{body}</svg>'
+    )
+
+
+def star_points(n: int, seed: int = 0) -> str:
+    """Vertices of a simple (non self-intersecting) star shaped ring"""
+    rng = random.Random(seed)
+    return " ".join(
+        f"{500 + r * math.cos(a)},{500 + r * math.sin(a)}"
+        for a, r in ((2 * math.pi * i / n, rng.uniform(250, 500)) for i in range(n))
+    )
+
+
+def rects_svg(n: int, seed: int = 0) -> str:
+    """n rotated rects in one layer"""
+    rng = random.Random(seed)
+    return _svg(
+        '<g id="rects">'
+        + "".join(
+            f'<rect id="r{i}" x="{rng.uniform(0, 900):.3f}" y="{rng.uniform(0, 900):.3f}" '
+            f'width="{rng.uniform(1, 100):.3f}" height="{rng.uniform(1, 100):.3f}" '
+            f'transform="rotate({rng.uniform(0, 90):.3f})" fill="#336699"/>'
+            for i in range(n)
+        )
+        + "</g>"
+    )
+
+
+def circles_svg(n: int, seed: int = 0) -> str:
+    """n circles and ellipses in one layer"""
+    rng = random.Random(seed)
+    return _svg(
+        '<g id="circles">'
+        + "".join(
+            (
+                f'<circle id="c{i}" cx="{rng.uniform(0, SIZE):.3f}" cy="{rng.uniform(0, SIZE):.3f}" '
+                f'r="{rng.uniform(1, 50):.3f}"/>'
+                if i % 2
+                else f'<ellipse id="c{i}" cx="{rng.uniform(0, SIZE):.3f}" cy="{rng.uniform(0, SIZE):.3f}" '
+                f'rx="{rng.uniform(1, 50):.3f}" ry="{rng.uniform(1, 50):.3f}"/>'
+            )
+            for i in range(n)
+        )
+        + "</g>"
+    )
+
+
+def nested_groups_svg(depth: int, seed: int = 0) -> str:
+    """Groups nested depth levels deep, each holding a rect"""
+    rng = random.Random(seed)
+    opening = "".join(
+        f'<g id="g{i}" transform="translate({rng.uniform(-1, 1):.3f},{rng.uniform(-1, 1):.3f})">'
+        f'<rect id="r{i}" x="{rng.uniform(0, 900):.3f}" y="{rng.uniform(0, 900):.3f}" width="10" height="10"/>'
+        for i in range(depth)
+    )
+    return _svg(opening + "</g>" * depth)
+
+
+def compound_path_svg(k: int, seed: int = 0) -> str:
+    """One path of an outer ring and k square holes on a grid inside it"""
+    side = math.ceil(math.sqrt(k))
+    cell = (SIZE - 100) / max(side, 1)
+    hole = cell * 0.5
+    holes = (
+        f"M{50 + (i % side) * cell + hole / 2:.3f},{50 + (i // side) * cell + hole / 2:.3f} "
+        f"h{hole:.3f} v{hole:.3f} h{-hole:.3f} Z"
+        for i in range(k)
+    )
+    d = f"M0,0 H{SIZE} V{SIZE} H0 Z " + " ".join(holes)
+    return _svg(f'<g id="compound"><path id="p" d="{d}" fill-rule="evenodd"/></g>')
+
+
+def uses_svg(n: int, seed: int = 0) -> str:
+    """n <use> references of one symbol of a curved path and a circle"""
+    rng = random.Random(seed)
+    symbol = (
+        '<defs><g id="symbol">'
+        '<path id="s" d="M0,0 C10,-20 30,-20 40,0 S70,20 80,0 L80,30 Q40,60 0,30 Z"/>'
+        '<circle id="dot" cx="40" cy="15" r="5"/>'
+        "</g></defs>"
+    )
+    return _svg(
+        symbol
+        + '<g id="uses">'
+        + "".join(
+            f'<use id="u{i}" xlink:href="#symbol" '
+            f'transform="translate({rng.uniform(0, 900):.3f},{rng.uniform(0, 900):.3f}) '
+            f'rotate({rng.uniform(0, 360):.3f})"/>'
+            for i in range(n)
+        )
+        + "</g>"
+    )
+
+
+def bezier_path_svg(n: int, seed: int = 0) -> str:
+    """One closed path of n cubic Bézier segments"""
+    rng = random.Random(seed)
+    segments = " ".join(
+        f"C{500 + 400 * math.cos(a - 0.5 / n):.3f},{500 + 400 * math.sin(a - 0.5 / n) + rng.uniform(-5, 5):.3f} "
+        f"{500 + 400 * math.cos(a):.3f},{500 + 400 * math.sin(a) + rng.uniform(-5, 5):.3f} "
+        f"{500 + 400 * math.cos(a):.3f},{500 + 400 * math.sin(a):.3f}"
+        for a in (2 * math.pi * (i + 1) / n for i in range(n))
+    )
+    return _svg(f'<g id="bezier"><path id="b" d="M900,500 {segments} Z"/></g>')
+
+
+def lines_svg(n: int, seed: int = 0) -> str:
+    """n lines in one layer"""
+    rng = random.Random(seed)
+    return _svg(
+        '<g id="lines">'
+        + "".join(
+            f'<line id="l{i}" x1="{rng.uniform(0, SIZE):.3f}" y1="{rng.uniform(0, SIZE):.3f}" '
+            f'x2="{rng.uniform(0, SIZE):.3f}" y2="{rng.uniform(0, SIZE):.3f}" stroke="black"/>'
+            for i in range(n)
+        )
+        + "</g>"
+    )
+
+
+def texts_svg(n: int, seed: int = 0) -> str:
+    """n text labels in one layer"""
+    rng = random.Random(seed)
+    return _svg(
+        '<g id="texts">'
+        + "".join(
+            f'<text id="t{i}" x="{rng.uniform(0, SIZE):.3f}" y="{rng.uniform(0, SIZE):.3f}" '
+            f'font-size="{rng.uniform(5, 20):.3f}" font-family="sans-serif">Room {i}</text>'
+            for i in range(n)
+        )
+        + "</g>"
+    )
+
+
+# The 8 byte png signature, images are not decoded by the conversion
+IMAGE_DATA = "data:image/png;base64,iVBORw0KGgo="
+
+
+def images_svg(n: int, seed: int = 0) -> str:
+    """n embedded images in one layer"""
+    rng = random.Random(seed)
+    return _svg(
+        '<g id="images">'
+        + "".join(
+            f'<image id="i{i}" x="{rng.uniform(0, 900):.3f}" y="{rng.uniform(0, 900):.3f}" '
+            f'width="{rng.uniform(1, 100):.3f}" height="{rng.uniform(1, 100):.3f}" '
+            f'xlink:href="{IMAGE_DATA}"/>'
+            for i in range(n)
+        )
+        + "</g>"
+    )
+
+
+GENERATORS: Dict[str, Callable[[int], str]] = {
+    "rects": rects_svg,
+    "circles": circles_svg,
+    "nested_groups": nested_groups_svg,
+    "compound_path": compound_path_svg,
+    "uses": uses_svg,
+    "bezier_path": bezier_path_svg,
+    "lines": lines_svg,
+    "texts": texts_svg,
+    "images": images_svg,
+}
@@ -1,8 +1,6 @@
 from pathlib import Path
 
-import geopandas
 from matplotlib import pyplot
-from warg import flatten_mapping
 
 from svaguely import parse_svg
 
@@ -10,29 +8,11 @@ svg_elements, _ = parse_svg(
     # Path(__file__).parent.parent / "tests" / "fixtures" / "svaguely.svg",
     Path(__file__).parent.parent / "tests" / "fixtures" / "svg_logo.svg",
     output_space=1,
+    as_table=True,
 )
 
-svg_elements = flatten_mapping(svg_elements)
-
-collected = []
-texts = []
-texts_size = []
-
-for element_name, element_shape in svg_elements.items():
-    collected.append(element_shape.geometry)
-    if "text" in element_shape.extras:
-        texts.append(element_shape.extras["text"])
-    else:
-        texts.append(None)  # element_name)
-
-    if "size_pt" in element_shape.extras:
-        texts_size.append(element_shape.extras["size_pt"])
-    else:
-        texts_size.append(None)  # element_name)
-
-frame = geopandas.GeoDataFrame(
-    {"label": texts, "geometry": collected, "size_pt": texts_size}
-)
+frame = svg_elements.to_geodataframe(extras_columns=("text", "size_pt"))
+frame = frame.rename(columns={"text": "label"})
 
 frame["coords"] = frame["geometry"].apply(lambda x: x.representative_point().coords[:])
 frame["coords"] = frame["geometry"].apply(lambda x: x.centroid.coords[:])
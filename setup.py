@@ -157,6 +157,7 @@ class SvaguelyPackage:
         return {
             "console_scripts": [
                 # "name_of_executable = module.with:function_to_execute"
+                "svaguely = svaguely.entry_points.cli:main",
                 "draugr-darkmode-toggle = draugr.entry_points.toggle_darkmode:main",
                 "draugr-tb = draugr.entry_points.tensorboard_entry_point:main",
                 "draugr-cpu = draugr.entry_points.cpu_usage_entry_point:main",
@@ -1,16 +1,45 @@
-import io
-import json
+import multiprocessing
+import mmap
 import os
+import re
+import threading
+from contextlib import ExitStack, contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from itertools import count
-from typing import Any, Dict, Optional, Tuple, Union
-
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    TextIO,
+    Tuple,
+    Union,
+)
+from xml.etree import ElementTree
+
+import numpy
+import shapely
 import svgelements
 from warg import Number
 
 from .conversion import *
+from .cache import *
 from .data_models import *
+from .diagnostics import *
+from .extras import *
 from .metadata import *
+from .profiling import *
 from .rendering import *
+from .spatial_index import *
+from .writers import *
+from .data_models import _iter_leaves
 
 __project__ = "Svaguely"
 __doc__ = """\
@@ -28,282 +57,942 @@ PROJECT_VERSION = __version__
 
 logger = logging.getLogger(__name__)
 
-__all__ = ["convert_elements", "parse_svg", "COUNTER_ELEMENT_ID_NAME"]
+__all__ = [
+    "convert_elements",
+    "convert_in_process_pool",
+    "iter_convert_elements",
+    "iter_svg",
+    "parse_svg",
+    "read_svg_metadata",
+    "COUNTER_ELEMENT_ID_NAME",
+]
 
 COUNTER_ELEMENT_ID_NAME = "ELEMENT_COUNTER_"
 
+SvgSource = Union[Path, str, bytes, bytearray, memoryview, BinaryIO, TextIO]
+"""Path to a svg, a svg document as str or bytes-like, or a file object to read one from"""
 
-def convert_elements(
+# A str starting with "<" (after whitespace) is a document, anything else is a path
+SVG_DOCUMENT_START = re.compile(r"\s*<")
+
+
+def _children(
+    elements: Union[svgelements.Group, svgelements.Use], release: bool
+) -> Iterator[svgelements.SVGElement]:
+    if not release:
+        yield from elements
+        return
+
+    elements.reverse()  # Pop from the end, dropping the reference to every processed child
+    while elements:
+        yield elements.pop()
+
+
+class _TraversalLevel(NamedTuple):
+    children: Iterator[Any]
+    key_path: Tuple[str, ...]
+    level_keys: Set[str]
+    name_counter: Iterator[int]
+    use_frame: Optional[Tuple[Tuple[str, ...], numpy.ndarray]]
+    name_seperator: str
+    explicit_names: bool
+    use: Optional[Tuple[str, Optional[str], numpy.ndarray]] = None
+
+
+def iter_convert_elements(
     elements: svgelements.Group,
     *,
     w: Optional[Number] = 1,
     h: Optional[Number] = 1,
     name_seperator: str = "|",
     explicit_names: bool = False,
-) -> Dict[str, SvgElement]:
+    curve_tolerance: Optional[float] = None,
+    release: bool = False,
+    lazy: bool = False,
+    extras: ExtrasPolicy = EXTRAS_FULL,
+    use_memo: Optional[UseGeometryMemo] = None,
+    use_frame: Optional[Tuple[Tuple[str, ...], numpy.ndarray]] = None,
+    profiler: Optional[ParseProfiler] = None,
+    converters: Optional[ConverterRegistry] = None,
+    diagnostics: Optional[ConversionDiagnostics] = None,
+    bbox: Optional[Bounds] = None,
+    bounds_memo: Optional[BoundsMemo] = None,
+) -> Iterator[Tuple[Tuple[str, ...], Optional[SvgElement]]]:
     """
+    Convert svgelements one at a time, yielding each as soon as it is converted.
+
+    Every element is yielded with the path of unique ids leading to it, the same keys as in the nested dict of
+    convert_elements. Groups are announced with a None element before their children.
 
+    :param curve_tolerance: Max chord error when flattening curves, None samples curves at a fixed step
     :param explicit_names:
     :param elements:
     :param w:
     :param h:
     :param name_seperator:
-    :return:
+    :param release: Remove every element from its group once converted, consuming the svgelements tree
+    :param lazy: Defer the geometry conversion of shapes until SvgElement.geometry is first accessed
+    :param extras: Svg attributes to keep as extras, EXTRAS_NONE, EXTRAS_FULL, a whitelist of keys or an
+     ExtrasInterner to share interned extras with other calls
+    :param use_memo: Converted geometries of elements referenced by <use>, to share with other calls
+    :param use_frame: Key within the referenced element and use_transform of the enclosing <use>, set when
+     converting the elements referenced by a <use>
+    :param profiler: Measures the conversion of every element and the stages within
+    :param converters: Element converters by svgelements type, DEFAULT_CONVERTERS if None
+    :param diagnostics: Collects the unsupported elements. If None they are logged as one aggregated warning once
+     the iteration ends
+    :param bbox: Only convert the elements within this (min_x, min_y, max_x, max_y) box in output space. Groups,
+     <use> and elements whose bounds are outside are skipped before conversion, converted elements are kept if
+     their geometry intersects the box, or if lazy, their bounds
+    :param bounds_memo: Svg space bounds of the elements already measured, to share with other calls on the same
+     still referenced elements
+    :return: Iterator of (path of unique ids, SvgElement or None for groups)
     """
-    return_dict = {}
-    name_counter = iter(count())
+    if converters is None:
+        converters = DEFAULT_CONVERTERS
 
-    if not isinstance(elements, svgelements.Group):
+    if not isinstance(extras, ExtrasInterner):
+        extras = ExtrasInterner(extras)
+
+    if use_memo is None:
+        use_memo = UseGeometryMemo(scale_invariant=curve_tolerance is None)
+
+    if (
+        not isinstance(elements, svgelements.Group)
+        or converters.resolve(type(elements)) is not None
+    ):
         elements = [elements]
 
-    for element in elements:
-        element_type = type(element)
-        element_filled = False
-        element_fill_color = None
-        element_stroke_width = None
-        element_stroke_color = None
-        element_color = None
-        element_name = None
+    if bbox is not None:
+        svg_bbox = svg_space_bounds(bbox, h)
+        bbox_geometry = shapely.box(*bbox)
+        bounds = BoundsMemo(converters) if bounds_memo is None else bounds_memo
+
+    # Explicit stack of levels instead of recursion, deep nesting would hit the recursion limit
+    levels = [
+        _TraversalLevel(
+            _children(elements, release),
+            (),
+            set(),
+            iter(count()),
+            use_frame,
+            name_seperator,
+            explicit_names,
+        )
+    ]
+    report_diagnostics = diagnostics is None
+    if report_diagnostics:
+        diagnostics = ConversionDiagnostics()
+
+    try:
+        while levels:
+            (
+                children,
+                key_path,
+                level_keys,
+                name_counter,
+                use_frame,
+                name_seperator,
+                explicit_names,
+                use,
+            ) = levels[-1]
+
+            if (
+                use is not None
+            ):  # Every element referenced by a <use> is a level of its own
+                use_unique_id, reference, transform = use
+                for ith, e in children:
+                    level_keys.add(f"{use_unique_id}_{ith}")
+                    yield (*key_path, f"{use_unique_id}_{ith}"), None
+
+                    levels.append(
+                        _TraversalLevel(
+                            (
+                                _children(e, release)
+                                if isinstance(e, svgelements.Group)
+                                and converters.resolve(type(e)) is None
+                                else iter((e,))
+                            ),
+                            (*key_path, f"{use_unique_id}_{ith}"),
+                            set(),
+                            iter(count()),
+                            (
+                                None
+                                if reference is None
+                                else ((reference, str(ith)), transform)
+                            ),
+                            "|",
+                            False,
+                        )
+                    )
+                    break
+                else:
+                    levels.pop()
+                continue
 
-        extras = {}
+            for element in children:
+                element_type = type(element)
+                element_fill_color = None
+                element_stroke_color = None
+                element_name = None
 
-        element_id = element.id
+                element_id = element.id
 
-        if element_id is None:
-            element_id = f"{COUNTER_ELEMENT_ID_NAME}{next(name_counter)}"
+                if element_id is None:
+                    element_id = f"{COUNTER_ELEMENT_ID_NAME}{next(name_counter)}"
 
-        element_id = str(element_id)
+                element_id = str(element_id)
 
-        if hasattr(element, "rx") or hasattr(element, "ry"):
-            element = svgelements.Path(element)
-            element = element.reify()
+                element_color = getattr(element, "color", None) or None
 
-        if hasattr(element, "color") and element.color:
-            element_color = element.color
+                fill = getattr(element, "fill", None)
+                if fill is not None and fill.hex:
+                    element_fill_color = fill.hex
 
-        if hasattr(element, "fill") and element.fill.hex:
-            element_fill_color = element.fill.hex
+                stroke = getattr(element, "stroke", None)
+                if stroke is not None and stroke.hex:
+                    element_stroke_color = stroke.hex
 
-        if hasattr(element, "stroke") and element.stroke.hex:
-            element_stroke_color = element.stroke.hex
+                element_stroke_width = getattr(element, "stroke_width", None) or None
 
-        if hasattr(element, "stroke_width") and element.stroke_width:
-            element_stroke_width = element.stroke_width
+                element_values = getattr(element, "values", None)
+                if element_values is not None:
+                    for key, value in element_values.items():
+                        if "label" in key:
+                            element_name = value
+                        elif "data-name" in key:
+                            element_name = value
 
-        if hasattr(element, "values"):
-            for key, value in element.values.items():
-                if "label" in key:
-                    element_name = value
-                elif "data-name" in key:
-                    element_name = value
+                element_unique_id = f"{element_id}"
+                if explicit_names:
+                    element_unique_id = (
+                        f"{element_unique_id}{name_seperator}{element_name}"
+                    )
 
-            extras.update(element.values)
+                    while element_unique_id in level_keys:
+                        element_unique_id = (
+                            f"{element_unique_id}{name_seperator}{next(name_counter)}"
+                        )
 
-        element_unique_id = f"{element_id}"
-        if explicit_names:
-            element_unique_id = f"{element_unique_id}{name_seperator}{element_name}"
+                # A converter registered for a group or <use> type, e.g. svgelements.SVG, converts it whole
+                element_converter = converters.resolve(element_type)
+
+                if element_converter is None and isinstance(element, svgelements.Group):
+                    level_keys.add(element_unique_id)
+                    if bbox is not None and bounds_disjoint(
+                        bounds.bounds(element), svg_bbox
+                    ):
+                        continue
+
+                    yield (*key_path, element_unique_id), None
+
+                    levels.append(
+                        _TraversalLevel(
+                            _children(element, release),
+                            (*key_path, element_unique_id),
+                            set(),
+                            iter(count()),
+                            (
+                                None
+                                if use_frame is None
+                                else ((*use_frame[0], element_unique_id), use_frame[1])
+                            ),
+                            name_seperator,
+                            explicit_names,
+                        )
+                    )
+                    break  # Descend, the children of this level resume once the group is done
+
+                if element_converter is None and isinstance(element, svgelements.Use):
+                    if bbox is not None and bounds_disjoint(
+                        bounds.bounds(element), svg_bbox
+                    ):
+                        level_keys.update(
+                            f"{element_unique_id}_{ith}" for ith in range(len(element))
+                        )
+                        continue
+
+                    levels.append(
+                        _TraversalLevel(
+                            enumerate(_children(element, release)),
+                            key_path,
+                            level_keys,
+                            name_counter,
+                            use_frame,
+                            name_seperator,
+                            explicit_names,
+                            (
+                                element_unique_id,
+                                use_reference(element),
+                                use_transform(element, h=h),
+                            ),
+                        )
+                    )
+                    break  # Descend into the referenced elements
+
+                if element_converter is None:  # E.g. style, linearGradient or clipPath
+                    diagnostics.on_unsupported(
+                        (element_values or {}).get("tag") or element_type.__name__,
+                        element.id,
+                    )
+                    continue
+
+                assert element_unique_id not in level_keys
+                level_keys.add(element_unique_id)
+
+                if bbox is not None and bounds_disjoint(
+                    bounds.bounds(element), svg_bbox
+                ):
+                    continue
+
+                geometry_converter, converted_extras = element_converter(
+                    element, w=w, h=h, tolerance=curve_tolerance, profiler=profiler
+                )
 
-            while element_unique_id in return_dict:
-                element_unique_id = (
-                    f"{element_unique_id}{name_seperator}{next(name_counter)}"
+                if use_frame is not None and geometry_converter is not None:
+                    geometry_converter = partial(
+                        use_memo.convert,
+                        (*use_frame[0], element_unique_id, use_geometry_style(element)),
+                        use_frame[1],
+                        geometry_converter,
+                    )
+
+                if profiler is not None and geometry_converter is not None:
+                    geometry_converter = partial(
+                        profiler.convert, element_type, element_id, geometry_converter
+                    )
+
+                svg_element_fields = dict(
+                    element_id=element_id,
+                    element_name=element_name,
+                    element_type=element_type,
+                    extras=extras(element_values, **converted_extras),
+                    color=element_color,
+                    fill_color=element_fill_color,
+                    stroke_color=element_stroke_color,
+                    stroke_width=element_stroke_width,
                 )
 
-        if isinstance(element, svgelements.Group):
-            converted_elements = convert_elements(
-                element,
-                w=w,
-                h=h,
-                name_seperator=name_seperator,
-                explicit_names=explicit_names,
-            )
-            if element_unique_id not in return_dict:
-                return_dict[element_unique_id] = converted_elements
-            else:
-                assert isinstance(return_dict[element_unique_id], Dict)
-                for k, v in converted_elements.items():
-                    assert k not in return_dict[element_unique_id]
-                    return_dict[element_unique_id][k] = v
+                if lazy and geometry_converter is not None:
+                    converted = LazySvgElement(
+                        geometry_converter=geometry_converter, **svg_element_fields
+                    )
+                else:
+                    converted = SvgElement(
+                        geometry=(
+                            None if geometry_converter is None else geometry_converter()
+                        ),
+                        **svg_element_fields,
+                    )
 
-            continue
+                    if bbox is not None and not shapely.intersects(
+                        converted.geometry, bbox_geometry
+                    ):
+                        continue
 
-        if isinstance(element, svgelements.Rect):
-            shape_geometry = rectangle_converter(element, w=w, h=h)
+                yield (*key_path, element_unique_id), converted
 
-        elif isinstance(element, svgelements.SimpleLine):
-            shape_geometry = simpleline_converter(element, w=w, h=h)
+            else:  # All children converted
+                levels.pop()
 
-        elif isinstance(element, svgelements.Polyline):
-            shape_geometry = polyline_converter(element, w=w, h=h)
+    finally:
+        if report_diagnostics and diagnostics:
+            logger.warning("%s", diagnostics)  # Formatted only if emitted
 
-        elif isinstance(element, svgelements.Polygon):
-            shape_geometry = polygon_converter(element, w=w, h=h)
 
-        elif isinstance(element, svgelements.Point):
-            shape_geometry = point_converter(element, w=w, h=h)
+def convert_elements(
+    elements: svgelements.Group,
+    *,
+    w: Optional[Number] = 1,
+    h: Optional[Number] = 1,
+    name_seperator: str = "|",
+    explicit_names: bool = False,
+    curve_tolerance: Optional[float] = None,
+    lazy: bool = False,
+    extras: ExtrasPolicy = EXTRAS_FULL,
+    use_memo: Optional[UseGeometryMemo] = None,
+    profiler: Optional[ParseProfiler] = None,
+    converters: Optional[ConverterRegistry] = None,
+    diagnostics: Optional[ConversionDiagnostics] = None,
+    bbox: Optional[Bounds] = None,
+    bounds_memo: Optional[BoundsMemo] = None,
+) -> Dict[str, SvgElement]:
+    """
 
-        elif isinstance(element, svgelements.Circle):
-            if False:
-                e = svgelements.Path(element)
-                e = e.reify()
-                shape_geometry = path_converter(e, w=w, h=h)
-            else:
-                shape_geometry = circle_converter(element, w=w, h=h)
+    :param curve_tolerance: Max chord error when flattening curves, None samples curves at a fixed step
+    :param lazy: Defer the geometry conversion of shapes until SvgElement.geometry is first accessed
+    :param extras: Svg attributes to keep as extras, EXTRAS_NONE, EXTRAS_FULL, a whitelist of keys or an
+     ExtrasInterner to share interned extras with other calls
+    :param use_memo: Converted geometries of elements referenced by <use>, to share with other calls
+    :param profiler: Measures the conversion of every element and the stages within
+    :param converters: Element converters by svgelements type, DEFAULT_CONVERTERS if None
+    :param diagnostics: Collects the unsupported elements. If None they are logged as one aggregated warning
+    :param bbox: Only convert the elements within this (min_x, min_y, max_x, max_y) box in output space, see
+     iter_convert_elements
+    :param bounds_memo: Svg space bounds of the elements already measured, see iter_convert_elements
+    :param explicit_names:
+    :param elements:
+    :param w:
+    :param h:
+    :param name_seperator:
+    :return:
+    """
+    return_dict = {}
+    groups = [return_dict]  # Dicts of the groups along the path of the current element
+
+    for key_path, converted in iter_convert_elements(
+        elements,
+        w=w,
+        h=h,
+        name_seperator=name_seperator,
+        explicit_names=explicit_names,
+        curve_tolerance=curve_tolerance,
+        lazy=lazy,
+        extras=extras,
+        use_memo=use_memo,
+        profiler=profiler,
+        converters=converters,
+        diagnostics=diagnostics,
+        bbox=bbox,
+        bounds_memo=bounds_memo,
+    ):
+        element_unique_id = key_path[-1]
+        group_dict = groups[len(key_path) - 1]  # Groups are announced before children
+
+        if converted is None:  # Groups with the same unique id are merged
+            del groups[len(key_path) :]
+            groups.append(group_dict.setdefault(element_unique_id, {}))
+            assert isinstance(groups[-1], Dict)
+        else:
+            assert element_unique_id not in group_dict
+            group_dict[element_unique_id] = converted
+
+    return return_dict
 
-        elif isinstance(element, (svgelements.Ellipse, svgelements.Curve)):
-            e = svgelements.Path(element)
-            e_reified = e.reify()
-            shape_geometry = path_converter(e_reified, w=w, h=h)
 
-        elif isinstance(element, svgelements.Path):
-            shape_geometry = path_converter(element, w=w, h=h)
+_POOL_ELEMENTS = None
+"""Elements to convert, only set in the workers, by their initializer"""
 
-        elif isinstance(element, svgelements.Text):
-            # Text objects. The lack of a font engine makes this class more of a parsed stub class.
-            shape_geometry, text_content, font_meta_data = text_converter(
-                element, w=w, h=h
-            )
-            extras["text"] = text_content
-            extras["font"] = font_meta_data
-
-        elif isinstance(element, svgelements.Pattern):
-            ...  # Pattern objects. These are parsed they are not currently assigned.
-
-        elif isinstance(element, svgelements.Image):
-            shape_geometry, image_content = image_converter(element, w=w, h=h)
-            ...  # Image creates SVGImage objects which will load Images if Pillow is installed with a call to
-            # .load(). Correct parsing of x, y, width, height and viewbox.
-            extras["image"] = image_content
-        elif isinstance(element, svgelements.Use):
-            for ith, e in enumerate(element):
-                return_dict[f"{element_unique_id}_{ith}"] = convert_elements(
-                    e, w=w, h=h
-                )
-            continue
 
-        elif isinstance(element, svgelements.Desc) and False:  # extract metadata
-            if element.id == METADATA_KEY:  # check if its our description metadata
-                assert metadata_dict is None
-                metadata_dict = json.loads(
-                    element.values["attributes"]["desc"].replace("'", '"')
-                )
+def _set_pool_elements(elements: Sequence[svgelements.SVGElement]) -> None:
+    global _POOL_ELEMENTS
+    _POOL_ELEMENTS = elements
 
-        elif isinstance(element, svgelements.Title) and False:
-            ...  # TODO implement
-        else:
-            """Nested SVG objects. (Caveats see Non-Supported)."""
 
-            if True:
-                logger.warning(
-                    f"Not supported class: {f'{element.string_xml()} {type(element)}'}"
-                )
-            continue
+def _convert_pool_element(convert: Callable, index: int) -> Dict[str, SvgElement]:
+    return convert(_POOL_ELEMENTS[index])
 
-        assert element_unique_id not in return_dict
-
-        return_dict[element_unique_id] = SvgElement(
-            element_id=element_id,
-            element_name=element_name,
-            geometry=shape_geometry,
-            element_type=element_type,
-            extras=extras,
-            color=element_color,
-            fill_color=element_fill_color,
-            stroke_color=element_stroke_color,
-            stroke_width=element_stroke_width,
-        )
 
-    return return_dict
+def _pool_context() -> multiprocessing.context.BaseContext:
+    """Fork while this is the only thread, a forked child could inherit a lock held by another thread"""
+    start_methods = multiprocessing.get_all_start_methods()
+    if "fork" in start_methods and threading.active_count() == 1:
+        return multiprocessing.get_context("fork")
+    if "forkserver" in start_methods:
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def _convert_collecting_diagnostics(
+    convert: Callable, element: svgelements.SVGElement
+) -> Tuple[Dict[str, SvgElement], ConversionDiagnostics]:
+    diagnostics = ConversionDiagnostics()
+    return convert(element, diagnostics=diagnostics), diagnostics
+
+
+def convert_in_process_pool(
+    convert: Callable,
+    elements: Sequence[svgelements.SVGElement],
+    workers: int,
+) -> List[Dict[str, SvgElement]]:
+    """
+    Convert independent elements in a process pool, results are returned in the order of elements.
+
+    The elements are handed to every worker once, by its initializer, and the tasks only carry an index. Workers
+    are forked while the calling process has a single thread, inheriting the elements without pickling, otherwise
+    started by forkserver or spawn, receiving the elements pickled. The converted SvgElements are pickled back,
+    shapely geometries as WKB.
+
+    :param convert: Picklable conversion callable, e.g. a partial of convert_elements
+    :param elements: Elements to convert
+    :param workers: Number of processes
+    :return: Converted elements
+    """
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=_pool_context(),
+        initializer=_set_pool_elements,
+        initargs=(elements,),
+    ) as executor:
+        return list(
+            executor.map(partial(_convert_pool_element, convert), range(len(elements)))
+        )
 
 
 def parse_svg(
-    svg_filestream: Union[Path, str, bytes],
+    svg_filestream: SvgSource,
     output_space: Optional[Union[Number, Tuple[Number, Number]]] = None,
     name_seperator: str = "|",
     explicit_names: bool = False,
-) -> Tuple[Dict[Any, Dict[str, SvgElement]], Optional[Any]]:
+    curve_tolerance: Optional[float] = None,
+    workers: Optional[int] = None,
+    lazy: bool = False,
+    as_table: bool = False,
+    extras: ExtrasPolicy = EXTRAS_FULL,
+    cache: Optional[ParseCache] = None,
+    profiler: Optional[ParseProfiler] = None,
+    converters: Optional[ConverterRegistry] = None,
+    diagnostics: Optional[ConversionDiagnostics] = None,
+    spatial_index: Optional[SvgElementIndex] = None,
+    bbox: Optional[Bounds] = None,
+) -> Tuple[Union[Dict[Any, Dict[str, SvgElement]], SvgElementTable], Optional[Any]]:
     """
     Main function of converting. This reads the svg and parses it.
     Then converts the svgelements into classes with shapely geometries.
 
+    svgelements parses nested groups recursively, documents nested deeper than the recursion limit need the
+    caller to raise it with sys.setrecursionlimit. It is process wide, so it is never changed here.
+
+    :param curve_tolerance: Max chord error when flattening curves, in output space units.
+     None samples every curve at a fixed step
+    :param workers: Convert the top level elements (layers) in a pool of this many processes,
+     the result is the same as converting serially. None or 1 converts in this process
+    :param lazy: Defer the geometry conversion of shapes until SvgElement.geometry is first accessed, for workflows
+     filtering on ids, names, colors or extras before needing geometries
+    :param as_table: Return the elements as a columnar SvgElementTable instead of a nested mapping
+    :param extras: Svg attributes to keep as extras, EXTRAS_NONE, EXTRAS_FULL or a whitelist of keys.
+     Repeated values are interned and identical extras are shared between elements
+    :param cache: Look up the result by the content of the svg and the options above, and store it on a miss.
+     Geometries are converted before storing, even if lazy
+    :param profiler: Receives the time of the cache, parse, convert, table and index stages, and without workers
+     the time and vertex count of every element and the stages within its conversion
+    :param converters: Element converters by svgelements type, DEFAULT_CONVERTERS if None. Must be picklable with
+     workers
+    :param diagnostics: Collects the unsupported elements. If None they are logged as one aggregated warning
+    :param spatial_index: Built over the elements of the result, also on a cache hit. Converts lazy geometries
+    :param bbox: Only convert the elements within this (min_x, min_y, max_x, max_y) box in output space, e.g. a
+     map tile. Layers, groups and elements are skipped by their bounds before any conversion, the result holds
+     the elements of a full parse whose geometry intersects the box. If lazy, elements are kept by their bounds
     :param explicit_names:
     :param name_seperator: For nested group, what seperator should be used to denoted sub groups
     :param output_space:
-    :param svg_filestream: Path to the svg
+    :param svg_filestream: Path to the svg (memory mapped), the svg as str, bytes, bytearray or memoryview (not
+     copied), or a file object
     :return: dataclass of svg elements and dataclass of metadata
     """
 
-    if output_space:
-        if isinstance(output_space, (float, int)):
-            w = h = output_space
-        else:
-            w, h = output_space
+    if not isinstance(extras, ExtrasInterner):
+        # Also keys the cache on the whitelist as a set, any order of the same keys hits
+        extras = ExtrasInterner(extras)
+
+    with ExitStack() as inputs:
+        if (
+            cache is not None
+        ):  # Hashed and parsed from the same buffer, a mapped file is read once
+            svg_filestream = inputs.enter_context(_svg_buffer(svg_filestream))
+            cache_key = cache.key(
+                svg_filestream,
+                version=__version__,
+                output_space=output_space,
+                name_seperator=name_seperator,
+                explicit_names=explicit_names,
+                curve_tolerance=curve_tolerance,
+                extras=extras,
+                converters=converters,
+                # Lazy parses keep the elements within the box by their bounds
+                bbox=None if bbox is None else (bbox, lazy),
+            )
 
-    else:
-        w = h = 1
+            with profile_stage(profiler, "cache"):
+                cached = cache.get(cache_key)
+            if cached is not None:
+                return _parse_result(
+                    *cached,
+                    as_table=as_table,
+                    spatial_index=spatial_index,
+                    profiler=profiler,
+                )
 
-    name_counter = iter(count())
+        w, h = _output_size(output_space)
+        with profile_stage(profiler, "parse"):
+            svg = _parse_svg_document(svg_filestream, w=w, h=h)
+
+    metadata_dict = None
 
-    if isinstance(svg_filestream, bytes):
-        svg_filestream = io.BytesIO(svg_filestream)
-
-    elif not os.path.isfile(svg_filestream):
-        svg_filestream = io.StringIO(str(svg_filestream))
-
-    svg = svgelements.SVG.parse(
-        svg_filestream,
-        reify=True,
-        ppi=svgelements.DEFAULT_PPI,
-        width=w,
-        height=h,
-        color="black",
-        transform=None,
-        context=None,
-        parse_display_none=False,
-        on_error="ignore",
+    bounds = None
+    if bbox is not None:
+        svg_bbox = svg_space_bounds(bbox, h)
+        bounds = BoundsMemo(converters or DEFAULT_CONVERTERS)
+
+    element_unique_ids = []
+    elements_to_convert = []
+    for element_unique_id, element in _iter_top_level_elements(
+        svg,
+        name_seperator=name_seperator,
+        explicit_names=explicit_names,
+        converters=converters,
+    ):
+        if isinstance(element, svgelements.Desc) and element.id == METADATA_KEY:
+            # Our description metadata
+            assert metadata_dict is None
+            metadata_dict = decode_metadata_desc(element.values["attributes"]["desc"])
+
+        elif element_unique_id is not None:
+            if bbox is not None and bounds_disjoint(bounds.bounds(element), svg_bbox):
+                continue  # The whole layer is outside, never sent to the workers
+
+            element_unique_ids.append(element_unique_id)
+            elements_to_convert.append(element)
+
+    convert = partial(
+        convert_elements,
+        w=w,
+        h=h,
+        name_seperator=name_seperator,
+        explicit_names=explicit_names,
+        curve_tolerance=curve_tolerance,
+        lazy=lazy,
+        extras=extras,
+        converters=converters,
+        bbox=bbox,
     )
 
-    metadata_dict = None
+    with profile_stage(profiler, "convert"):
+        report_diagnostics = diagnostics is None
+        if report_diagnostics:
+            diagnostics = ConversionDiagnostics()
+
+        if workers is not None and workers > 1 and len(elements_to_convert) > 1:
+            converted = []
+            for converted_elements, worker_diagnostics in convert_in_process_pool(
+                partial(_convert_collecting_diagnostics, convert),
+                elements_to_convert,
+                workers,
+            ):
+                converted.append(converted_elements)
+                diagnostics.update(worker_diagnostics)
+        else:
+            # The bounds measured while pruning the layers are reused, workers get copies of the elements
+            converted = map(
+                partial(
+                    convert,
+                    profiler=profiler,
+                    diagnostics=diagnostics,
+                    bounds_memo=bounds,
+                ),
+                elements_to_convert,
+            )
 
-    shape_elements = {}
-    for element in svg:
-        if isinstance(element, svgelements.Desc):  # extract metadata
-            if element.id == METADATA_KEY:  # check if its our description metadata
-                assert metadata_dict is None
-                metadata_dict = json.loads(
-                    element.values["attributes"]["desc"].replace("'", '"')
-                )
+        shape_elements = {}
+        for element_unique_id, converted_elements in zip(element_unique_ids, converted):
+            if element_unique_id not in shape_elements:
+                shape_elements[element_unique_id] = converted_elements
+            else:
+                assert isinstance(shape_elements[element_unique_id], Dict)
+                for k, v in converted_elements.items():
+                    assert k not in shape_elements[element_unique_id]
+                    shape_elements[element_unique_id][k] = v
 
-        elif isinstance(element, svgelements.Title):
-            ...  # TODO implement
+    if report_diagnostics and diagnostics:
+        logger.warning("%s", diagnostics)
 
-        else:
-            element_id = element.id
-            if element_id:
-                element_unique_id = str(element_id)
+    if cache is not None:
+        with profile_stage(profiler, "cache"):
+            cache.put(cache_key, shape_elements, metadata_dict)
 
-                if explicit_names:
-                    while element_unique_id in shape_elements:
-                        element_unique_id = (
-                            f"{element_id}{name_seperator}{next(name_counter)}"
-                        )
+    return _parse_result(
+        shape_elements,
+        metadata_dict,
+        as_table=as_table,
+        spatial_index=spatial_index,
+        profiler=profiler,
+    )
 
-            else:
-                element_unique_id = f"{COUNTER_ELEMENT_ID_NAME}{next(name_counter)}"
 
-            converted_elements = convert_elements(
+def _parse_result(
+    shape_elements: Dict[Any, Dict[str, SvgElement]],
+    metadata_dict: Optional[Any],
+    *,
+    as_table: bool,
+    spatial_index: Optional[SvgElementIndex],
+    profiler: Optional[ParseProfiler],
+) -> Tuple[Union[Dict[Any, Dict[str, SvgElement]], SvgElementTable], Optional[Any]]:
+    if as_table:
+        with profile_stage(profiler, "table"):
+            table = SvgElementTable.from_mapping(shape_elements)
+        if spatial_index is not None:
+            spatial_index.build_from_table(table)
+        return table, metadata_dict
+
+    if spatial_index is not None:
+        with profile_stage(profiler, "index"):
+            spatial_index.build(_iter_leaves(shape_elements))
+    return shape_elements, metadata_dict
+
+
+def iter_svg(
+    svg_filestream: SvgSource,
+    output_space: Optional[Union[Number, Tuple[Number, Number]]] = None,
+    name_seperator: str = "|",
+    explicit_names: bool = False,
+    curve_tolerance: Optional[float] = None,
+    lazy: bool = False,
+    extras: ExtrasPolicy = EXTRAS_FULL,
+    profiler: Optional[ParseProfiler] = None,
+    converters: Optional[ConverterRegistry] = None,
+    diagnostics: Optional[ConversionDiagnostics] = None,
+    bbox: Optional[Bounds] = None,
+) -> Iterator[Tuple[Tuple[str, ...], SvgElement]]:
+    """
+    Streaming variant of parse_svg, yielding every SvgElement as soon as it is converted.
+
+    Nothing is accumulated, and every svgelements node is released once converted, so memory stays flat beyond the
+    parsed svgelements document. Stopping the iteration early skips the conversion of the remaining elements.
+
+    :param curve_tolerance: Max chord error when flattening curves, in output space units.
+     None samples every curve at a fixed step
+    :param lazy: Defer the geometry conversion of shapes until SvgElement.geometry is first accessed
+    :param extras: Svg attributes to keep as extras, EXTRAS_NONE, EXTRAS_FULL or a whitelist of keys.
+     Repeated values are interned and identical extras are shared between the elements of a top level element, so
+     nothing is kept alive past it
+    :param profiler: Receives the time of the parse stage, and the time and vertex count of every element and the
+     stages within its conversion
+    :param converters: Element converters by svgelements type, DEFAULT_CONVERTERS if None
+    :param diagnostics: Collects the unsupported elements. If None they are logged as one aggregated warning once
+     the iteration ends
+    :param bbox: Only convert the elements within this (min_x, min_y, max_x, max_y) box in output space, see
+     parse_svg
+    :param explicit_names:
+    :param name_seperator: For nested group, what seperator should be used to denoted sub groups
+    :param output_space:
+    :param svg_filestream: Path to the svg (memory mapped), the svg as str, bytes, bytearray or memoryview (not
+     copied), or a file object
+    :return: Iterator of (path of unique ids, SvgElement), the path matches the keys of the nested dict of parse_svg
+    """
+    w, h = _output_size(output_space)
+    with profile_stage(profiler, "parse"):
+        svg = _parse_svg_document(svg_filestream, w=w, h=h)
+
+    if bbox is not None:
+        svg_bbox = svg_space_bounds(bbox, h)
+
+    report_diagnostics = diagnostics is None
+    if report_diagnostics:
+        diagnostics = ConversionDiagnostics()
+
+    try:
+        for element_unique_id, element in _iter_top_level_elements(
+            svg,
+            name_seperator=name_seperator,
+            explicit_names=explicit_names,
+            release=True,
+            converters=converters,
+        ):
+            if element_unique_id is None:
+                continue
+
+            # One memo per layer, the ids of released elements may be reused by later layers
+            bounds = None
+            if bbox is not None:
+                bounds = BoundsMemo(converters or DEFAULT_CONVERTERS)
+                if bounds_disjoint(bounds.bounds(element), svg_bbox):
+                    continue
+
+            for key_path, converted in iter_convert_elements(
                 element,
                 w=w,
                 h=h,
                 name_seperator=name_seperator,
                 explicit_names=explicit_names,
-            )
+                curve_tolerance=curve_tolerance,
+                release=True,
+                lazy=lazy,
+                extras=extras,
+                profiler=profiler,
+                converters=converters,
+                diagnostics=diagnostics,
+                bbox=bbox,
+                bounds_memo=bounds,
+            ):
+                if converted is not None:
+                    yield (element_unique_id, *key_path), converted
+    finally:
+        if report_diagnostics and diagnostics:
+            logger.warning("%s", diagnostics)
+
+
+def read_svg_metadata(svg_filestream: SvgSource) -> Optional[Any]:
+    """
+    Read the metadata written by add_metadata_desc_tag without parsing the svg into svgelements or converting it.
+    The document is scanned incrementally, stopping at the metadata <desc> element, and the elements before it
+    are discarded as they are scanned.
+
+    :param svg_filestream: Path to the svg (memory mapped), the svg as str, bytes, bytearray or memoryview (not
+     copied), or a file object
+    :return: The metadata, as returned by parse_svg. None if the svg has none
+    """
+    with _open_svg_source(svg_filestream) as source:
+        root = None
+        depth = 0
+        for event, element in ElementTree.iterparse(source, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                if root is None:
+                    root = element
+                elif (
+                    depth == 2  # Top level, as in parse_svg
+                    and element.get("id") == METADATA_KEY
+                    and element.tag.rpartition("}")[2] == "desc"
+                ):
+                    desc = element.get("desc")
+                    return None if desc is None else decode_metadata_desc(desc)
 
-            if element_unique_id not in shape_elements:
-                shape_elements[element_unique_id] = converted_elements
             else:
-                assert isinstance(shape_elements[element_unique_id], Dict)
-                for k, v in converted_elements.items():
-                    assert k not in shape_elements[element_unique_id]
-                    shape_elements[element_unique_id][k] = v
+                depth -= 1
+                if depth == 1:
+                    root.clear()
 
-    return shape_elements, metadata_dict
+    return None
+
+
+def _output_size(
+    output_space: Optional[Union[Number, Tuple[Number, Number]]],
+) -> Tuple[Number, Number]:
+    if output_space:
+        if isinstance(output_space, (float, int)):
+            return output_space, output_space
+
+        return output_space
+
+    return 1, 1
+
+
+class _ChunkReader:
+    """Binary or text file interface over a buffer or str, reading chunks without copying the whole document"""
+
+    __slots__ = ("_data", "_position")
+
+    def __init__(self, data: Union[str, memoryview]):
+        self._data = data
+        self._position = 0
+
+    def read(self, size: Optional[int] = -1) -> Union[str, memoryview]:
+        start = self._position
+        end = len(self._data) if size is None or size < 0 else start + size
+        self._position = min(end, len(self._data))
+        return self._data[start:end]
+
+
+def _is_svg_document(svg_filestream: str) -> bool:
+    """A str holding a svg document rather than a path, without probing the filesystem"""
+    return SVG_DOCUMENT_START.match(svg_filestream) is not None
+
+
+@contextmanager
+def _svg_buffer(svg_filestream: SvgSource) -> Iterator[Any]:
+    """The content of the svg as a buffer, files are memory mapped"""
+    if isinstance(svg_filestream, (bytes, bytearray, memoryview)):
+        yield memoryview(svg_filestream)
+
+    elif hasattr(svg_filestream, "read"):
+        content = svg_filestream.read()
+        yield content.encode() if isinstance(content, str) else content
+
+    elif isinstance(svg_filestream, str) and _is_svg_document(svg_filestream):
+        yield svg_filestream.encode()
+
+    else:
+        with open(svg_filestream, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:  # Empty files can not be mapped
+                yield b""
+                return
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield mapped
+
+
+@contextmanager
+def _open_svg_source(svg_filestream: SvgSource) -> Iterator[Any]:
+    """A file object to parse the svg from, files are memory mapped"""
+    if isinstance(svg_filestream, (bytes, bytearray, memoryview)):
+        yield _ChunkReader(memoryview(svg_filestream))
+
+    elif hasattr(svg_filestream, "read"):  # File objects, also mmap
+        yield svg_filestream
+
+    elif isinstance(svg_filestream, str) and _is_svg_document(svg_filestream):
+        yield _ChunkReader(svg_filestream)
+
+    else:
+        with _svg_buffer(svg_filestream) as buffer:
+            yield (
+                buffer
+                if isinstance(buffer, mmap.mmap)
+                else _ChunkReader(memoryview(buffer))
+            )
+
+
+def _parse_svg_document(
+    svg_filestream: SvgSource, *, w: Number, h: Number
+) -> svgelements.SVG:
+    # svgelements recurses per level of nested groups while parsing, converting is iterative. The recursion limit
+    # is process wide, raising it here would race with other threads, so documents nested deeper than the limit
+    # need the caller to raise sys.setrecursionlimit before parsing
+    with _open_svg_source(svg_filestream) as source:
+        return svgelements.SVG.parse(
+            source,
+            reify=True,
+            ppi=svgelements.DEFAULT_PPI,
+            width=w,
+            height=h,
+            color="black",
+            transform=None,
+            context=None,
+            parse_display_none=False,
+            on_error="ignore",
+        )
+
+
+def _iter_top_level_elements(
+    svg: svgelements.SVG,
+    *,
+    name_seperator: str = "|",
+    explicit_names: bool = False,
+    release: bool = False,
+    converters: Optional[ConverterRegistry] = None,
+) -> Iterator[Tuple[Optional[str], svgelements.SVGElement]]:
+    """
+    Top level elements with their unique ids, None for the metadata desc, and for desc and title elements unless
+    converters has a converter for their type
+    """
+    if converters is None:
+        converters = DEFAULT_CONVERTERS
+
+    name_counter = iter(count())
+    element_unique_ids = set()
+
+    if release:  # <use> references are already resolved by the parse
+        svg.objects.clear()
+
+    for element in _children(svg, release):
+        if isinstance(element, (svgelements.Desc, svgelements.Title)) and (
+            element.id == METADATA_KEY or converters.resolve(type(element)) is None
+        ):
+            yield None, element
+            continue
+
+        element_id = element.id
+        if element_id:
+            element_unique_id = str(element_id)
+
+            if explicit_names:
+                while element_unique_id in element_unique_ids:
+                    element_unique_id = (
+                        f"{element_id}{name_seperator}{next(name_counter)}"
+                    )
+
+        else:
+            element_unique_id = f"{COUNTER_ELEMENT_ID_NAME}{next(name_counter)}"
+
+        element_unique_ids.add(element_unique_id)
+        yield element_unique_id, element
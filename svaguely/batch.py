@@ -0,0 +1,165 @@
+import glob
+import logging
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Optional, Tuple, Union
+
+from . import parse_svg
+from .writers import write_geojson
+
+__all__ = ["BatchResult", "collect_svg_files", "iter_batch_convert"]
+__author__ = "Christian Heider Lindbjerg <chen(at)mapspeople.com>"
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_SUFFIX = ".geojson"
+
+
+@dataclass
+class BatchResult:
+    source: Path
+    destination: Path
+    seconds: float
+    num_elements: int = 0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _glob_root(pattern: str) -> Path:
+    """The leading directories of a glob pattern without wildcards, the root its matches are mirrored from"""
+    root = Path()
+    for part in Path(pattern).parent.parts:
+        if glob.has_magic(part):
+            break
+        root /= part
+    return root
+
+
+def collect_svg_files(
+    sources: Iterable[Union[Path, str]],
+) -> List[Tuple[Path, Path]]:
+    """
+    Expand directories (recursively) and glob patterns into svg files. Files below a directory or matched by a glob
+    are relative to the directory or the leading directories of the glob without wildcards, files given directly
+    are relative to their own directory. A file given more than once, e.g. by a directory and a glob, is listed once.
+
+    :param sources: Svg files, directories or glob patterns
+    :return: List of (svg file, path relative to its source, mirrored in the output directory)
+    """
+    files = []
+    seen = set()
+
+    def add(path: Path, relative: Path) -> None:
+        key = path.resolve()
+        if key not in seen:
+            seen.add(key)
+            files.append((path, relative))
+
+    for source in sources:
+        source = Path(source)
+        if source.is_dir():
+            for p in sorted(source.rglob("*.svg")):
+                add(p, p.relative_to(source))
+        elif source.is_file():
+            add(source, Path(source.name))
+        else:
+            root = _glob_root(str(source))
+            for p in sorted(glob.glob(str(source), recursive=True)):
+                if os.path.isfile(p):
+                    add(Path(p), Path(p).relative_to(root))
+    return files
+
+
+def _convert_file(source: Path, destination: Path, parse_kwargs: Any) -> BatchResult:
+    """Convert one svg and write it, in the worker, so only the timing travels back"""
+    start = time.perf_counter()
+    try:
+        table, _ = parse_svg(source, as_table=True, **parse_kwargs)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        write_geojson(
+            table,
+            destination,
+            name_seperator=parse_kwargs.get("name_seperator", "|"),
+        )
+    except Exception:
+        return BatchResult(
+            source,
+            destination,
+            time.perf_counter() - start,
+            error=traceback.format_exc(),
+        )
+    return BatchResult(
+        source, destination, time.perf_counter() - start, num_elements=len(table)
+    )
+
+
+def iter_batch_convert(
+    sources: Iterable[Union[Path, str]],
+    output_directory: Union[Path, str],
+    *,
+    workers: Optional[int] = None,
+    **parse_kwargs: Any,
+) -> Iterator[BatchResult]:
+    """
+    Convert many svg files into GeoJSON files in a process pool, yielding the result of every file as soon as it is
+    written. The largest files are scheduled first, so they do not end up alone at the tail of the batch.
+
+    A file failing to convert does not stop the batch, its result carries the traceback. Files that would be
+    written to the output of an earlier file, e.g. files of the same name given directly from different
+    directories, are not converted and fail.
+
+    :param sources: Svg files, directories or glob patterns
+    :param output_directory: Directory of the outputs, mirroring the layout below source directories
+    :param workers: Number of processes, None or 1 converts in this process
+    :param parse_kwargs: Keyword arguments for parse_svg, e.g. output_space or curve_tolerance
+    :return: Iterator of BatchResult in order of completion
+    """
+    output_directory = Path(output_directory)
+
+    jobs = []
+    claimed = {}
+    for source, relative in collect_svg_files(sources):
+        destination = (output_directory / relative).with_suffix(OUTPUT_SUFFIX)
+        if destination in claimed:
+            yield BatchResult(
+                source,
+                destination,
+                0.0,
+                error=f"{destination} is already the output of {claimed[destination]}",
+            )
+            continue
+        claimed[destination] = source
+        jobs.append((source, destination))
+    jobs.sort(key=lambda job: job[0].stat().st_size, reverse=True)
+
+    if workers is None or workers <= 1:
+        for source, destination in jobs:
+            yield _convert_file(source, destination, parse_kwargs)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(_convert_file, source, destination, parse_kwargs): (
+                source,
+                destination,
+            )
+            for source, destination in jobs
+        }
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                # A worker died, e.g. killed for memory, failing the files still queued with it but not the batch
+                source, destination = futures[future]
+                result = BatchResult(
+                    source, destination, 0.0, error=traceback.format_exc()
+                )
+            yield result
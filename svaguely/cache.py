@@ -0,0 +1,202 @@
+import hashlib
+import logging
+import mmap
+import os
+import pickle
+import tempfile
+import time
+from dataclasses import fields
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Tuple, Union
+
+import shapely
+
+from .conversion.dispatch import DEFAULT_CONVERTERS, ConverterRegistry
+from .data_models import SvgElement, _iter_leaves
+from .extras import ExtrasInterner
+
+__all__ = ["ParseCache"]
+__author__ = "Christian Heider Lindbjerg <chen(at)mapspeople.com>"
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 1
+CACHE_ENTRY_SUFFIX = ".svaguely"
+
+
+def _canonical(value: Any) -> Any:
+    """Deterministic stand-in for an option value, for hashing"""
+    if isinstance(value, ExtrasInterner):
+        return _canonical(value.whitelist)
+    if isinstance(value, ConverterRegistry):
+        if value is DEFAULT_CONVERTERS:
+            return None
+        return tuple(
+            sorted((_canonical(k), _canonical(v)) for k, v in value.converters.items())
+        )
+    if isinstance(value, partial):
+        return (
+            _canonical(value.func),
+            _canonical(value.args),
+            tuple(sorted((k, _canonical(v)) for k, v in value.keywords.items())),
+        )
+    if callable(value) and hasattr(value, "__qualname__"):  # Functions and types
+        return f"{value.__module__}.{value.__qualname__}"
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(map(_canonical, value)))
+    if isinstance(value, (list, tuple)):
+        return tuple(map(_canonical, value))
+    return value
+
+
+def _touch(path: Path) -> None:
+    """
+    Set the modification time from the nanosecond clock. The file system clock ticks in milliseconds, entries used
+    within one tick would tie and be evicted by name.
+    """
+    now = time.time_ns()
+    os.utime(path, ns=(now, now))
+
+
+class ParseCache:
+    """
+    Content addressed on-disk cache of parse_svg results, keyed on a hash of the svg bytes and the parse options.
+
+    Every entry is one file holding the elements without their geometries, the geometries as one WKB array and the
+    metadata, so a hit skips both the svg parsing and all converters. The total size of the entries is capped, the
+    least recently used entries are evicted first.
+    """
+
+    def __init__(self, directory: Union[Path, str], max_bytes: int = 2**30):
+        """
+        :param directory: Directory of the cache entries, created if missing
+        :param max_bytes: Max total size of the entries on disk
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(svg_bytes: Union[bytes, memoryview, mmap.mmap], **options: Any) -> str:
+        """
+        :param svg_bytes: Content of the svg, any bytes-like buffer such as a memory mapped file
+        :param options: Parse options affecting the result
+        :return: Hex digest identifying the entry
+        """
+        digest = hashlib.sha256(svg_bytes)
+        digest.update(
+            repr(
+                (
+                    CACHE_FORMAT_VERSION,
+                    sorted((k, _canonical(v)) for k, v in options.items()),
+                )
+            ).encode()
+        )
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / f"{key}{CACHE_ENTRY_SUFFIX}"
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], Optional[Any]]]:
+        """
+        :param key: Key of the entry
+        :return: The cached elements and metadata, None on a miss
+        """
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, "rb") as f:
+                entry = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:  # Truncated or from an incompatible version
+            logger.warning(f"Dropping unreadable cache entry {entry_path}: {e}")
+            entry_path.unlink(missing_ok=True)
+            return None
+
+        try:
+            _touch(entry_path)  # Mark as recently used
+        except FileNotFoundError:  # Evicted in the meantime, the entry was read
+            pass
+
+        elements = entry["elements"]
+        for (_, element), geometry in zip(
+            _iter_leaves(elements), shapely.from_wkb(entry["geometries"])
+        ):
+            element.geometry = geometry
+
+        return elements, entry["metadata"]
+
+    def put(
+        self, key: str, elements: Mapping[str, Any], metadata: Optional[Any]
+    ) -> None:
+        """
+        Store the result of a parse and evict least recently used entries above the size cap.
+        Lazy geometries are converted.
+
+        :param key: Key of the entry
+        :param elements: Nested mapping of svg elements, as returned by parse_svg
+        :param metadata: Metadata of the svg
+        """
+        geometries = []
+
+        def strip_geometries(group: Mapping[str, Any]) -> Dict[str, Any]:
+            stripped = {}
+            for k, v in group.items():
+                if isinstance(v, Mapping):
+                    stripped[k] = strip_geometries(v)
+                else:
+                    geometries.append(v.geometry)
+                    stripped[k] = SvgElement(
+                        **{
+                            f.name: None if f.name == "geometry" else getattr(v, f.name)
+                            for f in fields(SvgElement)
+                        }
+                    )
+            return stripped
+
+        entry = {
+            "elements": strip_geometries(elements),
+            "geometries": shapely.to_wkb(geometries),
+            "metadata": metadata,
+        }
+
+        file_descriptor, temporary_path = tempfile.mkstemp(
+            dir=self.directory, suffix=".tmp"
+        )
+        try:
+            with os.fdopen(file_descriptor, "wb") as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_path, self._entry_path(key))
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+        _touch(self._entry_path(key))
+
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Remove the least recently used entries until the total size is within max_bytes
+        """
+        entries = []
+        for entry_path in self.directory.glob(f"*{CACHE_ENTRY_SUFFIX}"):
+            try:
+                stat = entry_path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry_path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, entry_path in sorted(entries):
+            if total_size <= self.max_bytes:
+                break
+            entry_path.unlink(missing_ok=True)
+            total_size -= size
+
+    def clear(self) -> None:
+        """
+        Remove all entries
+        """
+        for entry_path in self.directory.glob(f"*{CACHE_ENTRY_SUFFIX}"):
+            entry_path.unlink(missing_ok=True)
@@ -1,4 +1,9 @@
+from .bounds import *
 from .circle import *
+from .coordinates import *
+from .dispatch import *
+from .flattening import *
+from .holes import *
 from .image import *
 from .path import *
 from .point import *
@@ -7,6 +12,7 @@ from .polygon import *
 from .rectangle import *
 from .simple_line import *
 from .text import *
+from .use import *
 
 __author__ = "Christian Heider Lindbjerg <chen(at)mapspeople.com>"
 __doc__ = """\
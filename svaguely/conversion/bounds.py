@@ -0,0 +1,206 @@
+import math
+from math import inf
+from typing import Dict, Iterable, Optional, Tuple
+
+import svgelements
+from warg import Number
+
+from .dispatch import ConverterRegistry
+
+__all__ = [
+    "Bounds",
+    "EMPTY_BOUNDS",
+    "element_bounds",
+    "bounds_disjoint",
+    "svg_space_bounds",
+    "BoundsMemo",
+]
+__author__ = "Christian Heider Lindbjerg <chen(at)mapspeople.com>"
+
+Bounds = Tuple[float, float, float, float]
+
+EMPTY_BOUNDS: Bounds = (inf, inf, -inf, -inf)
+"""Bounds of elements without geometry, disjoint from any box"""
+
+SEGMENT_POINT_NAMES = ("start", "end", "control", "control1", "control2")
+
+TRAVERSED_OR_SKIPPED_TYPES = (
+    svgelements.Group,
+    svgelements.Use,
+    svgelements.Desc,
+    svgelements.Title,
+)
+"""Traversed or skipped by the conversion, unless a converter is registered for their type"""
+
+
+def _points_bounds(points: Iterable[svgelements.Point]) -> Bounds:
+    min_x, min_y, max_x, max_y = EMPTY_BOUNDS
+    for p in points:
+        x, y = p.x, p.y
+        if x < min_x:
+            min_x = x
+        if x > max_x:
+            max_x = x
+        if y < min_y:
+            min_y = y
+        if y > max_y:
+            max_y = y
+    return min_x, min_y, max_x, max_y
+
+
+def _segments_bounds(segments: Iterable[svgelements.PathSegment]) -> Bounds:
+    points = []
+    for segment in segments:
+        for name in SEGMENT_POINT_NAMES:
+            point = getattr(segment, name, None)
+            if point is not None:
+                points.append(point)
+
+        if isinstance(segment, svgelements.Arc) and segment.sweep:
+            # Flattening samples Arc.npoint, center + R(rotation) (rx cos t, ry sin t), bound by its whole ellipse.
+            # Neither prx and pry nor bbox() of reified arcs under non-uniform scale or skew match those samples
+            rotation = float(segment.get_rotation())
+            rx, ry = segment.rx, segment.ry
+            c = segment.center
+            dx = math.hypot(rx * math.cos(rotation), ry * math.sin(rotation))
+            dy = math.hypot(rx * math.sin(rotation), ry * math.cos(rotation))
+            points.append(svgelements.Point(c.x - dx, c.y - dy))
+            points.append(svgelements.Point(c.x + dx, c.y + dy))
+
+    return _points_bounds(points)
+
+
+def _transformed(bounds: Bounds, m: svgelements.Matrix) -> Bounds:
+    if m.is_identity() or bounds == EMPTY_BOUNDS:
+        return bounds
+
+    min_x, min_y, max_x, max_y = bounds
+    return _points_bounds(
+        m.point_in_matrix_space((x, y)) for x in (min_x, max_x) for y in (min_y, max_y)
+    )
+
+
+def element_bounds(element: svgelements.SVGElement) -> Optional[Bounds]:
+    """
+    Conservative bounding box of the geometry converted from a svg element, in svg space (y down). Read from
+    the attributes of the element and the control points of its curves, much cheaper than svgelements bbox()
+    which builds and measures a path, but not always tight.
+
+    :param element: A svg element, not a group or <use>
+    :return: (min_x, min_y, max_x, max_y), EMPTY_BOUNDS for elements without geometry, None if unknown
+    """
+    if isinstance(element, svgelements.Path):
+        return _transformed(_segments_bounds(element), element.transform)
+
+    if isinstance(element, svgelements.Rect):
+        x, y = float(element.x), float(element.y)
+        return _transformed(
+            (x, y, x + float(element.width), y + float(element.height)),
+            element.transform,
+        )
+
+    if isinstance(element, (svgelements.Circle, svgelements.Ellipse)):
+        cx, cy = float(element.cx), float(element.cy)
+        rx, ry = abs(float(element.rx)), abs(float(element.ry))
+        return _transformed((cx - rx, cy - ry, cx + rx, cy + ry), element.transform)
+
+    if isinstance(element, svgelements.SimpleLine):
+        if element.rotation:  # Rotated once more by simpleline_converter
+            return None
+        return _points_bounds(
+            (
+                svgelements.Point(element.implicit_x1, element.implicit_y1),
+                svgelements.Point(element.implicit_x2, element.implicit_y2),
+            )
+        )
+
+    if isinstance(element, (svgelements.Polyline, svgelements.Polygon)):
+        if element.rotation:  # Rotated by their converters
+            return None
+        return _points_bounds(element.points)
+
+    if isinstance(element, svgelements.Curve):
+        return _segments_bounds((element,))
+
+    if isinstance(element, (svgelements.Text, svgelements.Point)):
+        return element.x, element.y, element.x, element.y
+
+    if isinstance(element, (svgelements.Shape, svgelements.Image)):
+        return None
+
+    return EMPTY_BOUNDS
+
+
+def bounds_disjoint(a: Optional[Bounds], b: Bounds) -> bool:
+    """
+    :param a: Bounds, None if unknown
+    :param b: Bounds
+    :return: True if the bounds are known not to intersect
+    """
+    return a is not None and (a[0] > b[2] or a[2] < b[0] or a[1] > b[3] or a[3] < b[1])
+
+
+def svg_space_bounds(bounds: Bounds, h: Number) -> Bounds:
+    """
+    :param bounds: (min_x, min_y, max_x, max_y) in output space (y up)
+    :param h: Height of the output space
+    :return: The same box in svg space (y down)
+    """
+    min_x, min_y, max_x, max_y = bounds
+    return min_x, h - max_y, max_x, h - min_y
+
+
+class BoundsMemo:
+    """
+    Bounds of svg elements, of groups and <use> the union of the bounds of their children. Every element is
+    measured once, however deep the nesting, and a group holding an element of unknown bounds is unknown.
+    """
+
+    def __init__(self, converters: Optional[ConverterRegistry] = None):
+        """
+        :param converters: The converters of the parse. Groups, <use>, desc and title elements of a type with a
+         converter are converted whole instead of traversed or skipped, so their bounds are unknown
+        """
+        self._bounds: Dict[int, Optional[Bounds]] = {}
+        self._converters = converters
+
+    def bounds(self, element: svgelements.SVGElement) -> Optional[Bounds]:
+        """
+        :param element: A svg element, group or <use>
+        :return: Bounds in svg space, EMPTY_BOUNDS for elements without geometry, None if unknown
+        """
+        memo = self._bounds
+        # Explicit stack, post order, as deep nesting would hit the recursion limit
+        stack = [(element, False)]
+        while stack:
+            e, children_measured = stack.pop()
+            if id(e) in memo:
+                continue
+
+            if (
+                self._converters is not None
+                and isinstance(e, TRAVERSED_OR_SKIPPED_TYPES)
+                and self._converters.resolve(type(e)) is not None
+            ):
+                memo[id(e)] = None
+            elif not isinstance(e, (svgelements.Group, svgelements.Use)):
+                memo[id(e)] = element_bounds(e)
+            elif not children_measured:
+                stack.append((e, True))
+                stack.extend((child, False) for child in e)
+            else:
+                union = EMPTY_BOUNDS
+                for child in e:
+                    child_bounds = memo[id(child)]
+                    if child_bounds is None:
+                        union = None
+                        break
+                    union = (
+                        min(union[0], child_bounds[0]),
+                        min(union[1], child_bounds[1]),
+                        max(union[2], child_bounds[2]),
+                        max(union[3], child_bounds[3]),
+                    )
+                memo[id(e)] = union
+
+        return memo[id(element)]
@@ -1,20 +1,103 @@
+import math
+from functools import lru_cache
+from typing import Optional, Union
+
+import numpy
 import shapely
 import svgelements
 from warg import Number
 
-__all__ = ["circle_converter"]
+__all__ = ["circle_converter", "ellipse_converter", "unit_circle", "num_ring_vertices"]
 __author__ = "Christian Heider Lindbjerg <chen(at)mapspeople.com>"
 
+# Same as flattening the four arcs of the ellipse path at the default step
+DEFAULT_NUM_VERTICES = 40
+MIN_NUM_VERTICES = 8
+
+
+@lru_cache(maxsize=None)
+def unit_circle(num_vertices: int) -> numpy.ndarray:
+    """
+    Precomputed table of points on the unit circle, starting at angle 0 and turning in the direction of positive
+    svg angles
+
+    :param num_vertices: Number of points
+    :return: Read only (num_vertices, 2) array of cos, sin
+    """
+    angles = numpy.arange(num_vertices) * (2 * math.pi / num_vertices)
+    table = numpy.stack([numpy.cos(angles), numpy.sin(angles)], axis=1)
+    table.flags.writeable = False
+    return table
+
+
+def num_ring_vertices(radius: float, tolerance: Optional[float] = None) -> int:
+    """
+    Number of vertices for a ring of radius such that the chord error stays below tolerance, rounded up to a
+    multiple of four so the table is symmetric in both axes and is shared between close radii
+
+    :param radius: Largest radius of the ellipse, in output space
+    :param tolerance: Max distance between the ellipse and the chords, None for a fixed number of vertices
+    :return: Number of vertices
+    """
+    if tolerance is None:
+        return DEFAULT_NUM_VERTICES
+
+    if radius <= tolerance:
+        return MIN_NUM_VERTICES
+
+    # Sagitta of a chord spanning angle a on radius r is r * (1 - cos(a / 2))
+    num_vertices = math.ceil(math.pi / math.acos(1 - tolerance / radius))
+    return max(MIN_NUM_VERTICES, -(-num_vertices // 4) * 4)
+
+
+def ellipse_converter(
+    item: Union[svgelements.Ellipse, svgelements.Circle],
+    *,
+    w: Number = 1,
+    h: Number = 1,
+    tolerance: Optional[float] = None,
+) -> Optional[shapely.Polygon]:
+    """
+    Polygonize an ellipse or circle directly from a unit circle table, scaled to the radii, moved to the center,
+    transformed by any transform left on the element after reification (rotation, skew) and flipped into the
+    output space.
+
+    :param item: The svg ellipse or circle
+    :param w: Width of the output space
+    :param h: Height of the output space
+    :param tolerance: Max chord error in output space, None for a fixed number of vertices
+    :return: Polygon of the ellipse, None if degenerate
+    """
+    rx, ry = float(item.rx), float(item.ry)
+    if rx == 0 or ry == 0:
+        return None
+
+    m = item.transform
+    linear = numpy.array([[m.a, -m.b], [m.c, -m.d]], dtype=numpy.float64)
+
+    num_vertices = num_ring_vertices(
+        max(abs(rx), abs(ry)) * numpy.linalg.norm(linear, 2), tolerance
+    )
+
+    ring = unit_circle(num_vertices) * (rx, ry) + (item.cx, item.cy)
+    ring = ring @ linear
+    ring += (m.e, h - m.f)
+
+    return shapely.polygons(ring)
+
 
 def circle_converter(
-    item: svgelements.Circle, *, w: Number = 1, h: Number = 1
-) -> shapely.Polygon:
-    cx = item.cx
-    cy = h - item.cy
-    r = item.implicit_r
-    circle_polygon = shapely.geometry.Point([cx, cy]).buffer(distance=r)
-    circle_coords = circle_polygon.exterior.coords
-    circle_linestr = shapely.geometry.LineString(circle_coords)
-    polygonize_circ = shapely.geometry.Polygon(circle_linestr)
-
-    return polygonize_circ
+    item: svgelements.Circle,
+    *,
+    w: Number = 1,
+    h: Number = 1,
+    tolerance: Optional[float] = None,
+) -> Optional[shapely.Polygon]:
+    """
+    :param item: The svg circle
+    :param w: Width of the output space
+    :param h: Height of the output space
+    :param tolerance: Max chord error in output space, None for a fixed number of vertices
+    :return: Polygon of the circle, None if degenerate
+    """
+    return ellipse_converter(item, w=w, h=h, tolerance=tolerance)
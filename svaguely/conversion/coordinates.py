@@ -0,0 +1,66 @@
+from math import cos, pi, sin
+from typing import Iterable, Tuple
+
+import numpy
+import svgelements
+from warg import Number
+
+__all__ = ["points_to_array", "flip_y", "rotate_coordinates"]
+__author__ = "Christian Heider Lindbjerg <chen(at)mapspeople.com>"
+
+ROTATION_EPSILON = 2.5e-16  # Same snapping of cos/sin as shapely.affinity.rotate
+
+
+def points_to_array(points: Iterable[svgelements.Point]) -> numpy.ndarray:
+    """
+    Collect svgelements points into a contiguous (N, 2) float64 coordinate array
+
+    :param points: Iterable of svgelements points
+    :return: Array of x, y coordinates
+    """
+    return numpy.array([(p.x, p.y) for p in points], dtype=numpy.float64).reshape(-1, 2)
+
+
+def flip_y(coordinates: numpy.ndarray, h: Number) -> numpy.ndarray:
+    """
+    Flip the y-axis of svg coordinates (y down) into the output space (y up), in place
+
+    :param coordinates: (N, 2) coordinate array
+    :param h: Height of the output space
+    :return: The same array, flipped
+    """
+    coordinates[:, 1] = h - coordinates[:, 1]
+    return coordinates
+
+
+def rotate_coordinates(
+    coordinates: numpy.ndarray, angle_degrees: float, origin: Tuple[Number, Number]
+) -> numpy.ndarray:
+    """
+    Rotate an (N, 2) coordinate array around origin in one batched step.
+
+    Mirrors the arithmetic of shapely.affinity.rotate, so results are identical to rotating the constructed
+    geometry, but without creating intermediate geometries.
+
+    :param coordinates: (N, 2) coordinate array
+    :param angle_degrees: Counter-clockwise angle in degrees
+    :param origin: Point to rotate around
+    :return: New rotated coordinate array, or the input array if the angle is zero
+    """
+    if angle_degrees == 0:
+        return coordinates
+
+    angle = angle_degrees * pi / 180.0
+    cosp = cos(angle)
+    sinp = sin(angle)
+    if abs(cosp) < ROTATION_EPSILON:
+        cosp = 0.0
+    if abs(sinp) < ROTATION_EPSILON:
+        sinp = 0.0
+
+    x0, y0 = origin
+    xoff = x0 - x0 * cosp + y0 * sinp
+    yoff = y0 - x0 * sinp - y0 * cosp
+
+    x, y = coordinates.T
+    return numpy.stack([cosp * x + -sinp * y + xoff, sinp * x + cosp * y + yoff]).T
@@ -0,0 +1,216 @@
+from functools import partial
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+import shapely
+import svgelements
+from warg import Number
+
+from ..profiling import ParseProfiler, profile_stage
+from .circle import ellipse_converter
+from .image import image_converter
+from .path import path_converter
+from .point import point_converter
+from .poly_line import polyline_converter
+from .polygon import polygon_converter
+from .simple_line import simpleline_converter
+from .text import text_converter
+
+__all__ = [
+    "ConverterRegistry",
+    "DEFAULT_CONVERTERS",
+    "reified_path_converter",
+    "GeometryConverter",
+    "ElementConverter",
+]
+__author__ = "Christian Heider Lindbjerg <chen(at)mapspeople.com>"
+
+GeometryConverter = Callable[[], Optional[shapely.geometry.base.BaseGeometry]]
+"""Converts the geometry of one element, called when the geometry is needed (at once, or later if lazy)"""
+
+ElementConverter = Callable[..., Tuple[Optional[GeometryConverter], Dict[str, Any]]]
+"""
+Called as converter(element, w=w, h=h, tolerance=curve_tolerance, profiler=profiler), returns the geometry
+converter of the element, or None for elements without geometry, and the extras it converted, e.g. text
+"""
+
+
+class ConverterRegistry:
+    """
+    Maps svgelements types to the element converters of convert_elements. A type without a converter of its own
+    uses the converter of the nearest type along its MRO, resolved once per type and cached.
+
+    Groups and <use> are traversed by convert_elements, and desc and title elements skipped, unless a converter
+    resolves for their type, e.g. one registered for svgelements.SVG converts nested svg elements whole instead of
+    their children. The root svg element of a document is never converted. Elements of other types that resolve
+    to no converter are reported as unsupported and skipped.
+
+    Converters of a registry used with parse_svg workers must be picklable, e.g. module level functions or
+    partials of them.
+    """
+
+    def __init__(self, converters: Optional[Mapping[type, ElementConverter]] = None):
+        """
+        :param converters: Initial converters by svgelements type
+        """
+        self._converters: Dict[type, ElementConverter] = dict(converters or {})
+        self._resolved: Dict[type, Optional[ElementConverter]] = {}
+
+    def register(
+        self, element_type: type, converter: Optional[ElementConverter] = None
+    ) -> Any:
+        """
+        Register a converter for a svgelements type and its subclasses, replacing any previous one.
+        Without a converter it returns a decorator registering the decorated function.
+
+        :param element_type: The svgelements type, e.g. svgelements.Pattern
+        :param converter: The element converter
+        :return: The converter, or the decorator
+        """
+        if converter is None:
+            return partial(self.register, element_type)
+
+        self._converters[element_type] = converter
+        self._resolved.clear()
+        return converter
+
+    def unregister(self, element_type: type) -> None:
+        """
+        :param element_type: The svgelements type to no longer convert, subclasses fall back along the MRO
+        """
+        del self._converters[element_type]
+        self._resolved.clear()
+
+    def resolve(self, element_type: type) -> Optional[ElementConverter]:
+        """
+        :param element_type: Type of the element
+        :return: The converter registered for the nearest type along the MRO, None if unsupported
+        """
+        try:
+            return self._resolved[element_type]
+        except KeyError:
+            pass
+
+        converter = next(
+            (
+                self._converters[t]
+                for t in element_type.__mro__
+                if t in self._converters
+            ),
+            None,
+        )
+        self._resolved[element_type] = converter
+        return converter
+
+    @property
+    def converters(self) -> Mapping[type, ElementConverter]:
+        """
+        :return: Read only view of the registered converters by type
+        """
+        return MappingProxyType(self._converters)
+
+    def copy(self) -> "ConverterRegistry":
+        """
+        :return: Registry of the same converters, registering on it leaves this one untouched
+        """
+        return ConverterRegistry(self._converters)
+
+    def __contains__(self, element_type: type) -> bool:
+        return self.resolve(element_type) is not None
+
+
+def reified_path_converter(
+    element: svgelements.Shape,
+    *,
+    profiler: Optional[ParseProfiler] = None,
+    **kwargs: Any,
+) -> Optional[shapely.geometry.base.BaseGeometry]:
+    """
+    Convert a shape as a path, e.g. rects with rounded corners
+
+    :param element: The svg shape
+    :param profiler: Measures the reify stage and the stages of path_converter
+    :param kwargs: Keyword arguments for path_converter
+    :return: Converted geometry
+    """
+    with profile_stage(profiler, "reify"):
+        path = svgelements.Path(element).reify()
+    return path_converter(path, profiler=profiler, **kwargs)
+
+
+def _shape(
+    converter: Callable[..., Optional[shapely.geometry.base.BaseGeometry]],
+    element: svgelements.SVGElement,
+    *,
+    w: Number,
+    h: Number,
+    **_: Any,
+) -> Tuple[GeometryConverter, Dict[str, Any]]:
+    return partial(converter, element, w=w, h=h), {}
+
+
+def _round_shape(
+    converter: Callable[..., Optional[shapely.geometry.base.BaseGeometry]],
+    element: svgelements.SVGElement,
+    *,
+    w: Number,
+    h: Number,
+    tolerance: Optional[float] = None,
+    **_: Any,
+) -> Tuple[GeometryConverter, Dict[str, Any]]:
+    return partial(converter, element, w=w, h=h, tolerance=tolerance), {}
+
+
+def _path(
+    converter: Callable[..., Optional[shapely.geometry.base.BaseGeometry]],
+    element: svgelements.SVGElement,
+    *,
+    w: Number,
+    h: Number,
+    tolerance: Optional[float] = None,
+    profiler: Optional[ParseProfiler] = None,
+) -> Tuple[GeometryConverter, Dict[str, Any]]:
+    return (
+        partial(converter, element, w=w, h=h, tolerance=tolerance, profiler=profiler),
+        {},
+    )
+
+
+def _precomputed(
+    geometry: Optional[shapely.geometry.base.BaseGeometry],
+) -> Optional[shapely.geometry.base.BaseGeometry]:
+    return geometry
+
+
+def _text(
+    element: svgelements.Text, *, w: Number, h: Number, **_: Any
+) -> Tuple[GeometryConverter, Dict[str, Any]]:
+    # The lack of a font engine makes this class more of a parsed stub class.
+    geometry, text_content, font_meta_data = text_converter(element, w=w, h=h)
+    return partial(_precomputed, geometry), dict(text=text_content, font=font_meta_data)
+
+
+def _image(
+    element: svgelements.Image, *, w: Number, h: Number, **_: Any
+) -> Tuple[GeometryConverter, Dict[str, Any]]:
+    # Image creates SVGImage objects which will load Images if Pillow is installed with a call to .load()
+    geometry, image_content = image_converter(element, w=w, h=h)
+    return partial(_precomputed, geometry), dict(image=image_content)
+
+
+DEFAULT_CONVERTERS = ConverterRegistry(
+    {
+        svgelements.Rect: partial(_path, reified_path_converter),  # Rounded corners
+        svgelements.SimpleLine: partial(_shape, simpleline_converter),
+        svgelements.Polyline: partial(_shape, polyline_converter),
+        svgelements.Polygon: partial(_shape, polygon_converter),
+        svgelements.Point: partial(_shape, point_converter),
+        svgelements.Circle: partial(_round_shape, ellipse_converter),
+        svgelements.Ellipse: partial(_round_shape, ellipse_converter),
+        svgelements.Curve: partial(_path, reified_path_converter),
+        svgelements.Path: partial(_path, path_converter),
+        svgelements.Text: _text,
+        svgelements.Image: _image,
+    }
+)
+"""Converters used by convert_elements unless given a registry, register on it to change the defaults"""
@@ -0,0 +1,156 @@
+import logging
+import math
+from typing import Optional, Tuple, Union
+
+import numpy
+import svgelements
+
+__all__ = ["curve_sample_positions", "flatten_curve", "flatten_path"]
+__author__ = "Christian Heider Lindbjerg <chen(at)mapspeople.com>"
+
+logger = logging.getLogger(__name__)
+
+CurveSegment = Union[
+    svgelements.Arc, svgelements.CubicBezier, svgelements.QuadraticBezier
+]
+
+
+def _control_polygon_norm(*points: svgelements.Point) -> float:
+    """Largest second difference of the control polygon, M in Wang's formula"""
+    return max(
+        abs(complex(a.x - 2 * b.x + c.x, a.y - 2 * b.y + c.y))
+        for a, b, c in zip(points, points[1:], points[2:])
+    )
+
+
+def _number_of_samples(segment: CurveSegment, tolerance: float) -> int:
+    if isinstance(segment, svgelements.CubicBezier):
+        # Wang's formula: n = sqrt(d(d-1)/8 * M / tol), d = 3
+        m = _control_polygon_norm(
+            segment.start, segment.control1, segment.control2, segment.end
+        )
+        return math.ceil(math.sqrt(0.75 * m / tolerance))
+
+    if isinstance(segment, svgelements.QuadraticBezier):  # d = 2
+        m = _control_polygon_norm(segment.start, segment.control, segment.end)
+        return math.ceil(math.sqrt(0.25 * m / tolerance))
+
+    if isinstance(segment, svgelements.Arc):
+        # Sagitta of a chord spanning angle a on radius r is r * (1 - cos(a / 2))
+        radius = max(abs(segment.rx), abs(segment.ry))
+        if radius <= tolerance:
+            return 1
+        max_angle = 2 * math.acos(1 - tolerance / radius)
+        return math.ceil(abs(segment.sweep) / max_angle)
+
+    raise NotImplementedError(f"{segment=}")
+
+
+def curve_sample_positions(
+    segment: CurveSegment,
+    *,
+    step_size: float = 0.1,
+    tolerance: Optional[float] = None,
+) -> numpy.ndarray:
+    """
+    Parametric positions in (0, 1] at which to sample a curve segment, the start point is excluded as it is the
+    end of the previous segment.
+
+    Without a tolerance the segment is sampled at a fixed step_size. With a tolerance the number of samples is
+    picked from the curvature of the segment, such that the chord error stays below the tolerance.
+
+    :param segment: Arc or Bézier segment
+    :param step_size: Fixed parametric step, used when no tolerance is given
+    :param tolerance: Max distance between the curve and the flattened chords
+    :return: Array of parametric positions
+    """
+    if tolerance is None:
+        return numpy.minimum(
+            numpy.arange(step_size, 1.0 + step_size, step_size, dtype=float), 1.0
+        )
+
+    num_samples = max(_number_of_samples(segment, tolerance), 1)
+    return numpy.arange(1, num_samples + 1, dtype=float) / num_samples
+
+
+def flatten_curve(
+    segment: CurveSegment,
+    *,
+    step_size: float = 0.1,
+    tolerance: Optional[float] = None,
+) -> numpy.ndarray:
+    """
+    Flatten a curve segment into an (N, 2) coordinate array, evaluating all samples in one vectorized call
+
+    :param segment: Arc or Bézier segment
+    :param step_size: Fixed parametric step, used when no tolerance is given
+    :param tolerance: Max distance between the curve and the flattened chords
+    :return: Sampled coordinates, excluding the start point
+    """
+    return numpy.asarray(
+        segment.npoint(
+            curve_sample_positions(segment, step_size=step_size, tolerance=tolerance)
+        ),
+        dtype=numpy.float64,
+    ).reshape(-1, 2)
+
+
+def flatten_path(
+    item: svgelements.Path,
+    *,
+    step_size: float = 0.1,
+    tolerance: Optional[float] = None,
+) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Flatten a path into one contiguous coordinate buffer.
+
+    A sub path ends at a Close, or at a Move made without a close before it. Sub path k spans
+    coordinates[offsets[k]:offsets[k + 1]].
+
+    :param item: The svg path
+    :param step_size: Fixed parametric step, used when no tolerance is given
+    :param tolerance: Max distance between the curves and the flattened chords
+    :return: (N, 2) float64 coordinates and (K + 1) sub path offsets
+    """
+    coordinates = []
+    offsets = [0]
+    try:
+        for segment in item:
+            if isinstance(segment, svgelements.Move):
+                if (
+                    len(coordinates) > offsets[-1]
+                ):  # This will only happen if a move was made without a close. We assume this means a new subpath
+                    # is started
+                    offsets.append(len(coordinates))
+                coordinates.append((segment.end.x, segment.end.y))
+
+            elif isinstance(segment, svgelements.Line):
+                coordinates.append((segment.end.x, segment.end.y))
+
+            elif isinstance(
+                segment,
+                (svgelements.Arc, svgelements.CubicBezier, svgelements.QuadraticBezier),
+            ):
+                coordinates.extend(
+                    flatten_curve(
+                        segment, step_size=step_size, tolerance=tolerance
+                    ).tolist()
+                )
+
+            elif isinstance(segment, svgelements.Close):
+                coordinates.append((segment.end.x, segment.end.y))
+                offsets.append(len(coordinates))
+            else:
+                raise NotImplementedError(f"{segment=}")
+
+        if len(coordinates) > offsets[-1] or len(offsets) == 1:
+            offsets.append(len(coordinates))
+
+    except Exception as p:
+        logger.error(p)
+
+    num_coordinates = offsets[-1]  # Drop a partial sub path left by an error
+    return (
+        numpy.array(coordinates[:num_coordinates], dtype=numpy.float64).reshape(-1, 2),
+        numpy.array(offsets, dtype=numpy.intp),
+    )
@@ -0,0 +1,182 @@
+import logging
+from typing import Sequence, Tuple
+
+import numpy
+import shapely
+from jord.shapely_utilities import clean_shape
+
+__all__ = [
+    "containment_hierarchy",
+    "classify_rings",
+    "assemble_polygons",
+    "FILL_RULE_NONZERO",
+    "FILL_RULE_EVENODD",
+]
+__author__ = "Christian Heider Lindbjerg <chen(at)mapspeople.com>"
+
+logger = logging.getLogger(__name__)
+
+FILL_RULE_NONZERO = "nonzero"
+FILL_RULE_EVENODD = "evenodd"
+FILL_RULES = (FILL_RULE_NONZERO, FILL_RULE_EVENODD)
+
+
+def containment_hierarchy(
+    polygons: Sequence[shapely.Polygon],
+) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Find how deep every polygon is nested among the others and which polygon directly contains it, using a
+    STRtree for the containment candidates instead of pairwise tests.
+
+    Identical polygons are ordered by their index, the later is considered contained in the earlier.
+
+    :param polygons: Polygons of the rings of a path
+    :return: Containment depth per polygon and index of its immediate parent, -1 for top level polygons
+    """
+    polygons = numpy.asarray(polygons, dtype=object)
+    num_polygons = len(polygons)
+
+    inner, outer = shapely.STRtree(polygons).query(polygons, predicate="within")
+
+    areas = shapely.area(polygons)
+    keep = (inner != outer) & (
+        (areas[outer] > areas[inner])
+        | ((areas[outer] == areas[inner]) & (outer < inner))
+    )
+    inner, outer = inner[keep], outer[keep]
+
+    depth = numpy.bincount(inner, minlength=num_polygons)
+
+    parent = numpy.full(num_polygons, -1, dtype=numpy.intp)
+    if len(inner):
+        order = numpy.lexsort((depth[outer], inner))
+        inner, outer = inner[order], outer[order]
+        deepest = numpy.append(inner[1:] != inner[:-1], True)  # Last container of each
+        parent[inner[deepest]] = outer[deepest]
+
+    return depth, parent
+
+
+def classify_rings(
+    polygons: Sequence[shapely.Polygon],
+    *,
+    fill_rule: str = FILL_RULE_EVENODD,
+) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Classify the rings of a path as shells, holes or neither under a svg fill rule.
+
+    The winding number (nonzero) or crossing count (evenodd) just inside every ring is accumulated down the
+    containment hierarchy from the ring orientations, computed once per ring. A ring whose inside is filled and
+    outside is not is a shell, the opposite is a hole of the nearest enclosing shell, and a ring with the same fill
+    on both sides is not a boundary at all. Rings nested inconsistently due to partially overlapping rings start a
+    new hierarchy and are left for the caller to union.
+
+    :param polygons: Polygons of the rings of a path
+    :param fill_rule: FILL_RULE_NONZERO or FILL_RULE_EVENODD
+    :return: Mask of shells and for every ring the index of the shell it is a hole in, -1 for non holes
+    """
+    assert fill_rule in FILL_RULES, f"{fill_rule=} must be one of {FILL_RULES}"
+
+    polygons = numpy.asarray(polygons, dtype=object)
+    num_polygons = len(polygons)
+
+    depth, parent = containment_hierarchy(polygons)
+
+    is_root = parent == -1
+    is_root[~is_root] = depth[parent[~is_root]] != depth[~is_root] - 1
+
+    if fill_rule == FILL_RULE_NONZERO:
+        crossing = numpy.where(
+            shapely.is_ccw(shapely.get_exterior_ring(polygons)), 1, -1
+        )
+    else:
+        crossing = numpy.ones(num_polygons, dtype=int)
+
+    winding = numpy.zeros(num_polygons, dtype=int)
+    is_shell = numpy.zeros(num_polygons, dtype=bool)
+    hole_of = numpy.full(num_polygons, -1, dtype=numpy.intp)
+    shell_above = numpy.full(num_polygons, -1, dtype=numpy.intp)
+
+    for level in range(
+        depth.max(initial=-1) + 1
+    ):  # Parents always are at a lower depth
+        ring = numpy.flatnonzero(depth == level)
+        root = is_root[ring]
+        ring_parent = parent[ring]
+
+        outside = numpy.where(root, 0, winding[ring_parent])
+        winding[ring] = outside + crossing[ring]
+
+        if fill_rule == FILL_RULE_NONZERO:
+            inside_filled, outside_filled = winding[ring] != 0, outside != 0
+        else:
+            inside_filled, outside_filled = winding[ring] % 2 == 1, outside % 2 == 1
+
+        is_shell[ring] = inside_filled & ~outside_filled
+
+        hole = ~inside_filled & outside_filled
+        hole_of[ring[hole]] = shell_above[ring_parent[hole]]
+
+        shell_above[ring] = numpy.where(
+            is_shell[ring], ring, numpy.where(root, -1, shell_above[ring_parent])
+        )
+
+    return is_shell, hole_of
+
+
+def assemble_polygons(
+    polygons: Sequence[shapely.Polygon],
+    *,
+    fill_rule: str = FILL_RULE_EVENODD,
+) -> numpy.ndarray:
+    """
+    Classify the rings under the fill rule and build all polygons with their holes in one vectorized call.
+
+    Polygons whose holes overlap are resolved with a difference, overlapping shells are left for the caller to
+    union.
+
+    :param polygons: Polygons of the rings of a path
+    :param fill_rule: FILL_RULE_NONZERO or FILL_RULE_EVENODD
+    :return: Array of polygons, possibly overlapping each other
+    """
+    polygons = numpy.asarray(polygons, dtype=object)
+    if not len(polygons):
+        return polygons
+
+    is_shell, hole_of = classify_rings(polygons, fill_rule=fill_rule)
+
+    shell_index = numpy.flatnonzero(is_shell)
+    hole_index = numpy.flatnonzero(hole_of >= 0)
+
+    shell_position = numpy.full(len(polygons), -1, dtype=numpy.intp)
+    shell_position[shell_index] = numpy.arange(len(shell_index))
+
+    ring_index = numpy.concatenate((shell_index, hole_index))
+    output_index = numpy.concatenate(
+        (shell_position[shell_index], shell_position[hole_of[hole_index]])
+    )
+    is_hole_ring = numpy.concatenate(
+        (numpy.zeros(len(shell_index), bool), numpy.ones(len(hole_index), bool))
+    )
+
+    order = numpy.lexsort((is_hole_ring, output_index))
+    output = shapely.polygons(
+        shapely.get_exterior_ring(polygons[ring_index[order]]),
+        indices=output_index[order],
+        out=numpy.empty(len(shell_index), dtype=object),
+    )
+
+    for invalid in numpy.flatnonzero(~shapely.is_valid(output)):
+        holes = hole_index[shell_position[hole_of[hole_index]] == invalid]
+        try:
+            output[invalid] = clean_shape(
+                shapely.difference(
+                    polygons[shell_index[invalid]],
+                    clean_shape(shapely.union_all(polygons[holes])),
+                )
+            )
+        except shapely.errors.GEOSException as e:
+            logger.error(f"PATH ERROR: {e}")
+            output[invalid] = polygons[shell_index[invalid]]
+
+    return output
@@ -1,18 +1,27 @@
 import logging
-from typing import Optional, Sequence
+from typing import List, Optional, Sequence, Tuple
 
 import numpy
 import shapely
 import svgelements
-from jord.shapely_utilities import (
-    clean_shape,
-    closing,
-    overlap_groups,
-    split_enveloping_geometry,
-)
+from jord.shapely_utilities import closing
 from warg import Number
 
-__all__ = ["path_converter"]
+from ..profiling import ParseProfiler, profile_stage
+from .coordinates import flip_y
+from .flattening import flatten_path
+from .holes import (
+    FILL_RULES,
+    FILL_RULE_NONZERO,
+    assemble_polygons,
+)
+
+__all__ = [
+    "path_converter",
+    "path_fill_rule",
+    "repair_sub_path_polygons",
+    "sub_path_geometries",
+]
 __author__ = "Christian Heider Lindbjerg <chen(at)mapspeople.com>"
 
 ASSUME_SUB_PATHS_ARE_HOLES = True
@@ -27,143 +36,65 @@ def path_converter(
     h: Number = 1,
     snap_distance: float = 1e-7,
     step_size: float = 0.1,
+    tolerance: Optional[float] = None,
+    fill_rule: Optional[str] = None,
+    profiler: Optional[ParseProfiler] = None,
 ) -> Optional[shapely.geometry.base.BaseGeometry]:
-    sub_paths = []  # TODO: REWRITE TO USE .as_subpaths() instead
-
+    """
+    Convert a svg path into a shapely geometry, curves are flattened into line segments.
+
+    :param item: The svg path
+    :param w: Width of the output space
+    :param h: Height of the output space
+    :param snap_distance: Distance for which sub path end points are considered closed
+    :param step_size: Fixed parametric sampling step for curves, used when tolerance is None
+    :param tolerance: Max chord error for adaptive curve flattening, the number of samples per curve is
+     derived from its length and curvature
+    :param fill_rule: FILL_RULE_NONZERO or FILL_RULE_EVENODD, decides which sub paths are holes.
+     None uses the fill-rule attribute of the path
+    :param profiler: Measures the flatten, sub_paths, repair and holes stages
+    :return: Converted geometry
+    """
     assert h == w, "w and h must be the same"
 
     assert 0 < step_size < 1.0, f"{step_size=} was not within range [0..1.0]"
+    assert tolerance is None or tolerance > 0, f"{tolerance=} must be positive"
     assert snap_distance >= 0
-    try:
-        points_along_path = []
-        for segment in item:
-            if isinstance(segment, svgelements.Move):
-                if (
-                    len(points_along_path) > 0
-                ):  # This will only happen if a move was made without a close. We assume this means a new subpath
-                    # is started
-                    sub_paths.append(points_along_path.copy())
-                    points_along_path.clear()
-                    points_along_path.append(segment.point(1.0))
-                else:
-                    points_along_path.append(segment.point(0.0))
-
-            elif isinstance(segment, svgelements.Line):
-                points_along_path.append(segment.point(1.0))
-
-            elif isinstance(
-                segment,
-                (svgelements.Arc, svgelements.CubicBezier, svgelements.QuadraticBezier),
-            ):
-                for step in numpy.arange(
-                    step_size, 1.0 + step_size, step_size, dtype=float
-                ):
-                    step = min(step, 1.0)
-                    points_along_path.append(segment.point(step))
-
-            elif isinstance(segment, svgelements.Close):
-                points_along_path.append(segment.point(1.0))
-                sub_paths.append(points_along_path.copy())
-                points_along_path.clear()
-            else:
-                raise NotImplementedError(f"{segment=}")
-
-        if len(points_along_path) > 0 or len(sub_paths) == 0:
-            sub_paths.append(points_along_path.copy())
-            points_along_path.clear()
-
-    except Exception as p:
-        logger.error(p)
-
-    was_polygon = []
-    geoms = []
-    for sp in sub_paths:
-        path_points = []
-        for point in sp:
-            x_coord = point.x
-            y_coord = h - point.y
-            path_points.append(shapely.geometry.Point(x_coord, y_coord))
-
-        last_point = path_points[-1]
-        first_point = path_points[0]
-
-        if len(path_points) >= 4 and first_point.equals_exact(
-            last_point, tolerance=snap_distance
-        ):  # 4
-            # coordinates is minimum for a LinearRing, a in simple triangle start and end must the same
-            path_points[-1] = first_point
-            geoms.append(shapely.geometry.Polygon(path_points))
-            was_polygon.append(True)
-        elif len(path_points) == 1:
-            geoms.append(shapely.geometry.Point(path_points[0]))
-            was_polygon.append(False)
-        elif len(path_points):
-            geoms.append(shapely.geometry.LineString(path_points))
-            was_polygon.append(False)
-        else:
-            logger.warning(f"empty path {path_points=}")
+
+    with profile_stage(profiler, "flatten"):
+        coordinates, offsets = flatten_path(
+            item, step_size=step_size, tolerance=tolerance
+        )
+
+    with profile_stage(profiler, "sub_paths"):
+        geoms, was_polygon = sub_path_geometries(
+            flip_y(coordinates, h), offsets, snap_distance=snap_distance
+        )
 
     if ASSUME_SUB_PATHS_ARE_HOLES:
         if len(geoms) > 1:
-            if all(was_polygon):
-                valid_geom_list = []
-                for poly in geoms:
-                    if (
-                        not poly.is_valid
-                    ):  # bowtie issue can occur. Probably some rounding in the coordinates.
-                        buffer_in = poly.buffer(
-                            -snap_distance, cap_style=3, join_style=2, mitre_limit=2
-                        )
-                        buffer_out = buffer_in.buffer(
-                            snap_distance, cap_style=3, join_style=2, mitre_limit=2
-                        )
-                        valid_geom_list.append(buffer_out)
-
-                    else:
-                        valid_geom_list.append(poly)
-
-                grouped = overlap_groups(valid_geom_list)
-
-                output_geoms = []
-                for group in grouped:
-                    res = split_enveloping_geometry(group.values())
-                    if res:
-                        envelop, rest = res
-                        diff = None
-
-                        if len(rest) > 1:
-                            stamped_geometries = recursive_stamping(rest)
-
-                            diff = clean_shape(
-                                shapely.difference(envelop, stamped_geometries)
-                            )
-
-                        elif len(rest) == 0:
-                            diff = envelop
-                        else:
-                            try:
-                                rest_union = clean_shape(shapely.unary_union(rest))
-                                diff = clean_shape(
-                                    shapely.difference(envelop, rest_union)
-                                )
-                            except Exception as ex:
-                                logger.error("UNION ERROR:", ex)
-
-                        if envelop.is_valid:
-                            try:
-                                if diff.is_valid:
-                                    output_geoms.append(diff)
-                            except Exception as e:
-                                logger.error("PATH ERROR:", e)
-                        else:
-                            logger.warning("PATH PARSING: Envelope was not valid")
-
-                    else:  # FALL BACK... TODO: FIGURE OUT A PROPER SOLUTION!, RIGHT NOW JUST ADD ALL GEOMS
-                        output_geoms.extend(group.values())
-
-                return closing(
-                    shapely.unary_union(output_geoms), distance=snap_distance
-                )
+            if was_polygon.all():
+                with profile_stage(profiler, "repair"):
+                    polygons = repair_sub_path_polygons(
+                        geoms, snap_distance=snap_distance
+                    )
+
+                with profile_stage(profiler, "holes"):
+                    polygons = assemble_polygons(
+                        polygons, fill_rule=path_fill_rule(item, fill_rule)
+                    )
+
+                if len(polygons) == 1:
+                    return polygons[0]
+
+                multi_polygon = shapely.multipolygons(polygons)
+                if multi_polygon.is_valid:  # Shells are disjoint, nothing to union
+                    return multi_polygon
+
+                with profile_stage(profiler, "repair"):
+                    return closing(
+                        shapely.unary_union(polygons), distance=snap_distance
+                    )
 
     if len(geoms) == 1:
         return geoms[0]
@@ -181,37 +112,116 @@ def path_converter(
     return gc
 
 
-def recursive_stamping(
-    geometries: Sequence[shapely.geometry.base.BaseGeometry],
-) -> shapely.geometry.base.BaseGeometry:
+def sub_path_geometries(
+    coordinates: numpy.ndarray,
+    offsets: numpy.ndarray,
+    *,
+    snap_distance: float = 1e-7,
+) -> Tuple[List[shapely.geometry.base.BaseGeometry], numpy.ndarray]:
+    """
+    Build the geometries of all sub paths in bulk with the vectorized shapely constructors.
+
+    Sub paths of at least 4 coordinates whose ends are within snap_distance become Polygons, single coordinates
+    become Points and the rest LineStrings.
+
+    :param coordinates: (N, 2) coordinates of all sub paths, closed sub paths are snapped in place
+    :param offsets: (K + 1) sub path offsets into coordinates
+    :param snap_distance: Distance for which sub path end points are considered closed
+    :return: List of geometries in sub path order and a mask of which of them are polygons
+    """
+    lengths = numpy.diff(offsets)
+    if not lengths.all():
+        logger.warning(f"empty path {offsets=}")
+        offsets = numpy.append(offsets[:-1][lengths > 0], offsets[-1])
+        lengths = lengths[lengths > 0]
+
+    starts, ends = offsets[:-1], offsets[1:] - 1
+    part_of_coordinate = numpy.repeat(numpy.arange(len(lengths)), lengths)
+
+    is_polygon = (lengths >= 4) & (
+        numpy.abs(coordinates[starts] - coordinates[ends]) <= snap_distance
+    ).all(
+        axis=1
+    )  # 4 coordinates is minimum for a LinearRing, a in simple triangle start and end must the same
+    is_point = lengths == 1
+    is_line = ~(is_polygon | is_point)
+
+    coordinates[ends[is_polygon]] = coordinates[starts[is_polygon]]
+
+    geoms = numpy.empty(len(lengths), dtype=object)
+    geoms[is_point] = shapely.points(coordinates[starts[is_point]])
+
+    for mask, constructor in (
+        (is_polygon, shapely.linearrings),
+        (is_line, shapely.linestrings),
+    ):
+        if mask.any():
+            selected = mask[part_of_coordinate]
+            geoms[mask] = constructor(
+                coordinates[selected],
+                indices=numpy.repeat(numpy.arange(mask.sum()), lengths[mask]),
+            )
+
+    geoms[is_polygon] = shapely.polygons(geoms[is_polygon])
+
+    return geoms.tolist(), is_polygon
+
+
+def path_fill_rule(item: svgelements.Shape, fill_rule: Optional[str] = None) -> str:
     """
-    Stamping geometries until there is nothing to stamp
+    The fill rule to use for a path, an explicit fill_rule takes precedence over the fill-rule attribute of the
+    path, which defaults to nonzero as in the svg specification.
 
-    :param geometries: List of shapely geometries
-    :return: Union of shapely geometries
+    :param item: The svg path
+    :param fill_rule: Explicit fill rule
+    :return: FILL_RULE_NONZERO or FILL_RULE_EVENODD
     """
-    stamped_out_geoms = []
-    if len(geometries) <= 1:
-        stamped_out_geoms.extend(geometries)
-    else:
-        groups_of_intersecting_geometries = overlap_groups(geometries)
-
-        for group in groups_of_intersecting_geometries:
-            grouped_geometries = group.values()
-            envelop_and_children = split_enveloping_geometry(grouped_geometries)
-            if envelop_and_children:
-                envelope, rest = envelop_and_children
-                if len(rest) < 1:
-                    # split geometry only has an envelope, but no rest. Then just append the envelope
-                    stamped_out_geoms.append(envelope)
-                else:  # If the rest is multiple polygons, we need to stamp them again
-                    stamped_out_geoms.append(
-                        clean_shape(
-                            shapely.difference(envelope, recursive_stamping(rest))
-                        )
-                    )
+    if fill_rule is None and hasattr(item, "values"):
+        fill_rule = item.values.get("fill-rule")
+
+    if fill_rule in FILL_RULES:
+        return fill_rule
 
-            else:  # There was no enveloping geometry
-                stamped_out_geoms.extend(grouped_geometries)
+    return FILL_RULE_NONZERO
 
-    return clean_shape(shapely.unary_union(stamped_out_geoms))
+
+def repair_sub_path_polygons(
+    polygons: Sequence[shapely.Polygon], *, snap_distance: float = 1e-7
+) -> numpy.ndarray:
+    """
+    Repair invalid sub path polygons by an inwards and outwards buffer of snap_distance. Repaired parts keep the
+    orientation of the sub path they came from, as it decides the winding under the nonzero fill rule.
+
+    :param polygons: Sub path polygons
+    :param snap_distance: Buffer distance
+    :return: Array of valid polygons, a sub path may have been split into several
+    """
+    polygons = numpy.asarray(polygons, dtype=object)
+    was_ccw = shapely.is_ccw(shapely.get_exterior_ring(polygons))
+
+    invalid = ~shapely.is_valid(polygons)
+    if (
+        invalid.any()
+    ):  # bowtie issue can occur. Probably some rounding in the coordinates.
+        buffer_in = shapely.buffer(
+            polygons[invalid],
+            -snap_distance,
+            cap_style="square",
+            join_style="mitre",
+            mitre_limit=2,
+        )
+        polygons[invalid] = shapely.buffer(
+            buffer_in,
+            snap_distance,
+            cap_style="square",
+            join_style="mitre",
+            mitre_limit=2,
+        )
+
+        polygons, sub_path = shapely.get_parts(polygons, return_index=True)
+        flipped = (
+            shapely.is_ccw(shapely.get_exterior_ring(polygons)) != was_ccw[sub_path]
+        )
+        polygons[flipped] = shapely.reverse(polygons[flipped])
+
+    return polygons
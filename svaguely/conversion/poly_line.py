@@ -3,9 +3,10 @@ from typing import Union
 import numpy
 import shapely
 import svgelements
-from shapely import affinity
 from warg import Number
 
+from .coordinates import flip_y, points_to_array, rotate_coordinates
+
 __all__ = ["polyline_converter"]
 __author__ = "Christian Heider Lindbjerg <chen(at)mapspeople.com>"
 
@@ -13,35 +14,29 @@ __author__ = "Christian Heider Lindbjerg <chen(at)mapspeople.com>"
 def polyline_converter(
     item: svgelements.Polyline, *, w: Number = 1, h: Number = 1, EPSILON=0.00000000001
 ) -> Union[shapely.Polygon, shapely.LineString]:
-    polyline_points = item.points
-    rotate_x = polyline_points[0].x
-    rotate_y = h - polyline_points[0].y
-
-    polyline_list_points = []
-    for points in polyline_points:
-        x_coord = points.x
-        y_coord = h - points.y
-        point = shapely.geometry.Point(x_coord, y_coord)
-        polyline_list_points.append(point)
-
-    last_point = polyline_list_points[-1]
-    first_point = polyline_list_points[0]
-
-    if first_point.equals_exact(last_point, tolerance=EPSILON):
-        polyline_list_points[-1] = first_point
-        path_geometry = shapely.geometry.Polygon(polyline_list_points)
+    polyline_coords = flip_y(points_to_array(item.points), h)
+    rotate_x, rotate_y = polyline_coords[0]
+
+    if numpy.all(numpy.abs(polyline_coords[0] - polyline_coords[-1]) <= EPSILON):
+        polyline_coords[-1] = polyline_coords[0]
+        closed = True
     elif (
         item.fill is not None and item.fill.hex
     ):  # assume else polygonal shape because it has a fill
-        polyline_list_points.append(first_point)  # add another closing point
-        path_geometry = shapely.geometry.Polygon(polyline_list_points)
+        polyline_coords = numpy.concatenate(
+            (polyline_coords, polyline_coords[:1])
+        )  # add another closing point
+        closed = True
     else:
-        path_geometry = shapely.geometry.LineString(polyline_list_points)
+        closed = False
 
     angle_polyline_rad = float(item.rotation)
     angle_degrees = angle_polyline_rad * (180 / numpy.pi)
-    polyline_geometry_rotate = affinity.rotate(
-        path_geometry, angle_degrees, (rotate_x, rotate_y)
+    polyline_coords = rotate_coordinates(
+        polyline_coords, angle_degrees, (rotate_x, rotate_y)
     )
 
-    return polyline_geometry_rotate
+    if closed:
+        return shapely.polygons(polyline_coords)
+
+    return shapely.linestrings(polyline_coords)
@@ -1,9 +1,10 @@
 import numpy
 import shapely
 import svgelements
-from shapely import affinity
 from warg import Number
 
+from .coordinates import rotate_coordinates
+
 __all__ = ["simpleline_converter"]
 
 __author__ = "Christian Heider Lindbjerg <chen(at)mapspeople.com>"
@@ -16,12 +17,12 @@ def simpleline_converter(
     line_y1 = h - item.implicit_y1
     line_x2 = item.implicit_x2
     line_y2 = h - item.implicit_y2
-    vertice1 = shapely.geometry.Point(line_x1, line_y1)
-    vertice2 = shapely.geometry.Point(line_x2, line_y2)
-    vertice_list = [vertice1, vertice2]
-    linestring = shapely.geometry.LineString(vertice_list)
+    line_coords = numpy.array(
+        [[line_x1, line_y1], [line_x2, line_y2]], dtype=numpy.float64
+    )
 
     angle_simpleline_rad = float(item.rotation)
     angle_degrees = angle_simpleline_rad * (180 / numpy.pi)
-    linestring_rotate = affinity.rotate(linestring, angle_degrees, (line_x1, line_y1))
-    return linestring_rotate
+    return shapely.linestrings(
+        rotate_coordinates(line_coords, angle_degrees, (line_x1, line_y1))
+    )
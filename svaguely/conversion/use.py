@@ -0,0 +1,98 @@
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+import numpy
+import shapely
+import svgelements
+from warg import Number
+
+__all__ = ["use_transform", "use_reference", "use_geometry_style", "UseGeometryMemo"]
+__author__ = "Christian Heider Lindbjerg <chen(at)mapspeople.com>"
+
+XLINK_HREF = "{http://www.w3.org/1999/xlink}href"
+
+
+def use_transform(item: svgelements.Use, *, h: Number = 1) -> numpy.ndarray:
+    """
+    Affine transform from the frame of the referenced element into the output space (y flipped)
+
+    :param item: The svg use element
+    :param h: Height of the output space
+    :return: 3x3 homogeneous matrix
+    """
+    m = item.transform
+    return numpy.array(
+        [[m.a, m.c, m.e], [-m.b, -m.d, h - m.f], [0.0, 0.0, 1.0]], dtype=numpy.float64
+    )
+
+
+def use_reference(item: svgelements.Use) -> Optional[str]:
+    """
+    :param item: The svg use element
+    :return: The referenced id, or None if the reference is missing
+    """
+    return item.values.get(XLINK_HREF, item.values.get("href"))
+
+
+def use_geometry_style(item: svgelements.SVGElement) -> Hashable:
+    """
+    The resolved style the converters read besides the coordinates, inherited from the <use> by the referenced
+    elements: a fill closes polylines and the fill-rule decides the holes of paths
+
+    :param item: An element referenced by a <use>
+    :return: Part of the memo key of the element
+    """
+    fill = getattr(item, "fill", None)
+    values = getattr(item, "values", None) or {}
+    return fill is not None and bool(fill.hex), values.get("fill-rule")
+
+
+class UseGeometryMemo:
+    """
+    Converted geometries of the elements referenced by <use>, so every further reference of the same element is
+    one affine transform of the cached geometry instead of flattening and assembling it again.
+
+    Flattening at a fixed parametric step is affine invariant. Flattening at a curve tolerance is not, there a
+    cached geometry is only reused where the transform does not scale it up, keeping the chord error within the
+    tolerance.
+
+    Keys must include the use_geometry_style of the element, the same element referenced by <use> of another fill
+    or fill-rule converts to another geometry.
+    """
+
+    def __init__(self, *, scale_invariant: bool = True):
+        """
+        :param scale_invariant: If the conversion is invariant to scaling, False when flattening to a tolerance
+        """
+        self.scale_invariant = scale_invariant
+        self._geometries: Dict[
+            Hashable, Tuple[shapely.geometry.base.BaseGeometry, numpy.ndarray]
+        ] = {}
+
+    def convert(
+        self,
+        key: Hashable,
+        transform: numpy.ndarray,
+        geometry_converter: Callable[[], Optional[shapely.geometry.base.BaseGeometry]],
+    ) -> Optional[shapely.geometry.base.BaseGeometry]:
+        """
+        :param key: Identifies the element within the referenced element, e.g. reference and path of unique ids
+        :param transform: use_transform of the referencing use element
+        :param geometry_converter: Converts the element directly, used on a miss
+        :return: The geometry of the element
+        """
+        cached = self._geometries.get(key)
+        if cached is not None:
+            geometry, inverse_transform = cached
+            relative = transform @ inverse_transform
+            if self.scale_invariant or numpy.linalg.norm(relative[:2, :2], 2) <= 1:
+                linear, translation = relative[:2, :2].T, relative[:2, 2]
+                return shapely.transform(geometry, lambda c: c @ linear + translation)
+
+            return geometry_converter()
+
+        geometry = geometry_converter()
+
+        if geometry is not None and numpy.linalg.det(transform[:2, :2]) != 0:
+            self._geometries[key] = geometry, numpy.linalg.inv(transform)
+
+        return geometry
@@ -1,12 +1,46 @@
-from dataclasses import dataclass
-from typing import Any, Mapping, Optional
+from dataclasses import dataclass, fields
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
+import numpy
 import shapely
 
-__all__ = ["SvgElement", "SvgMetadata"]
+if TYPE_CHECKING:
+    import geopandas
+
+__all__ = ["SvgElement", "LazySvgElement", "SvgElementTable", "SvgMetadata"]
 __author__ = "Christian Heider Lindbjerg <chen(at)mapspeople.com>"
 
 
+def slotted(cls: type) -> type:
+    """
+    Recreate a dataclass with __slots__ instead of a per-instance __dict__, like dataclass(slots=True) which is
+    only available from python 3.10
+
+    :param cls: Dataclass to recreate
+    :return: Slotted dataclass
+    """
+    field_names = tuple(f.name for f in fields(cls))
+    cls_dict = {k: v for k, v in cls.__dict__.items() if k not in field_names}
+    cls_dict.pop("__dict__", None)
+    cls_dict.pop("__weakref__", None)
+    cls_dict["__slots__"] = field_names
+    return type(cls)(cls.__name__, cls.__bases__, cls_dict)
+
+
+@slotted
 @dataclass
 class SvgElement:
     element_id: str
@@ -33,6 +67,220 @@ class SvgElement:
         return self.stroke_color is not None and self.stroke_width != 0
 
 
+class LazySvgElement(SvgElement):
+    """
+    SvgElement whose geometry is converted from the svg shape on first access of .geometry, and then cached.
+
+    Attributes other than the geometry are available immediately, so elements can be filtered before paying for
+    the conversion.
+    """
+
+    __slots__ = ("_geometry", "_geometry_converter")
+
+    def __init__(
+        self,
+        *,
+        geometry_converter: Callable[[], Optional[shapely.geometry.base.BaseGeometry]],
+        **kwargs,
+    ):
+        self._geometry_converter = geometry_converter
+        super().__init__(geometry=None, **kwargs)
+
+    @property
+    def geometry(self) -> Optional[shapely.geometry.base.BaseGeometry]:
+        if self._geometry_converter is not None:
+            self._geometry = self._geometry_converter()
+            self._geometry_converter = None
+        return self._geometry
+
+    @geometry.setter
+    def geometry(self, value: Optional[shapely.geometry.base.BaseGeometry]) -> None:
+        if value is not None:
+            self._geometry_converter = None
+        self._geometry = value
+
+    @property
+    def is_converted(self) -> bool:
+        return self._geometry_converter is None
+
+    def __getstate__(self) -> Tuple[None, Dict[str, Any]]:
+        state = {f.name: getattr(self, f.name) for f in fields(self)}
+        state["_geometry"] = state.pop(
+            "geometry"
+        )  # Converted before leaving the process
+        state["_geometry_converter"] = None
+        return None, state
+
+
+def _object_array(values: Sequence[Any]) -> numpy.ndarray:
+    """One dimensional object array, also for sequences of tuples"""
+    array = numpy.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+def _iter_leaves(
+    elements: Mapping[str, Any], key_path: Tuple[str, ...] = ()
+) -> Iterator[Tuple[Tuple[str, ...], SvgElement]]:
+    levels = [
+        (key_path, iter(elements.items()))
+    ]  # Explicit stack, as deep nesting would hit the recursion limit
+    while levels:
+        key_path, items = levels[-1]
+        for key, value in items:
+            if isinstance(value, Mapping):
+                levels.append(((*key_path, key), iter(value.items())))
+                break
+            yield (*key_path, key), value
+        else:
+            levels.pop()
+
+
+@dataclass
+class SvgElementTable:
+    """
+    Columnar container of converted svg elements, every attribute of SvgElement is a column of parallel arrays
+    with one row per element. Geometries are held in a shapely geometry array, stroke widths in a float array
+    with nan for no stroke width, remaining columns in object arrays.
+
+    Indexing with an integer gives the SvgElement of that row, with a slice, mask or index array a new table.
+    """
+
+    key_path: (
+        numpy.ndarray
+    )  # Tuple of unique ids from the top level down to the element
+    element_id: numpy.ndarray
+    element_type: numpy.ndarray
+    geometry: numpy.ndarray
+    element_name: numpy.ndarray
+    color: numpy.ndarray
+    fill_color: numpy.ndarray
+    stroke_color: numpy.ndarray
+    stroke_width: numpy.ndarray
+    extras: numpy.ndarray
+
+    @classmethod
+    def from_elements(
+        cls, elements: Iterable[Tuple[Tuple[str, ...], SvgElement]]
+    ) -> "SvgElementTable":
+        """
+        Collect elements into columns, lazy geometries are converted on the way.
+
+        :param elements: Iterable of (path of unique ids, SvgElement), as yielded by iter_svg
+        :return: Table with one row per element
+        """
+        key_paths, rows = [], []
+        for key_path, element in elements:
+            key_paths.append(tuple(key_path))
+            rows.append(element)
+
+        columns = {
+            f.name: _object_array([getattr(row, f.name) for row in rows])
+            for f in fields(SvgElement)
+        }
+        columns["stroke_width"] = numpy.array(
+            [numpy.nan if w is None else w for w in columns["stroke_width"]],
+            dtype=numpy.float64,
+        )
+        return cls(key_path=_object_array(key_paths), **columns)
+
+    @classmethod
+    def from_mapping(cls, elements: Mapping[str, Any]) -> "SvgElementTable":
+        """
+        :param elements: Nested mapping of svg elements, as returned by parse_svg
+        :return: Table with one row per element, in the order of the mapping
+        """
+        return cls.from_elements(_iter_leaves(elements))
+
+    def __len__(self) -> int:
+        return len(self.key_path)
+
+    def __getitem__(
+        self, index: Union[int, slice, numpy.ndarray, Sequence[int]]
+    ) -> Union[SvgElement, "SvgElementTable"]:
+        if isinstance(index, (int, numpy.integer)):
+            row = {f.name: getattr(self, f.name)[index] for f in fields(SvgElement)}
+            if numpy.isnan(row["stroke_width"]):
+                row["stroke_width"] = None
+            else:
+                row["stroke_width"] = float(row["stroke_width"])
+            return SvgElement(**row)
+
+        return SvgElementTable(
+            **{f.name: getattr(self, f.name)[index] for f in fields(self)}
+        )
+
+    def __iter__(self) -> Iterator[Tuple[Tuple[str, ...], SvgElement]]:
+        for i in range(len(self)):
+            yield self.key_path[i], self[i]
+
+    def to_mapping(self) -> Dict[str, Any]:
+        """
+        :return: Nested mapping of svg elements, as returned by parse_svg
+        """
+        elements = {}
+        for (*group_path, element_unique_id), element in self:
+            group = elements
+            for key in group_path:
+                group = group.setdefault(key, {})
+            group[element_unique_id] = element
+        return elements
+
+    def attribute_columns(
+        self,
+        *,
+        extras_columns: Sequence[str] = (),
+        name_seperator: str = "|",
+    ) -> Dict[str, List[Any]]:
+        """
+        Plain python columns of all attributes but the geometry, for writing out
+
+        :param extras_columns: Keys of the extras to lift into columns of their own, None where missing
+        :param name_seperator: Seperator joining the key path into the key column
+        :return: Mapping of column name to list of values
+        """
+        columns = {
+            "key": [name_seperator.join(map(str, k)) for k in self.key_path],
+            "element_id": self.element_id.tolist(),
+            "element_name": self.element_name.tolist(),
+            "element_type": [t.__name__ for t in self.element_type],
+            "color": self.color.tolist(),
+            "fill_color": self.fill_color.tolist(),
+            "stroke_color": self.stroke_color.tolist(),
+            "stroke_width": [None if numpy.isnan(w) else w for w in self.stroke_width],
+        }
+        for column in extras_columns:
+            columns[column] = [
+                None if extras is None else extras.get(column) for extras in self.extras
+            ]
+
+        return columns
+
+    def to_geodataframe(
+        self,
+        *,
+        crs: Optional[Any] = None,
+        extras_columns: Sequence[str] = (),
+        name_seperator: str = "|",
+    ) -> "geopandas.GeoDataFrame":
+        """
+        Build a GeoDataFrame straight from the columns, requires geopandas.
+
+        :param crs: Coordinate reference system of the geometries
+        :param extras_columns: Keys of the extras to lift into columns of their own, None where missing
+        :param name_seperator: Seperator joining the key path into the key column
+        :return: GeoDataFrame with one row per element
+        """
+        import geopandas
+
+        columns = self.attribute_columns(
+            extras_columns=extras_columns, name_seperator=name_seperator
+        )
+        columns["stroke_width"] = self.stroke_width
+
+        return geopandas.GeoDataFrame(columns, geometry=self.geometry, crs=crs)
+
+
 @dataclass
 class SvgMetadata:
     name: str
@@ -0,0 +1,62 @@
+from typing import Dict, Iterator, List, Optional
+
+__all__ = ["ConversionDiagnostics"]
+__author__ = "Christian Heider Lindbjerg <chen(at)mapspeople.com>"
+
+
+class ConversionDiagnostics:
+    """
+    Aggregated diagnostics of the elements skipped by convert_elements, counted per svg tag (or svgelements type)
+    with a few sample ids. Messages are only formatted when asked for, so files full of <style>, <linearGradient>
+    or <clipPath> nodes cost a dict update per node.
+
+    Override on_unsupported to send the diagnostics elsewhere.
+    """
+
+    def __init__(self, *, num_samples: int = 5):
+        """
+        :param num_samples: Number of sample ids kept per tag
+        """
+        self.num_samples = num_samples
+        self.unsupported: Dict[str, int] = {}
+        self.samples: Dict[str, List[str]] = {}
+
+    def on_unsupported(self, tag: str, element_id: Optional[str]) -> None:
+        """
+        :param tag: Svg tag of the element, or the name of its svgelements type
+        :param element_id: Id of the element, None if it has none
+        """
+        self.unsupported[tag] = self.unsupported.get(tag, 0) + 1
+        if element_id is not None:
+            samples = self.samples.setdefault(tag, [])
+            if len(samples) < self.num_samples:
+                samples.append(element_id)
+
+    def update(self, other: "ConversionDiagnostics") -> None:
+        """
+        :param other: Diagnostics to add to these, e.g. of another document
+        """
+        for tag, count in other.unsupported.items():
+            self.unsupported[tag] = self.unsupported.get(tag, 0) + count
+        for tag, ids in other.samples.items():
+            samples = self.samples.setdefault(tag, [])
+            samples.extend(ids[: max(0, self.num_samples - len(samples))])
+
+    def __len__(self) -> int:
+        return sum(self.unsupported.values())
+
+    def messages(self) -> Iterator[str]:
+        """
+        :return: A message per unsupported tag
+        """
+        for tag, count in sorted(
+            self.unsupported.items(), key=lambda kv: kv[1], reverse=True
+        ):
+            samples = self.samples.get(tag)
+            yield (
+                f"Not supported: {count} <{tag}> element{'s' if count > 1 else ''}"
+                + (f", e.g. ids {', '.join(samples)}" if samples else "")
+            )
+
+    def __str__(self) -> str:
+        return "\n".join(self.messages())
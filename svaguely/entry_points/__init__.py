@@ -0,0 +1,4 @@
+__author__ = "Christian Heider Lindbjerg <chen(at)mapspeople.com>"
+__doc__ = """\
+Console entry points
+"""
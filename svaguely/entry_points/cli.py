@@ -0,0 +1,85 @@
+import argparse
+import sys
+import time
+from typing import Optional, Sequence
+
+__all__ = ["main"]
+__author__ = "Christian Heider Lindbjerg <chen(at)mapspeople.com>"
+
+
+def _batch(args: argparse.Namespace) -> int:
+    from svaguely.batch import iter_batch_convert
+
+    parse_kwargs = dict(
+        name_seperator=args.name_seperator,
+        explicit_names=args.explicit_names,
+        curve_tolerance=args.curve_tolerance,
+    )
+    if args.output_space is not None:
+        parse_kwargs["output_space"] = args.output_space
+
+    start = time.perf_counter()
+    num_ok = num_failed = 0
+    for result in iter_batch_convert(
+        args.sources, args.output, workers=args.workers, **parse_kwargs
+    ):
+        if result.ok:
+            num_ok += 1
+            print(
+                f"ok     {result.seconds:8.3f}s {result.num_elements:8d} elements  "
+                f"{result.source} -> {result.destination}",
+                flush=True,
+            )
+        else:
+            num_failed += 1
+            print(
+                f"FAILED {result.seconds:8.3f}s {result.source}\n{result.error}",
+                file=sys.stderr,
+                flush=True,
+            )
+
+    print(
+        f"{num_ok} converted, {num_failed} failed in {time.perf_counter() - start:.3f}s",
+        flush=True,
+    )
+    return 1 if num_failed else 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    svaguely console entry point
+
+    :param argv: Command line arguments, defaults to sys.argv
+    :return: Exit code
+    """
+    parser = argparse.ArgumentParser(
+        prog="svaguely", description="Vague Svg to Shapely conversion"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = commands.add_parser(
+        "batch",
+        help="Convert many svg files in a process pool",
+        description="Convert svg files to GeoJSON, largest first, reporting every file as it completes",
+    )
+    batch.add_argument(
+        "sources", nargs="+", help="Svg files, directories or glob patterns"
+    )
+    batch.add_argument(
+        "-o", "--output", required=True, help="Directory to write the outputs to"
+    )
+    batch.add_argument(
+        "-w", "--workers", type=int, default=None, help="Number of processes"
+    )
+    batch.add_argument("--output-space", type=float, default=None)
+    batch.add_argument("--curve-tolerance", type=float, default=None)
+    batch.add_argument("--name-seperator", default="|")
+    batch.add_argument("--explicit-names", action="store_true")
+    batch.set_defaults(run=_batch)
+
+    args = parser.parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+from typing import Any, Collection, Dict, Iterator, Mapping, Optional, Union
+
+__all__ = [
+    "EXTRAS_NONE",
+    "EXTRAS_FULL",
+    "ExtrasPolicy",
+    "FrozenMapping",
+    "ExtrasInterner",
+]
+__author__ = "Christian Heider Lindbjerg <chen(at)mapspeople.com>"
+
+EXTRAS_NONE = "none"  # Keep none of the svg attributes
+EXTRAS_FULL = "full"  # Keep all svg attributes, including those inherited from parents
+
+
+class FrozenMapping(Mapping):
+    """
+    Immutable and hashable mapping, so equal extras can be shared between elements and nested in other keys
+    """
+
+    __slots__ = ("_data", "_hash")
+
+    def __init__(self, data: Optional[Mapping[str, Any]] = None):
+        self._data = dict(data or {})
+        self._hash = None
+
+    def __getitem__(self, key: str) -> Any:
+        return self._data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            self._hash = hash(frozenset(self._data.items()))
+        return self._hash
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._data!r})"
+
+    def __reduce__(self):
+        return type(self), (self._data,)
+
+
+class ExtrasInterner:
+    """
+    Selects which svg attributes of an element to keep as extras and interns them. Repeated strings, like style and
+    class values, are stored once, and elements with identical extras share one FrozenMapping, shrinking both
+    resident memory and pickle size.
+
+    Under EXTRAS_FULL the extras stay plain dicts, as they were before policies existed, so callers may still mutate
+    them. Only their values are interned.
+
+    One interner is meant to live for the conversion of one document.
+    """
+
+    def __init__(self, policy: Union[str, Collection[str]] = EXTRAS_FULL):
+        """
+        :param policy: EXTRAS_NONE, EXTRAS_FULL or a whitelist of attribute keys to keep
+        """
+        if isinstance(policy, str):
+            assert policy in (
+                EXTRAS_NONE,
+                EXTRAS_FULL,
+            ), f"{policy=} must be {EXTRAS_NONE}, {EXTRAS_FULL} or a collection of keys"
+            self.whitelist = None if policy == EXTRAS_FULL else frozenset()
+        else:
+            self.whitelist = frozenset(policy)
+
+        self._interned = {}
+
+    def intern(self, value: Any) -> Any:
+        """
+        :param value: Attribute value, mappings and lists are frozen recursively
+        :return: The first seen value equal to value
+        """
+        if isinstance(value, Mapping):
+            value = FrozenMapping({k: self.intern(v) for k, v in value.items()})
+            key = tuple((k, type(v), v) for k, v in value.items())
+        elif isinstance(value, list):
+            value = tuple(self.intern(v) for v in value)
+            key = tuple((type(v), v) for v in value)
+        else:
+            key = value
+
+        try:  # Keyed with the type as well, so 1, 1.0 and True are not merged
+            return self._interned.setdefault((type(value), key), value)
+        except TypeError:  # Unhashable, kept as is
+            return value
+
+    def _copy(self, value: Any) -> Any:
+        """
+        :param value: Attribute value, mappings and lists are copied recursively
+        :return: Mutable copy of value, sharing the interned values within
+        """
+        if isinstance(value, Mapping):
+            return {k: self._copy(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._copy(v) for v in value]
+        return self.intern(value)
+
+    def __call__(
+        self, values: Optional[Mapping[str, Any]], **converted: Any
+    ) -> Mapping[str, Any]:
+        """
+        :param values: Svg attributes of the element, filtered by the policy
+        :param converted: Extras produced by the conversion, like text content, always kept
+        :return: Shared frozen extras, or a dict of its own under EXTRAS_FULL
+        """
+        extras: Dict[str, Any] = {}
+        if values:
+            if self.whitelist is None:
+                extras.update(values)
+            else:
+                extras.update((k, v) for k, v in values.items() if k in self.whitelist)
+        extras.update(converted)
+
+        if self.whitelist is None:
+            return self._copy(extras)
+        return self.intern(extras)
+
+
+ExtrasPolicy = Union[str, Collection[str], ExtrasInterner]
@@ -1,11 +1,73 @@
+import json
+import mmap
+import os
+import re
+import shutil
+import tempfile
 from pathlib import Path
-from typing import Mapping
+from typing import Any, BinaryIO, Mapping, Optional, Tuple, Union
+from xml.sax.saxutils import quoteattr
 
-__all__ = ["add_metadata_desc_tag", "METADATA_KEY"]
+__all__ = [
+    "add_metadata_desc_tag",
+    "write_metadata_desc_tag",
+    "decode_metadata_desc",
+    "METADATA_KEY",
+]
 
 __author__ = "Christian Heider Lindbjerg <chen(at)mapspeople.com>"
 
 METADATA_KEY = "SVG_METADATA"
+METADATA_COPY_CHUNK_SIZE = 1 << 20
+
+_SVG_END_TAG = b"</svg>"
+_DESC_TAG_START = b"<desc"
+_DESC_WITH_ATTRIBUTES = re.compile(rb"<desc\s")
+_DESC_START_TAG = re.compile(
+    rb"<desc(?:\s+[^\s=/>]+\s*=\s*(?:\"[^\"]*\"|'[^']*'))*\s*(/?)>"
+)
+_DESC_END_TAG = re.compile(rb"</desc\s*>")
+_ATTRIBUTE = re.compile(rb"([^\s=/>]+)\s*=\s*(?:\"([^\"]*)\"|'([^']*)')")
+
+
+def _find_metadata_desc(
+    mapped: Union[bytes, mmap.mmap], end: int
+) -> Optional[Tuple[int, int]]:
+    """
+    Find the last metadata <desc> element before end, self-closing or not and with either quotes around its
+    attributes.
+
+    :param mapped: The svg
+    :param end: Position of the closing </svg>
+    :return: Start and end of the element, None if there is none
+    """
+    start = end
+    while True:
+        start = mapped.rfind(_DESC_TAG_START, 0, start)
+        if start < 0:
+            return None
+
+        # <desc> without attributes or another element, like <description>
+        if not _DESC_WITH_ATTRIBUTES.match(mapped, start, end):
+            continue
+
+        tag = _DESC_START_TAG.match(mapped, start, end)
+        if tag is None:
+            raise ValueError(f"Malformed <desc> tag at byte {start}")
+
+        if not any(
+            name == b"id" and (double or single) == METADATA_KEY.encode()
+            for name, double, single in _ATTRIBUTE.findall(tag.group(0))
+        ):
+            continue
+
+        if tag.group(1):  # Self-closing
+            return start, tag.end()
+
+        closing = _DESC_END_TAG.search(mapped, tag.end(), end)
+        if closing is None:
+            raise ValueError(f"Unterminated metadata <desc> tag at byte {start}")
+        return start, closing.end()
 
 
 def add_metadata_desc_tag(metadata_dict: Mapping, path_to_svg: Path) -> str:
@@ -27,3 +89,88 @@ def add_metadata_desc_tag(metadata_dict: Mapping, path_to_svg: Path) -> str:
         raise Exception("CANT FIND NECESSARY ENDING STRING")
 
     return svg_metadata_string
+
+
+def write_metadata_desc_tag(
+    metadata_dict: Mapping,
+    path_to_svg: Path,
+    output: Optional[Union[Path, BinaryIO]] = None,
+    *,
+    chunk_size: int = METADATA_COPY_CHUNK_SIZE,
+) -> None:
+    """
+    Streaming variant of add_metadata_desc_tag for large files. The svg is memory mapped and copied to the output
+    in chunks, with the metadata <desc> tag inserted before the final </svg>, found searching from the end.
+    An existing metadata <desc> element is replaced where it is, whether self-closing or with a closing </desc>, and
+    with either quotes around its attributes. A malformed or unterminated one raises a ValueError. The metadata is
+    written as JSON.
+
+    :param metadata_dict: The metadata, must be JSON serializable
+    :param path_to_svg: Path to the svg
+    :param output: Path or binary file object to write the svg with metadata to. If None the svg is replaced
+    :param chunk_size: Number of bytes copied at a time
+    """
+    metadata_desc = quoteattr(json.dumps(metadata_dict))
+    metadata_tag = f'<desc id="{METADATA_KEY}" desc={metadata_desc} />'.encode()
+
+    if output is None:
+        path_to_svg = Path(path_to_svg)
+        descriptor, temporary = tempfile.mkstemp(suffix=".svg", dir=path_to_svg.parent)
+        try:
+            with os.fdopen(descriptor, "wb") as f:
+                write_metadata_desc_tag(
+                    metadata_dict, path_to_svg, f, chunk_size=chunk_size
+                )
+            shutil.copymode(path_to_svg, temporary)
+            os.replace(temporary, path_to_svg)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        return
+
+    if not hasattr(output, "write"):
+        with open(output, "wb") as f:
+            write_metadata_desc_tag(
+                metadata_dict, path_to_svg, f, chunk_size=chunk_size
+            )
+        return
+
+    with open(path_to_svg, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:  # Empty files can not be mapped
+            raise ValueError(f"No closing {_SVG_END_TAG.decode()} in {path_to_svg}")
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            end = mapped.rfind(_SVG_END_TAG)
+            if end < 0:
+                raise ValueError(f"No closing {_SVG_END_TAG.decode()} in {path_to_svg}")
+
+            try:
+                existing = _find_metadata_desc(mapped, end)
+            except ValueError as e:
+                raise ValueError(f"{e} in {path_to_svg}") from e
+
+            if existing is not None:
+                insert, resume = existing
+            else:
+                insert = resume = end
+                if mapped[end - 1 : end] == b"\n":  # On a line of its own
+                    metadata_tag += b"\n"
+
+            with memoryview(mapped) as view:
+                for start in range(0, insert, chunk_size):
+                    output.write(view[start : min(start + chunk_size, insert)])
+                output.write(metadata_tag)
+                for start in range(resume, len(view), chunk_size):
+                    output.write(view[start : start + chunk_size])
+
+
+def decode_metadata_desc(desc: str) -> Any:
+    """
+    :param desc: The desc attribute of the metadata <desc> element, JSON as written by write_metadata_desc_tag or
+     the repr of a dict as written by add_metadata_desc_tag
+    :return: The metadata
+    """
+    try:
+        return json.loads(desc)
+    except json.JSONDecodeError:
+        return json.loads(desc.replace("'", '"'))
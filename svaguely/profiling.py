@@ -0,0 +1,172 @@
+import heapq
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+import shapely
+
+__all__ = ["ParseProfiler", "ElementTypeTimings", "profile_stage"]
+__author__ = "Christian Heider Lindbjerg <chen(at)mapspeople.com>"
+
+NO_STAGE = nullcontext()
+
+
+@dataclass
+class ElementTypeTimings:
+    count: int = 0
+    seconds: float = 0.0
+    num_vertices: int = 0
+
+
+class ParseProfiler:
+    """
+    Instrumentation of parse_svg, iter_svg and convert_elements. Receives the time spent in every stage and the
+    time and vertex count of every converted element, aggregated per stage and per element type, and keeps the
+    slowest elements.
+
+    Stages nest, "convert" includes "reify", "flatten", "sub_paths", "repair" and "holes" of the elements within.
+    Override on_stage and on_element to stream the measurements elsewhere. Without a profiler nothing is measured.
+
+    Elements converted in a process pool (parse_svg workers) are not measured individually, the pool shows as the
+    "convert" stage. Lazy elements are measured when their geometry is first accessed.
+    """
+
+    def __init__(self, *, num_slowest: int = 10):
+        """
+        :param num_slowest: Number of the slowest elements to keep
+        """
+        self.num_slowest = num_slowest
+        self.stages: Dict[str, float] = {}
+        self.element_types: Dict[str, ElementTypeTimings] = {}
+        self._slowest: List[Tuple[float, int, str, str]] = []
+        self._num_elements = 0
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        :param name: Name of the stage, e.g. "parse" or "flatten"
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.on_stage(name, time.perf_counter() - start)
+
+    def on_stage(self, name: str, seconds: float) -> None:
+        """
+        :param name: Name of the stage
+        :param seconds: Time spent in one pass of the stage
+        """
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def on_element(
+        self, element_type: str, element_id: str, seconds: float, num_vertices: int
+    ) -> None:
+        """
+        :param element_type: Name of the svgelements type
+        :param element_id: Id of the element
+        :param seconds: Time spent converting its geometry
+        :param num_vertices: Number of coordinates of its geometry
+        """
+        timings = self.element_types.get(element_type)
+        if timings is None:
+            timings = self.element_types[element_type] = ElementTypeTimings()
+        timings.count += 1
+        timings.seconds += seconds
+        timings.num_vertices += num_vertices
+
+        self._num_elements += 1  # Breaks ties, so ids are never compared
+        entry = (seconds, self._num_elements, element_type, element_id)
+        if len(self._slowest) < self.num_slowest:
+            heapq.heappush(self._slowest, entry)
+        elif self._slowest and seconds > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def convert(
+        self,
+        element_type: type,
+        element_id: str,
+        geometry_converter: Callable[[], Optional[shapely.geometry.base.BaseGeometry]],
+    ) -> Optional[shapely.geometry.base.BaseGeometry]:
+        """
+        Measure a geometry conversion
+
+        :param element_type: The svgelements type of the element
+        :param element_id: Id of the element
+        :param geometry_converter: Converts the element
+        :return: The geometry of the element
+        """
+        start = time.perf_counter()
+        geometry = geometry_converter()
+        seconds = time.perf_counter() - start
+
+        self.on_element(
+            element_type.__name__,
+            element_id,
+            seconds,
+            0 if geometry is None else int(shapely.get_num_coordinates(geometry)),
+        )
+        return geometry
+
+    @property
+    def slowest(self) -> List[Tuple[str, str, float]]:
+        """
+        :return: (element type, element id, seconds) of the slowest elements, slowest first
+        """
+        return [
+            (element_type, element_id, seconds)
+            for seconds, _, element_type, element_id in sorted(
+                self._slowest, reverse=True
+            )
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(
+            stages=dict(self.stages),
+            element_types={
+                k: dict(count=v.count, seconds=v.seconds, num_vertices=v.num_vertices)
+                for k, v in self.element_types.items()
+            },
+            slowest=[
+                dict(element_type=t, element_id=i, seconds=s)
+                for t, i, s in self.slowest
+            ],
+        )
+
+    def report(self) -> str:
+        """
+        :return: Human readable summary of the stages, element types and slowest elements
+        """
+        lines = ["stage                          seconds"]
+        lines += [f"{k:<24} {v:14.6f}" for k, v in self.stages.items()]
+        lines += ["", "element type        count       seconds     vertices"]
+        lines += [
+            f"{k:<16} {v.count:8d} {v.seconds:13.6f} {v.num_vertices:12d}"
+            for k, v in sorted(
+                self.element_types.items(), key=lambda kv: kv[1].seconds, reverse=True
+            )
+        ]
+        lines += ["", "slowest elements"]
+        lines += [f"{s:12.6f} {t:<16} {i}" for t, i, s in self.slowest]
+        return "\n".join(lines)
+
+
+def profile_stage(profiler: Optional[ParseProfiler], name: str) -> ContextManager:
+    """
+    :param profiler: The profiler, or None
+    :param name: Name of the stage
+    :return: Context measuring the stage, a shared no-op context without a profiler
+    """
+    if profiler is None:
+        return NO_STAGE
+    return profiler.stage(name)
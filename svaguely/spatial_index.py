@@ -0,0 +1,172 @@
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy
+import shapely
+
+from .data_models import SvgElement, SvgElementTable, _iter_leaves, _object_array
+
+__all__ = ["SvgElementIndex"]
+__author__ = "Christian Heider Lindbjerg <chen(at)mapspeople.com>"
+
+KeyPath = Tuple[str, ...]
+
+
+class SvgElementIndex:
+    """
+    STRtree over the geometries of converted svg elements, for hit-testing points and querying viewports without
+    scanning every element. Queries return key paths, the unique ids of the groups from the top level down
+    followed by the unique id of the element, in document order, so the topmost element is last.
+
+    Pass an empty index to parse_svg to have it built over the result, or build one with build, from_mapping or
+    from_table. The tree is built on the first query. Pickling stores the key paths and the geometries as WKB,
+    the tree is rebuilt after loading.
+    """
+
+    def __init__(self, *, node_capacity: int = 10):
+        """
+        :param node_capacity: Max number of geometries per node of the tree
+        """
+        self.node_capacity = node_capacity
+        self.key_paths = _object_array([])
+        self.geometries = numpy.empty(0, dtype=object)
+        self._tree: Optional[shapely.STRtree] = None
+
+    def build(
+        self, elements: Iterable[Tuple[KeyPath, SvgElement]]
+    ) -> "SvgElementIndex":
+        """
+        Index elements, replacing the indexed elements. Lazy geometries are converted. Elements without a geometry
+        are kept but never returned.
+
+        :param elements: Iterable of (path of unique ids, SvgElement), as yielded by iter_svg
+        :return: This index
+        """
+        key_paths, geometries = [], []
+        for key_path, element in elements:
+            key_paths.append(tuple(key_path))
+            geometries.append(element.geometry)
+
+        self.key_paths = _object_array(key_paths)
+        self.geometries = _object_array(geometries)
+        self._tree = None
+        return self
+
+    def build_from_table(self, table: SvgElementTable) -> "SvgElementIndex":
+        """
+        Index the rows of a table, replacing the indexed elements
+
+        :param table: Table of svg elements, the columns are shared, not copied
+        :return: This index
+        """
+        self.key_paths = table.key_path
+        self.geometries = table.geometry
+        self._tree = None
+        return self
+
+    @classmethod
+    def from_mapping(
+        cls, elements: Mapping[str, Any], *, node_capacity: int = 10
+    ) -> "SvgElementIndex":
+        """
+        :param elements: Nested mapping of svg elements, as returned by parse_svg
+        :param node_capacity: Max number of geometries per node of the tree
+        :return: Index of the elements
+        """
+        return cls(node_capacity=node_capacity).build(_iter_leaves(elements))
+
+    @classmethod
+    def from_table(
+        cls, table: SvgElementTable, *, node_capacity: int = 10
+    ) -> "SvgElementIndex":
+        """
+        :param table: Table of svg elements, the columns are shared, not copied
+        :param node_capacity: Max number of geometries per node of the tree
+        :return: Index of the rows of the table
+        """
+        return cls(node_capacity=node_capacity).build_from_table(table)
+
+    @property
+    def tree(self) -> shapely.STRtree:
+        """
+        :return: The STRtree, built on first access
+        """
+        if self._tree is None:
+            self._tree = shapely.STRtree(
+                self.geometries, node_capacity=self.node_capacity
+            )
+        return self._tree
+
+    def __len__(self) -> int:
+        return len(self.key_paths)
+
+    def _key_paths(self, indices: numpy.ndarray) -> List[KeyPath]:
+        return self.key_paths[numpy.sort(indices)].tolist()
+
+    def query_point(self, x: float, y: float, *, tolerance: float = 0) -> List[KeyPath]:
+        """
+        :param x: X of the point, in output space
+        :param y: Y of the point
+        :param tolerance: Also hit elements within this distance of the point, e.g. thin lines
+        :return: Key paths of the elements hit by the point, topmost last
+        """
+        point = shapely.Point(x, y)
+        if tolerance > 0:
+            return self._key_paths(
+                self.tree.query(point, predicate="dwithin", distance=tolerance)
+            )
+        return self._key_paths(self.tree.query(point, predicate="intersects"))
+
+    def query_bbox(
+        self,
+        min_x: float,
+        min_y: float,
+        max_x: float,
+        max_y: float,
+        *,
+        predicate: Optional[str] = "intersects",
+    ) -> List[KeyPath]:
+        """
+        :param min_x: Min x of the box, in output space
+        :param min_y: Min y of the box
+        :param max_x: Max x of the box
+        :param max_y: Max y of the box
+        :param predicate: Shapely predicate the element must satisfy against the box, e.g. "contains" for elements
+         inside the box rather than "intersects". None compares the bounding boxes only, the fastest
+        :return: Key paths of the elements, in document order
+        """
+        return self._key_paths(
+            self.tree.query(
+                shapely.box(min_x, min_y, max_x, max_y), predicate=predicate
+            )
+        )
+
+    def nearest(
+        self, x: float, y: float, *, max_distance: Optional[float] = None
+    ) -> Optional[Tuple[KeyPath, float]]:
+        """
+        :param x: X of the point, in output space
+        :param y: Y of the point
+        :param max_distance: Ignore elements further away, also makes the search faster
+        :return: Key path of the nearest element and its distance, the topmost on ties. None if no element is
+         within max_distance
+        """
+        indices, distances = self.tree.query_nearest(
+            shapely.Point(x, y), max_distance=max_distance, return_distance=True
+        )
+        if len(indices) == 0:
+            return None
+        nearest = numpy.argmax(indices)
+        return self.key_paths[indices[nearest]], float(distances[nearest])
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {
+            "node_capacity": self.node_capacity,
+            "key_paths": self.key_paths,
+            "geometries": shapely.to_wkb(self.geometries),
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.node_capacity = state["node_capacity"]
+        self.key_paths = state["key_paths"]
+        self.geometries = shapely.from_wkb(state["geometries"])
+        self._tree = None
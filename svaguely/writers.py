@@ -0,0 +1,638 @@
+import json
+import os
+import sqlite3
+import struct
+from functools import partial
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import numpy
+import shapely
+
+from .data_models import SvgElement, SvgElementTable
+
+__all__ = [
+    "write_geojson",
+    "write_geopackage",
+    "write_flatgeobuf",
+    "write_geoparquet",
+    "export_columns",
+]
+__author__ = "Christian Heider Lindbjerg <chen(at)mapspeople.com>"
+
+Elements = Union[SvgElementTable, Iterable[Tuple[Tuple[str, ...], SvgElement]]]
+
+DEFAULT_BATCH_SIZE = 10_000
+DEFAULT_LAYER_NAME = "svg_elements"
+
+EXPORT_STRING_COLUMNS = (
+    "element_id",
+    "element_name",
+    "element_type",
+    "group_path",
+    "color",
+    "fill_color",
+    "stroke_color",
+    "text",
+    "font",
+)
+EXPORT_DOUBLE_COLUMNS = ("stroke_width",)
+
+
+def _iter_tables(elements: Elements, batch_size: int) -> Iterator[SvgElementTable]:
+    """Batches of elements as tables, slicing a table or collecting an iterable like iter_svg"""
+    if isinstance(elements, SvgElementTable):
+        for start in range(0, len(elements), batch_size):
+            yield elements[start : start + batch_size]
+        return
+
+    batch = []
+    for element in elements:
+        batch.append(element)
+        if len(batch) == batch_size:
+            yield SvgElementTable.from_elements(batch)
+            batch = []
+    if batch:
+        yield SvgElementTable.from_elements(batch)
+
+
+def _json_default(value: Any) -> Any:
+    """Frozen extras as json objects, anything else unknown as its string"""
+    if isinstance(value, Mapping):
+        return dict(value)
+    if isinstance(value, tuple):
+        return list(value)
+    return str(value)
+
+
+def _string_column(values: Iterable[Any]) -> numpy.ndarray:
+    return numpy.array([None if v is None else str(v) for v in values], dtype=object)
+
+
+def _total_bounds(bounds: Sequence[numpy.ndarray]) -> List[Any]:
+    """Union of per batch total bounds, None where no batch had a non empty geometry"""
+    bounds = numpy.asarray(bounds, dtype=numpy.float64).reshape(-1, 4)
+    bounds = bounds[~numpy.isnan(bounds).any(axis=1)]
+    if not len(bounds):
+        return [None] * 4
+    return [*bounds[:, :2].min(axis=0).tolist(), *bounds[:, 2:].max(axis=0).tolist()]
+
+
+def export_columns(
+    table: SvgElementTable, *, name_seperator: str = "|"
+) -> Dict[str, numpy.ndarray]:
+    """
+    Flat attribute columns written by the binary writers, strings in object arrays and the stroke width in a float
+    array with nan for no stroke width. The text and font extras are lifted into columns, the font as json.
+
+    :param table: Converted svg elements
+    :param name_seperator: Seperator joining the group path
+    :return: Mapping of column name to array
+    """
+    extras = [{} if e is None else e for e in table.extras]
+
+    return {
+        "element_id": _string_column(table.element_id),
+        "element_name": _string_column(table.element_name),
+        "element_type": _string_column(t.__name__ for t in table.element_type),
+        "group_path": _string_column(
+            name_seperator.join(map(str, k[:-1])) for k in table.key_path
+        ),
+        "color": _string_column(table.color),
+        "fill_color": _string_column(table.fill_color),
+        "stroke_color": _string_column(table.stroke_color),
+        "stroke_width": table.stroke_width,
+        "text": _string_column(e.get("text") for e in extras),
+        "font": _string_column(
+            (
+                None
+                if e.get("font") is None
+                else json.dumps(e["font"], default=_json_default)
+            )
+            for e in extras
+        ),
+    }
+
+
+def write_geojson(
+    table: SvgElementTable,
+    path: Union[Path, str],
+    *,
+    extras_columns: Sequence[str] = (),
+    name_seperator: str = "|",
+) -> None:
+    """
+    Write converted svg elements as a GeoJSON FeatureCollection, one feature at a time
+
+    :param table: Converted svg elements
+    :param path: Destination file
+    :param extras_columns: Keys of the extras to write as properties, must be json serializable
+    :param name_seperator: Seperator joining the key path into the key property
+    """
+    properties = table.attribute_columns(
+        extras_columns=extras_columns, name_seperator=name_seperator
+    )
+    names = list(properties)
+    geometries = shapely.to_geojson(table.geometry)
+
+    with open(path, "w", encoding="utf8") as f:
+        f.write('{"type":"FeatureCollection","features":[')
+        for i, (geometry, *values) in enumerate(zip(geometries, *properties.values())):
+            if i:
+                f.write(",")
+            f.write('{"type":"Feature","geometry":')
+            f.write("null" if geometry is None else geometry)
+            f.write(',"properties":')
+            f.write(json.dumps(dict(zip(names, values)), default=_json_default))
+            f.write("}")
+        f.write("]}")
+
+
+# GeoPackage, an sqlite database following OGC 12-128r18
+
+GPKG_APPLICATION_ID = 0x47504B47  # "GPKG"
+GPKG_USER_VERSION = 10300
+GPKG_SRS_ID = -1  # Undefined cartesian, svg coordinates are not georeferenced
+GPKG_HEADER = numpy.dtype(
+    [
+        ("magic", "S2"),
+        ("version", "u1"),
+        ("flags", "u1"),
+        ("srs_id", "<i4"),
+        ("envelope", "<f8", 4),
+    ]
+)
+GPKG_FLAGS_XY_ENVELOPE = (
+    0b0000_0011  # Little endian with a min x, max x, min y, max y envelope
+)
+GPKG_FLAGS_EMPTY = 0b0001_0001  # Little endian without envelope
+GPKG_WGS84_DEFINITION = (
+    'GEOGCS["WGS 84",DATUM["WGS_1984",SPHEROID["WGS 84",6378137,298.257223563,AUTHORITY["EPSG","7030"]],'
+    'AUTHORITY["EPSG","6326"]],PRIMEM["Greenwich",0,AUTHORITY["EPSG","8901"]],'
+    'UNIT["degree",0.0174532925199433,AUTHORITY["EPSG","9122"]],AUTHORITY["EPSG","4326"]]'
+)
+GPKG_SCHEMA = """
+CREATE TABLE gpkg_spatial_ref_sys (
+    srs_name TEXT NOT NULL, srs_id INTEGER NOT NULL PRIMARY KEY, organization TEXT NOT NULL,
+    organization_coordsys_id INTEGER NOT NULL, definition TEXT NOT NULL, description TEXT
+);
+CREATE TABLE gpkg_contents (
+    table_name TEXT NOT NULL PRIMARY KEY, data_type TEXT NOT NULL, identifier TEXT UNIQUE,
+    description TEXT DEFAULT '', last_change DATETIME NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now')),
+    min_x DOUBLE, min_y DOUBLE, max_x DOUBLE, max_y DOUBLE, srs_id INTEGER,
+    CONSTRAINT fk_gc_r_srs_id FOREIGN KEY (srs_id) REFERENCES gpkg_spatial_ref_sys(srs_id)
+);
+CREATE TABLE gpkg_geometry_columns (
+    table_name TEXT NOT NULL, column_name TEXT NOT NULL, geometry_type_name TEXT NOT NULL,
+    srs_id INTEGER NOT NULL, z TINYINT NOT NULL, m TINYINT NOT NULL,
+    CONSTRAINT pk_geom_cols PRIMARY KEY (table_name, column_name),
+    CONSTRAINT fk_gc_tn FOREIGN KEY (table_name) REFERENCES gpkg_contents(table_name),
+    CONSTRAINT fk_gc_srs FOREIGN KEY (srs_id) REFERENCES gpkg_spatial_ref_sys (srs_id)
+);
+"""
+GPKG_SPATIAL_REF_SYS = (
+    (
+        "Undefined cartesian SRS",
+        -1,
+        "NONE",
+        -1,
+        "undefined",
+        "undefined cartesian coordinate reference system",
+    ),
+    (
+        "Undefined geographic SRS",
+        0,
+        "NONE",
+        0,
+        "undefined",
+        "undefined geographic coordinate reference system",
+    ),
+    (
+        "WGS 84 geodetic",
+        4326,
+        "EPSG",
+        4326,
+        GPKG_WGS84_DEFINITION,
+        "longitude/latitude coordinates in decimal degrees on the WGS 84 spheroid",
+    ),
+)
+
+
+def _geopackage_geometries(geometries: numpy.ndarray) -> List[Any]:
+    """GeoPackage binary geometries, a header with the envelope followed by little endian WKB"""
+    wkb = shapely.to_wkb(geometries, byte_order=1)
+    is_empty = shapely.is_empty(geometries)
+
+    headers = numpy.zeros(len(geometries), dtype=GPKG_HEADER)
+    headers["magic"] = b"GP"
+    headers["srs_id"] = GPKG_SRS_ID
+    headers["flags"] = numpy.where(is_empty, GPKG_FLAGS_EMPTY, GPKG_FLAGS_XY_ENVELOPE)
+    headers["envelope"] = shapely.bounds(geometries)[:, [0, 2, 1, 3]]
+    header_bytes = headers.tobytes()
+
+    size = GPKG_HEADER.itemsize
+    return [
+        (
+            None
+            if w is None
+            else header_bytes[i * size : i * size + (8 if e else size)] + w
+        )
+        for i, (w, e) in enumerate(zip(wkb, is_empty))
+    ]
+
+
+def _quote_identifier(name: str) -> str:
+    """Quote a sql identifier, doubling the quotes within it"""
+    if "\0" in name:
+        raise ValueError(f"Identifier {name!r} contains a NUL character")
+    return '"' + name.replace('"', '""') + '"'
+
+
+def write_geopackage(
+    elements: Elements,
+    path: Union[Path, str],
+    *,
+    layer: str = DEFAULT_LAYER_NAME,
+    name_seperator: str = "|",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> None:
+    """
+    Write converted svg elements to a new GeoPackage feature table in batches, only needing sqlite3
+
+    :param elements: Table of svg elements, or an iterable of (path of unique ids, SvgElement) like iter_svg
+    :param path: Destination file, replaced if it exists
+    :param layer: Name of the feature table, any text without NUL characters
+    :param name_seperator: Seperator joining the group path
+    :param batch_size: Number of elements converted and inserted at a time
+    """
+    quoted_layer = _quote_identifier(layer)
+
+    if os.path.exists(path):
+        os.remove(path)
+
+    columns = (*EXPORT_STRING_COLUMNS, *EXPORT_DOUBLE_COLUMNS)
+    column_definitions = ", ".join(
+        [f'"{c}" TEXT' for c in EXPORT_STRING_COLUMNS]
+        + [f'"{c}" DOUBLE' for c in EXPORT_DOUBLE_COLUMNS]
+    )
+    quoted_columns = ", ".join(f'"{c}"' for c in columns)
+    insert = (
+        f"INSERT INTO {quoted_layer} (geom, {quoted_columns}) "
+        f"VALUES ({', '.join('?' * (len(columns) + 1))})"
+    )
+
+    connection = sqlite3.connect(path)
+    try:
+        connection.execute(f"PRAGMA application_id = {GPKG_APPLICATION_ID}")
+        connection.execute(f"PRAGMA user_version = {GPKG_USER_VERSION}")
+        connection.executescript(GPKG_SCHEMA)
+        connection.execute(
+            f"CREATE TABLE {quoted_layer} "
+            f"(fid INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL, geom GEOMETRY, {column_definitions})"
+        )
+        connection.executemany(
+            "INSERT INTO gpkg_spatial_ref_sys VALUES (?, ?, ?, ?, ?, ?)",
+            GPKG_SPATIAL_REF_SYS,
+        )
+
+        bounds = []
+        for table in _iter_tables(elements, batch_size):
+            exported = export_columns(table, name_seperator=name_seperator)
+            exported["stroke_width"] = numpy.where(
+                numpy.isnan(table.stroke_width), None, table.stroke_width
+            )
+            connection.executemany(
+                insert,
+                zip(
+                    _geopackage_geometries(table.geometry),
+                    *(exported[c].tolist() for c in columns),
+                ),
+            )
+            bounds.append(shapely.total_bounds(table.geometry))
+
+        connection.execute(
+            "INSERT INTO gpkg_contents (table_name, data_type, identifier, min_x, min_y, max_x, max_y, srs_id) "
+            "VALUES (?, 'features', ?, ?, ?, ?, ?, ?)",
+            (layer, layer, *_total_bounds(bounds), GPKG_SRS_ID),
+        )
+        connection.execute(
+            "INSERT INTO gpkg_geometry_columns VALUES (?, 'geom', 'GEOMETRY', ?, 0, 0)",
+            (layer, GPKG_SRS_ID),
+        )
+        connection.commit()
+    finally:
+        connection.close()
+
+
+# FlatGeobuf, size prefixed flatbuffers following https://github.com/flatgeobuf/flatgeobuf, written without index
+
+FGB_MAGIC = b"fgb\x03fgb\x00"
+FGB_COLUMN_TYPE_DOUBLE = 10
+FGB_COLUMN_TYPE_STRING = 11
+FGB_GEOMETRY_TYPES = {
+    "Point": 1,
+    "LineString": 2,
+    "LinearRing": 2,
+    "Polygon": 3,
+    "MultiPoint": 4,
+    "MultiLineString": 5,
+    "MultiPolygon": 6,
+    "GeometryCollection": 7,
+}
+
+
+class _FlatBufferBuilder:
+    """
+    Minimal flatbuffer serializer laying out objects front to back: a table is preceded by its vtable and followed
+    by the strings, vectors and tables it references, so every uoffset points forward.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray(4)  # Root table offset
+
+    def _pad(self, alignment: int, offset: int = 0) -> None:
+        self.buffer.extend(b"\0" * (-(len(self.buffer) + offset) % alignment))
+
+    def _patch_offset(self, position: int, target: int) -> None:
+        self.buffer[position : position + 4] = struct.pack("<I", target - position)
+
+    def finish(self, root: Callable[[], int]) -> bytes:
+        self._patch_offset(0, root())
+        self._pad(8)
+        return bytes(self.buffer)
+
+    def string(self, value: str) -> int:
+        encoded = value.encode("utf8")
+        self._pad(4)
+        position = len(self.buffer)
+        self.buffer += struct.pack("<I", len(encoded)) + encoded + b"\0"
+        return position
+
+    def vector(self, array: numpy.ndarray) -> int:
+        self._pad(max(array.dtype.itemsize, 4), 4)
+        position = len(self.buffer)
+        self.buffer += struct.pack("<I", len(array)) + array.tobytes()
+        return position
+
+    def table_vector(self, tables: Sequence[Callable[[], int]]) -> int:
+        self._pad(4)
+        position = len(self.buffer)
+        self.buffer += struct.pack("<I", len(tables)) + b"\0" * (4 * len(tables))
+        for i, table in enumerate(tables):
+            self._patch_offset(position + 4 + 4 * i, table())
+        return position
+
+    def table(self, fields: Dict[int, Tuple[str, Any]]) -> int:
+        """
+        :param fields: Slot to (struct format, value) for scalars, or ("offset", callable writing the referenced
+         object and returning its position)
+        :return: Position of the table
+        """
+        layout, size = {}, 4  # After the soffset to the vtable
+        for slot, (kind, _) in sorted(
+            fields.items(),
+            key=lambda f: -(4 if f[1][0] == "offset" else struct.calcsize(f[1][0])),
+        ):
+            width = 4 if kind == "offset" else struct.calcsize(kind)
+            size += -size % width
+            layout[slot] = size
+            size += width
+
+        num_slots = max(fields, default=-1) + 1
+        self._pad(2)
+        vtable_position = len(self.buffer)
+        self.buffer += struct.pack(
+            f"<{2 + num_slots}H",
+            4 + 2 * num_slots,
+            size,
+            *(layout.get(i, 0) for i in range(num_slots)),
+        )
+
+        self._pad(8)
+        position = len(self.buffer)
+        inline = bytearray(size)
+        inline[:4] = struct.pack("<i", position - vtable_position)
+        for slot, (kind, value) in fields.items():
+            if kind != "offset":
+                struct.pack_into(f"<{kind}", inline, layout[slot], value)
+        self.buffer += inline
+
+        for slot, (kind, value) in fields.items():
+            if kind == "offset":
+                self._patch_offset(position + layout[slot], value())
+
+        return position
+
+
+def _flatgeobuf_geometry(
+    builder: _FlatBufferBuilder, geometry: shapely.geometry.base.BaseGeometry
+) -> int:
+    """Geometry table, rings and parts of a line or polygon are marked by their end point index"""
+    geometry_type = FGB_GEOMETRY_TYPES[geometry.geom_type]
+    fields = {6: ("B", geometry_type)}
+
+    if geometry_type in (6, 7):  # Parts
+        parts = shapely.get_parts(geometry)
+        fields[7] = (
+            "offset",
+            lambda: builder.table_vector(
+                [partial(_flatgeobuf_geometry, builder, p) for p in parts]
+            ),
+        )
+        return builder.table(fields)
+
+    if geometry_type == 3:
+        lines = shapely.get_rings(geometry)
+    elif geometry_type == 5:
+        lines = shapely.get_parts(geometry)
+    else:
+        lines = [geometry]
+
+    coordinates = [shapely.get_coordinates(line) for line in lines]
+    xy = numpy.concatenate(coordinates) if coordinates else numpy.empty((0, 2))
+    fields[1] = ("offset", lambda: builder.vector(xy.astype("<f8").ravel()))
+    if len(coordinates) > 1:
+        ends = numpy.cumsum([len(c) for c in coordinates]).astype("<u4")
+        fields[0] = ("offset", lambda: builder.vector(ends))
+
+    return builder.table(fields)
+
+
+def _flatgeobuf_properties(
+    columns: Sequence[Tuple[str, int]], values: Sequence[Any]
+) -> numpy.ndarray:
+    """Properties blob, the column index followed by the value for every non null value"""
+    properties = bytearray()
+    for i, ((_, column_type), value) in enumerate(zip(columns, values)):
+        if value is None or (
+            column_type == FGB_COLUMN_TYPE_DOUBLE and numpy.isnan(value)
+        ):
+            continue
+        if column_type == FGB_COLUMN_TYPE_DOUBLE:
+            properties += struct.pack("<Hd", i, value)
+        else:
+            encoded = value.encode("utf8")
+            properties += struct.pack("<HI", i, len(encoded)) + encoded
+    return numpy.frombuffer(bytes(properties), dtype=numpy.uint8)
+
+
+def write_flatgeobuf(
+    elements: Elements,
+    path: Union[Path, str],
+    *,
+    layer: str = DEFAULT_LAYER_NAME,
+    name_seperator: str = "|",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> None:
+    """
+    Write converted svg elements to a FlatGeobuf file without spatial index in batches, without dependencies.
+    Elements without a geometry are skipped, as FlatGeobuf features require one.
+
+    :param elements: Table of svg elements, or an iterable of (path of unique ids, SvgElement) like iter_svg
+    :param path: Destination file, replaced if it exists
+    :param layer: Name of the dataset
+    :param name_seperator: Seperator joining the group path
+    :param batch_size: Number of elements converted and written at a time
+    """
+    columns = [(c, FGB_COLUMN_TYPE_STRING) for c in EXPORT_STRING_COLUMNS] + [
+        (c, FGB_COLUMN_TYPE_DOUBLE) for c in EXPORT_DOUBLE_COLUMNS
+    ]
+
+    header = _FlatBufferBuilder()
+    features_count_offset = (
+        8  # Of the ulong, placed first after the soffset of the header table
+    )
+    header_buffer = header.finish(
+        lambda: header.table(
+            {
+                8: ("Q", 0),  # Features count, patched after writing the features
+                0: ("offset", lambda: header.string(layer)),
+                7: (
+                    "offset",
+                    lambda: header.table_vector(
+                        [
+                            partial(
+                                header.table,
+                                {
+                                    0: ("offset", partial(header.string, name)),
+                                    1: ("B", column_type),
+                                },
+                            )
+                            for name, column_type in columns
+                        ]
+                    ),
+                ),
+                2: ("B", 0),  # Unknown geometry type, every feature carries its own
+                9: ("H", 0),  # Index node size, no index
+            }
+        )
+    )
+    header_table_position = struct.unpack_from("<I", header_buffer)[0]
+
+    features_count = 0
+    with open(path, "wb") as f:
+        f.write(FGB_MAGIC)
+        f.write(struct.pack("<I", len(header_buffer)))
+        header_start = f.tell()
+        f.write(header_buffer)
+
+        for table in _iter_tables(elements, batch_size):
+            exported = export_columns(table, name_seperator=name_seperator)
+            rows = zip(table.geometry, *(exported[c] for c, _ in columns))
+            for geometry, *values in rows:
+                if geometry is None or geometry.is_empty:
+                    continue
+
+                feature = _FlatBufferBuilder()
+                properties = _flatgeobuf_properties(columns, values)
+                feature_buffer = feature.finish(
+                    lambda: feature.table(
+                        {
+                            0: (
+                                "offset",
+                                lambda: _flatgeobuf_geometry(feature, geometry),
+                            ),
+                            1: ("offset", lambda: feature.vector(properties)),
+                        }
+                    )
+                )
+                f.write(struct.pack("<I", len(feature_buffer)))
+                f.write(feature_buffer)
+                features_count += 1
+
+        f.seek(header_start + header_table_position + features_count_offset)
+        f.write(struct.pack("<Q", features_count))
+
+
+# GeoParquet, following https://geoparquet.org/releases/v1.0.0, requires pyarrow
+
+GEOPARQUET_VERSION = "1.0.0"
+
+
+def write_geoparquet(
+    elements: Elements,
+    path: Union[Path, str],
+    *,
+    name_seperator: str = "|",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> None:
+    """
+    Write converted svg elements to a GeoParquet file, one row group per batch with WKB geometries
+
+    :param elements: Table of svg elements, or an iterable of (path of unique ids, SvgElement) like iter_svg
+    :param path: Destination file, replaced if it exists
+    :param name_seperator: Seperator joining the group path
+    :param batch_size: Number of elements converted and written at a time
+    """
+    import pyarrow
+    import pyarrow.parquet
+
+    schema = pyarrow.schema(
+        [(c, pyarrow.string()) for c in EXPORT_STRING_COLUMNS]
+        + [(c, pyarrow.float64()) for c in EXPORT_DOUBLE_COLUMNS]
+        + [("geometry", pyarrow.binary())],
+        metadata={
+            "geo": json.dumps(
+                {
+                    "version": GEOPARQUET_VERSION,
+                    "primary_column": "geometry",
+                    "columns": {
+                        "geometry": {
+                            "encoding": "WKB",
+                            "geometry_types": [],
+                            "crs": None,  # Svg coordinates are not georeferenced
+                        }
+                    },
+                }
+            )
+        },
+    )
+
+    with pyarrow.parquet.ParquetWriter(path, schema) as writer:
+        for table in _iter_tables(elements, batch_size):
+            exported = export_columns(table, name_seperator=name_seperator)
+            exported["geometry"] = shapely.to_wkb(table.geometry)
+            writer.write_batch(
+                pyarrow.record_batch(
+                    [
+                        pyarrow.array(
+                            exported[field.name],
+                            type=field.type,
+                            from_pandas=field.name in EXPORT_DOUBLE_COLUMNS,
+                        )
+                        for field in schema
+                    ],
+                    schema=schema,
+                )
+            )
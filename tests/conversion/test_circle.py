@@ -2,7 +2,7 @@ import math
 
 import svgelements
 
-from svaguely.conversion import circle_converter
+from svaguely.conversion import circle_converter, ellipse_converter
 
 eps = 0.001
 loose_eps = 0.1
@@ -28,3 +28,25 @@ def test_unit_circle_conversion_2():
     assert abs(res.centroid.x - x < eps)
     assert abs(res.centroid.y - y < eps)
     assert abs(res.area - (math.pi * (r**2.0))) < loose_eps, res.area
+
+
+def test_circle_vertices_adapt_to_radius():
+    tolerance = 0.01
+
+    small = circle_converter(svgelements.Circle(5, 5, 1), h=10, tolerance=tolerance)
+    large = circle_converter(svgelements.Circle(5, 5, 4), h=10, tolerance=tolerance)
+
+    assert len(small.exterior.coords) < len(large.exterior.coords)
+    for res, r in ((small, 1), (large, 4)):  # Chord error within the tolerance
+        assert 0 <= math.pi * r**2 - res.area < 2 * math.pi * r * tolerance
+        assert abs(res.centroid.x - 5) < eps and abs(res.centroid.y - 5) < eps
+
+
+def test_transformed_ellipse_conversion():
+    a = svgelements.Ellipse(0, 0, 4, 2, transform="translate(10, 10) rotate(90)")
+
+    res = ellipse_converter(a, h=20, tolerance=0.001)
+
+    min_x, min_y, max_x, max_y = res.bounds
+    assert abs(max_x - min_x - 4) < loose_eps and abs(max_y - min_y - 8) < loose_eps
+    assert abs(res.area - math.pi * 8) < loose_eps, res.area
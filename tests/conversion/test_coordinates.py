@@ -0,0 +1,129 @@
+import random
+
+import numpy
+import pytest
+import shapely
+import svgelements
+from jord.shapely_utilities import clean_shape
+from shapely import affinity
+
+from svaguely.conversion import (
+    flip_y,
+    polygon_converter,
+    polyline_converter,
+    rotate_coordinates,
+    simpleline_converter,
+)
+
+H = 100
+
+
+def test_rotate_coordinates_matches_affinity_rotate():
+    coords = numpy.array([[0.0, 0.0], [3.0, 0.5], [2.0, 4.0], [0.0, 0.0]])
+
+    for angle in (0, 30, 90, 180, -45):
+        expected = affinity.rotate(shapely.LineString(coords), angle, (1.0, 2.0))
+        res = shapely.linestrings(rotate_coordinates(coords, angle, (1.0, 2.0)))
+
+        assert res.equals_exact(expected, tolerance=0), angle
+
+
+def test_flip_y():
+    coords = numpy.array([[1.0, 2.0], [3.0, 4.0]])
+
+    res = flip_y(coords, 10)
+
+    assert numpy.array_equal(res, [[1.0, 8.0], [3.0, 6.0]])
+
+
+# The converters as they were before building coordinates as arrays, one shapely Point per vertex and
+# affinity.rotate, their output must stay identical
+
+
+def _affinity_points(points):
+    return [shapely.geometry.Point(p.x, H - p.y) for p in points]
+
+
+def _affinity_polygon(item):
+    points = _affinity_points(item.points)
+    if len(points) < 4:
+        points.append(points[0])
+    ring = affinity.rotate(
+        shapely.LinearRing(points),
+        float(item.rotation) * (180 / numpy.pi),
+        (item.points[0].x, H - item.points[0].y),
+    )
+    if not ring.is_valid:
+        ring = clean_shape(ring)
+    if ring.is_ring:
+        return shapely.geometry.Polygon(ring)
+    return shapely.unary_union(ring)
+
+
+def _affinity_polyline(item, epsilon=0.00000000001):
+    points = _affinity_points(item.points)
+    if points[0].equals_exact(points[-1], tolerance=epsilon):
+        points[-1] = points[0]
+        geometry = shapely.geometry.Polygon(points)
+    elif item.fill is not None and item.fill.hex:
+        geometry = shapely.geometry.Polygon(points + [points[0]])
+    else:
+        geometry = shapely.geometry.LineString(points)
+    return affinity.rotate(
+        geometry,
+        float(item.rotation) * (180 / numpy.pi),
+        (item.points[0].x, H - item.points[0].y),
+    )
+
+
+def _affinity_simpleline(item):
+    x1, y1 = item.implicit_x1, H - item.implicit_y1
+    line = shapely.geometry.LineString(
+        [
+            shapely.geometry.Point(x1, y1),
+            shapely.geometry.Point(item.implicit_x2, H - item.implicit_y2),
+        ]
+    )
+    return affinity.rotate(line, float(item.rotation) * (180 / numpy.pi), (x1, y1))
+
+
+def _random_points(rng, n, closed=False):
+    points = [(rng.uniform(0, H), rng.uniform(0, H)) for _ in range(n)]
+    if closed:
+        points.append(points[0])
+    return " ".join(f"{x},{y}" for x, y in points)
+
+
+def _random_transform(rng):
+    return rng.choice(
+        ["", f"rotate({rng.uniform(-180, 180)})", f"rotate({rng.uniform(0, 90)} 5 7)"]
+    )
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_converters_match_affinity_construction(seed):
+    rng = random.Random(seed)
+
+    # Random rings self intersect too, exercising the cleaning of polygon_converter
+    for n in (3, 4, 7, 30):
+        polygon = svgelements.Polygon(
+            _random_points(rng, n), transform=_random_transform(rng)
+        )
+        assert polygon_converter(polygon, w=H, h=H).equals_exact(
+            _affinity_polygon(polygon), tolerance=0
+        )
+
+    for n, closed, fill in ((2, False, "none"), (5, False, "red"), (6, True, "none")):
+        polyline = svgelements.Polyline(
+            _random_points(rng, n, closed), fill=fill, transform=_random_transform(rng)
+        )
+        assert polyline_converter(polyline, w=H, h=H).equals_exact(
+            _affinity_polyline(polyline), tolerance=0
+        )
+
+    line = svgelements.SimpleLine(
+        *(rng.uniform(0, H) for _ in range(4)), transform=_random_transform(rng)
+    )
+    assert simpleline_converter(line, w=H, h=H).equals_exact(
+        _affinity_simpleline(line), tolerance=0
+    )
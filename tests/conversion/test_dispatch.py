@@ -0,0 +1,75 @@
+import shapely
+import svgelements
+
+from svaguely import parse_svg
+from svaguely.conversion import DEFAULT_CONVERTERS, ConverterRegistry
+
+SVG = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="10" height="10" viewBox="0 0 10 10">'
+    '<g id="l"><title id="t">Hello</title><rect id="r" x="1" y="1" width="2" height="2"/></g>'
+    "</svg>"
+)
+
+
+def test_resolve_along_mro():
+    class Marker(svgelements.Rect):
+        pass
+
+    registry = ConverterRegistry()
+    registry.register(svgelements.Shape, "shape")
+    assert registry.resolve(Marker) == "shape"
+    assert registry.resolve(svgelements.Group) is None
+
+    # Registering invalidates the resolved types
+    registry.register(svgelements.Rect, "rect")
+    assert registry.resolve(Marker) == "rect"
+    assert svgelements.Title not in registry
+
+
+def test_register_converter_for_unsupported_type():
+    converters = DEFAULT_CONVERTERS.copy()
+
+    @converters.register(svgelements.Title)
+    def title_converter(element, **kwargs):
+        return None, {"text": element.title}
+
+    default, _ = parse_svg(SVG)
+    custom, _ = parse_svg(SVG, converters=converters)
+
+    assert set(default["l"]) == {"r"}
+    assert custom["l"]["t"].geometry is None
+    assert custom["l"]["t"].extras["text"] == "Hello"
+    assert custom["l"]["r"].geometry.equals(default["l"]["r"].geometry)
+    assert svgelements.Title not in DEFAULT_CONVERTERS
+
+
+def test_register_converter_for_group_subclass_and_top_level_title():
+    svg = (
+        '<svg xmlns="http://www.w3.org/2000/svg" width="10" height="10" viewBox="0 0 10 10">'
+        '<title id="t">Doc</title><desc id="d">About</desc>'
+        '<g id="l"><svg id="s" x="4" y="4" width="2" height="2">'
+        '<rect id="r" width="1" height="1"/></svg></g>'
+        "</svg>"
+    )
+    converters = DEFAULT_CONVERTERS.copy()
+
+    @converters.register(svgelements.SVG)
+    def nested_svg_converter(element, **kwargs):
+        return (lambda: shapely.box(0, 0, 1, 1)), {"children": len(element)}
+
+    @converters.register(svgelements.Title)
+    def title_converter(element, **kwargs):
+        return None, {"text": element.title}
+
+    default, _ = parse_svg(svg)
+    custom, _ = parse_svg(svg, converters=converters)
+
+    assert set(default) == {"l"} and set(default["l"]["s"]) == {"r"}
+    assert set(custom) == {"t", "l"}
+    assert custom["t"]["t"].extras["text"] == "Doc"
+    assert custom["l"]["s"].extras["children"] == 1
+    assert custom["l"]["s"].geometry.equals(shapely.box(0, 0, 1, 1))
+
+    # The bounds of the children of a converted group do not skip it
+    custom, _ = parse_svg(svg, converters=converters, bbox=(0, 0, 0.5, 0.5))
+    assert set(custom["l"]) == {"s"} and not custom.get("t")
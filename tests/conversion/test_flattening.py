@@ -0,0 +1,44 @@
+import numpy
+import shapely
+import svgelements
+
+from svaguely.conversion import curve_sample_positions, flatten_curve, path_converter
+
+tolerance = 0.01
+
+
+def max_chord_error(segment) -> float:
+    coords = numpy.vstack(
+        [
+            [segment.start.x, segment.start.y],
+            flatten_curve(segment, tolerance=tolerance),
+        ]
+    )
+    dense = shapely.points(segment.npoint(numpy.linspace(0, 1, 2000)))
+    return shapely.distance(shapely.LineString(coords), dense).max()
+
+
+def test_adaptive_flattening_is_within_tolerance():
+    path = svgelements.Path(
+        "M0,0 C10,20 30,40 50,0 Q 60 10 70 0 A 20 10 30 0 1 100 20 A 50 50 0 1 1 0 20"
+    )
+    for segment in path:
+        if isinstance(segment, (svgelements.Move, svgelements.Line)):
+            continue
+        assert max_chord_error(segment) <= tolerance, segment
+
+
+def test_adaptive_flattening_samples_tiny_curves_sparsely():
+    tiny = svgelements.CubicBezier((0, 0), (0.001, 0.001), (0.002, 0.001), (0.003, 0))
+
+    assert len(curve_sample_positions(tiny, tolerance=tolerance)) == 1
+    assert len(curve_sample_positions(tiny)) == 10
+    assert curve_sample_positions(tiny, tolerance=tolerance)[-1] == 1.0
+
+
+def test_fixed_step_flattening_is_default():
+    path = svgelements.Path("M0,0 C10,20 30,40 50,0 Z")
+
+    res = path_converter(path)
+
+    assert len(res.exterior.coords) == 1 + 10 + 1
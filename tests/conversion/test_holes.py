@@ -0,0 +1,57 @@
+import shapely
+
+from svaguely.conversion import (
+    FILL_RULE_NONZERO,
+    assemble_polygons,
+    classify_rings,
+    containment_hierarchy,
+)
+
+
+def square(x, y, s):
+    return shapely.box(x, y, x + s, y + s)
+
+
+def test_containment_hierarchy_nested_and_disjoint():
+    polygons = [
+        square(0, 0, 100),
+        square(10, 10, 50),
+        square(20, 20, 10),
+        square(200, 0, 10),
+        square(70, 70, 5),
+    ]
+
+    depth, parent = containment_hierarchy(polygons)
+
+    assert depth.tolist() == [0, 1, 2, 0, 1]
+    assert parent.tolist() == [-1, 0, 1, -1, 0]
+
+
+def test_assemble_polygons_even_odd():
+    polygons = [square(0, 0, 100), square(10, 10, 50), square(20, 20, 10)]
+
+    res = shapely.union_all(assemble_polygons(polygons))
+
+    assert abs(res.area - (100**2 - 50**2 + 10**2)) < 1e-9, res.area
+
+
+def test_assemble_polygons_overlapping_holes():
+    polygons = [square(0, 0, 100), square(10, 10, 20), square(20, 20, 20)]
+
+    res = shapely.union_all(assemble_polygons(polygons))
+
+    assert res.is_valid
+    assert abs(res.area - (100**2 - (2 * 20**2 - 10**2))) < 1e-9, res.area
+
+
+def test_classify_rings_nonzero_uses_orientation():
+    outer = square(0, 0, 100)
+    same_direction = square(10, 10, 50)
+    reversed_direction = shapely.Polygon(square(70, 70, 5).exterior.coords[::-1])
+
+    is_shell, hole_of = classify_rings(
+        [outer, same_direction, reversed_direction], fill_rule=FILL_RULE_NONZERO
+    )
+
+    assert is_shell.tolist() == [True, False, False]
+    assert hole_of.tolist() == [-1, -1, 0]
@@ -0,0 +1,51 @@
+import numpy
+import svgelements
+
+from svaguely.conversion import path_converter, sub_path_geometries
+
+
+def test_sub_path_geometries_kinds():
+    coordinates = numpy.array(
+        [
+            [0, 0], [1, 0], [1, 1], [0, 1e-9],  # closed ring
+            [5, 5],  # point
+            [2, 2], [3, 3], [4, 2],  # line
+        ],
+        dtype=float,
+    )  # fmt: skip
+    offsets = numpy.array([0, 4, 5, 8])
+
+    geoms, was_polygon = sub_path_geometries(coordinates, offsets, snap_distance=1e-7)
+
+    assert [g.geom_type for g in geoms] == ["Polygon", "Point", "LineString"]
+    assert was_polygon.tolist() == [True, False, False]
+    assert geoms[0].exterior.coords[0] == geoms[0].exterior.coords[-1]
+
+
+def test_path_with_hole_nonzero():
+    path = svgelements.Path("M0,0 L10,0 L10,10 L0,10 Z M2,2 L2,8 L8,8 L8,2 Z")
+
+    res = path_converter(path, w=10, h=10)
+
+    assert abs(res.area - (100 - 36)) < 1e-6, res.area
+    assert len(res.interiors) == 1
+
+
+def test_path_same_winding_is_filled_nonzero():
+    path = svgelements.Path("M0,0 L10,0 L10,10 L0,10 Z M2,2 L8,2 L8,8 L2,8 Z")
+
+    res = path_converter(path, w=10, h=10)
+
+    assert abs(res.area - 100) < 1e-6, res.area
+    assert len(res.interiors) == 0
+
+
+def test_path_same_winding_is_hole_evenodd():
+    path = svgelements.Path(
+        "M0,0 L10,0 L10,10 L0,10 Z M2,2 L8,2 L8,8 L2,8 Z", **{"fill-rule": "evenodd"}
+    )
+
+    res = path_converter(path, w=10, h=10)
+
+    assert abs(res.area - (100 - 36)) < 1e-6, res.area
+    assert len(res.interiors) == 1
@@ -0,0 +1,74 @@
+import numpy
+import shapely
+from warg import flatten_mapping
+
+from svaguely import parse_svg
+from svaguely.conversion import UseGeometryMemo
+
+SYMBOL = "M0,0 C5,-5 10,5 15,0 A5,5 0 0 1 15,10 L0,10 Z M3,3 L3,6 L6,6 L6,3 Z"
+TRANSFORMS = ("translate(10,10)", "translate(50,20) rotate(30)", "scale(-2,1)")
+
+
+def test_use_matches_inlined():
+    uses = "".join(f'<use xlink:href="#symbol" transform="{t}"/>' for t in TRANSFORMS)
+    inlined = "".join(f'<path transform="{t}" d="{SYMBOL}"/>' for t in TRANSFORMS)
+    header = (
+        '<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+        'width="100" height="100" viewBox="0 0 100 100">'
+    )
+
+    used, _ = parse_svg(
+        f'{header}<defs><path id="symbol" d="{SYMBOL}"/></defs><g id="l">{uses}</g></svg>'
+    )
+    direct, _ = parse_svg(f'{header}<g id="l">{inlined}</g></svg>')
+
+    used_geometries = [e.geometry for e in flatten_mapping(used).values()]
+    direct_geometries = [e.geometry for e in flatten_mapping(direct).values()]
+
+    assert len(used_geometries) == len(direct_geometries) == len(TRANSFORMS)
+    for a, b in zip(used_geometries, direct_geometries):
+        assert a.equals_exact(b, 1e-9)
+
+
+def test_memo_reuse():
+    calls = []
+
+    def converter():
+        calls.append(1)
+        return shapely.box(0, 0, 1, 1)
+
+    memo = UseGeometryMemo(scale_invariant=False)
+    shift = numpy.array([[1, 0, 5], [0, 1, 0], [0, 0, 1]], dtype=float)
+    grow = numpy.array([[2, 0, 0], [0, 2, 0], [0, 0, 1]], dtype=float)
+
+    memo.convert("a", numpy.eye(3), converter)
+    shifted = memo.convert("a", shift, converter)
+    assert len(calls) == 1
+    assert shifted.equals(shapely.box(5, 0, 6, 1))
+
+    memo.convert("a", grow, converter)  # Scaled up beyond the tolerance
+    assert len(calls) == 2
+
+
+def test_use_inherited_style_not_shared():
+    header = (
+        '<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+        'width="100" height="100" viewBox="0 0 100 100">'
+    )
+    square = "M0,0 L10,0 L10,10 L0,10 Z M2,2 L8,2 L8,8 L2,8 Z"
+    elements, _ = parse_svg(
+        f'{header}<defs><polyline id="p" points="0,0 10,0 10,10 0,10"/>'
+        f'<path id="q" d="{square}"/></defs><g id="l">'
+        '<use xlink:href="#p" fill="none"/><use xlink:href="#p" fill="red"/>'
+        '<use xlink:href="#q"/><use xlink:href="#q" fill-rule="evenodd"/>'
+        "</g></svg>",
+        output_space=100,
+    )
+
+    outline, filled, nonzero, evenodd = (
+        e.geometry for e in flatten_mapping(elements).values()
+    )
+    assert outline.geom_type == "LineString"
+    assert filled.geom_type == "Polygon" and filled.area == 100
+    assert nonzero.area == 100
+    assert evenodd.area == 64
@@ -0,0 +1,10 @@
+__author__ = "Christian Heider Lindbjerg <chen(at)mapspeople.com>"
+
+
+def leaves(mapping, prefix=()):
+    """(path of keys, element) of every leaf of a nested mapping, in order"""
+    for k, v in mapping.items():
+        if isinstance(v, dict):
+            yield from leaves(v, (*prefix, k))
+        else:
+            yield (*prefix, k), v
@@ -0,0 +1,112 @@
+import json
+import os
+import shutil
+from pathlib import Path
+
+import svgelements
+
+from svaguely import DEFAULT_CONVERTERS
+from svaguely.batch import collect_svg_files, iter_batch_convert
+from svaguely.entry_points.cli import main
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def test_batch_convert_largest_first(tmp_path):
+    sources = tmp_path / "in"
+    sources.mkdir()
+    for svg in FIXTURES.glob("*.svg"):
+        shutil.copy(svg, sources)
+    (sources / "broken.svg").write_text("<svg")
+
+    results = list(iter_batch_convert([sources], tmp_path / "out"))
+
+    sizes = [r.source.stat().st_size for r in results]
+    assert sizes == sorted(sizes, reverse=True)
+    assert [r.source.name for r in results if not r.ok] == ["broken.svg"]
+
+    for result in results:
+        if result.ok:
+            features = json.loads(result.destination.read_text())["features"]
+            assert len(features) == result.num_elements
+
+
+def test_cli_batch(tmp_path, capsys):
+    (tmp_path / "broken.svg").write_text("<svg")
+
+    exit_code = main(
+        [
+            "batch",
+            str(FIXTURES / "*.svg"),
+            str(tmp_path / "broken.svg"),
+            "-o",
+            str(tmp_path / "out"),
+            "-w",
+            "2",
+        ]
+    )
+
+    assert exit_code == 1
+    assert (tmp_path / "out" / "svg_logo.geojson").is_file()
+    assert "3 converted, 1 failed" in capsys.readouterr().out
+
+
+def test_collect_svg_files_mirrors_glob_root(tmp_path):
+    for name in ("a/x.svg", "a/b/x.svg", "c/x.svg"):
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_text("<svg/>")
+
+    files = collect_svg_files(
+        [
+            tmp_path / "a" / "**" / "*.svg",
+            tmp_path / "a",  # Same files again
+            tmp_path / "a" / "x.svg",
+        ]
+    )
+
+    assert [relative for _, relative in files] == [Path("b/x.svg"), Path("x.svg")]
+
+
+def test_batch_convert_reports_colliding_outputs(tmp_path):
+    for name in ("a", "b"):
+        (tmp_path / name).mkdir()
+        shutil.copy(FIXTURES / "svg_logo.svg", tmp_path / name)
+
+    results = list(
+        iter_batch_convert(
+            [tmp_path / "a" / "svg_logo.svg", tmp_path / "b" / "svg_logo.svg"],
+            tmp_path / "out",
+        )
+    )
+
+    assert [(r.source.parent.name, r.ok) for r in results] == [
+        ("b", False),
+        ("a", True),
+    ]
+    assert "already the output of" in results[0].error
+
+
+def _exit_worker(*args, **kwargs):
+    os._exit(1)
+
+
+def test_batch_convert_survives_broken_pool(tmp_path):
+    converters = DEFAULT_CONVERTERS.copy()
+    converters.register(svgelements.Rect, _exit_worker)
+    (tmp_path / "rect.svg").write_text(
+        '<svg xmlns="http://www.w3.org/2000/svg"><rect width="1" height="1"/></svg>'
+    )
+
+    results = list(
+        iter_batch_convert(
+            [tmp_path / "rect.svg", FIXTURES / "svg_logo.svg"],
+            tmp_path / "out",
+            workers=2,
+            converters=converters,
+        )
+    )
+
+    assert len(results) == 2
+    assert "BrokenProcessPool" in next(
+        r.error for r in results if r.source.name == "rect.svg"
+    )
@@ -0,0 +1,60 @@
+from pathlib import Path
+
+import svgelements
+
+from svaguely import ParseCache, parse_svg
+
+from .helpers import leaves
+
+SVG_PATH = Path(__file__).parent / "fixtures" / "svg_logo.svg"
+
+
+def test_cache_hit_skips_parsing(tmp_path, monkeypatch):
+    cache = ParseCache(tmp_path)
+
+    cold, cold_metadata = parse_svg(SVG_PATH, cache=cache)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Parsed on a cache hit")
+
+    monkeypatch.setattr(svgelements.SVG, "parse", fail)
+
+    warm, warm_metadata = parse_svg(SVG_PATH, cache=cache)
+
+    assert warm_metadata == cold_metadata
+    assert list(leaves(warm)) == list(leaves(cold))
+    assert warm.keys() == cold.keys()
+
+
+def test_cache_key_options(tmp_path):
+    cache = ParseCache(tmp_path)
+
+    parse_svg(SVG_PATH, cache=cache)
+    parse_svg(SVG_PATH, cache=cache, output_space=2)
+    parse_svg(SVG_PATH, cache=cache, output_space=2, lazy=True, as_table=True)
+
+    assert len(list(tmp_path.iterdir())) == 2
+
+    parse_svg(SVG_PATH, cache=cache, extras=["fill", "class"])
+    parse_svg(SVG_PATH, cache=cache, extras=("class", "fill"))
+    parse_svg(SVG_PATH, cache=cache, extras={"fill", "class"})
+
+    assert len(list(tmp_path.iterdir())) == 3
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = ParseCache(tmp_path)
+
+    parse_svg(SVG_PATH, cache=cache, output_space=1)
+    (first,) = set(tmp_path.iterdir())
+
+    cache.max_bytes = int(first.stat().st_size * 2.5)
+    parse_svg(SVG_PATH, cache=cache, output_space=2)
+    (second,) = set(tmp_path.iterdir()) - {first}
+
+    parse_svg(SVG_PATH, cache=cache, output_space=1)  # Hit, now most recently used
+    parse_svg(SVG_PATH, cache=cache, output_space=3)
+
+    remaining = set(tmp_path.iterdir())
+    assert len(remaining) == 2
+    assert first in remaining and second not in remaining
@@ -0,0 +1,43 @@
+import logging
+
+from svaguely import ConversionDiagnostics, iter_svg, parse_svg
+
+SVG = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="10" height="10" viewBox="0 0 10 10">'
+    '<g id="a">'
+    + "".join(f'<linearGradient id="lg{i}"/>' for i in range(20))
+    + '<rect id="r" x="1" y="1" width="2" height="2"/></g>'
+    '<g id="b"><foo id="f"/><foo/></g>'
+    "</svg>"
+)
+
+
+def test_unsupported_elements_are_aggregated():
+    diagnostics = ConversionDiagnostics(num_samples=3)
+    elements, _ = parse_svg(SVG, diagnostics=diagnostics)
+
+    assert set(elements["a"]) == {"r"}
+    assert diagnostics.unsupported == {"linearGradient": 20, "foo": 2}
+    assert diagnostics.samples == {
+        "linearGradient": ["lg0", "lg1", "lg2"],
+        "foo": ["f"],
+    }
+    assert len(diagnostics) == 22
+    assert next(diagnostics.messages()).startswith("Not supported: 20 <linearGradient>")
+
+
+def test_unsupported_elements_logged_once(caplog):
+    with caplog.at_level(logging.WARNING, logger="svaguely"):
+        parse_svg(SVG)
+        list(iter_svg(SVG))
+
+    assert len(caplog.records) == 2
+    assert "20 <linearGradient>" in caplog.records[0].getMessage()
+    assert caplog.records[0].getMessage() == caplog.records[1].getMessage()
+
+
+def test_unsupported_elements_from_workers():
+    diagnostics = ConversionDiagnostics()
+    parse_svg(SVG, workers=2, diagnostics=diagnostics)
+
+    assert diagnostics.unsupported == {"linearGradient": 20, "foo": 2}
@@ -0,0 +1,53 @@
+import pickle
+from pathlib import Path
+
+from svaguely import EXTRAS_FULL, EXTRAS_NONE, ExtrasInterner, FrozenMapping, iter_svg
+
+
+def test_interner_shares_equal_extras():
+    interner = ExtrasInterner(["class", "attributes", "a"])
+
+    a = interner({"class": "room", "attributes": {"style": "fill:red"}})
+    b = interner({"class": "room", "attributes": {"style": "fill:red"}})
+
+    assert a is b
+    assert a == {"class": "room", "attributes": {"style": "fill:red"}}
+    assert isinstance(a["attributes"], FrozenMapping)
+    assert interner({"a": 1})["a"] is not interner({"a": True})["a"]
+
+
+def test_full_extras_stay_mutable():
+    interner = ExtrasInterner(EXTRAS_FULL)
+
+    a = interner({"class": "room", "attributes": {"style": "fill:red"}})
+    b = interner({"class": "room", "attributes": {"style": "fill:red"}})
+
+    assert a == b and a is not b
+    assert a["class"] is b["class"]
+    a["attributes"]["style"] = "fill:blue"
+    assert b["attributes"] == {"style": "fill:red"}
+
+    svg_path = Path(__file__).parent / "fixtures" / "svg_logo.svg"
+    for _, element in iter_svg(svg_path):
+        element.extras["checked"] = True
+
+
+def test_interner_policy():
+    values = {"class": "room", "style": "fill:red", "d": "M0,0 L1,1"}
+
+    assert ExtrasInterner(EXTRAS_NONE)(values) == {}
+    assert ExtrasInterner(EXTRAS_NONE)(values, text="a") == {"text": "a"}
+    assert ExtrasInterner(["class", "missing"])(values) == {"class": "room"}
+
+
+def test_frozen_mapping_pickle():
+    mapping = FrozenMapping({"a": FrozenMapping({"b": "c"})})
+    assert pickle.loads(pickle.dumps(mapping)) == mapping
+    assert hash(pickle.loads(pickle.dumps(mapping))) == hash(mapping)
+
+
+def test_parse_extras_whitelist():
+    svg_path = Path(__file__).parent / "fixtures" / "svg_logo.svg"
+
+    for _, element in iter_svg(svg_path, extras=("fill",)):
+        assert set(element.extras) <= {"fill", "text", "font", "image"}
@@ -0,0 +1,91 @@
+import io
+from pathlib import Path
+
+import pytest
+
+from svaguely import (
+    add_metadata_desc_tag,
+    parse_svg,
+    read_svg_metadata,
+    write_metadata_desc_tag,
+)
+
+SVG_PATH = Path(__file__).parent / "fixtures" / "svg_logo.svg"
+
+
+def test_write_metadata_matches_add_metadata(tmp_path):
+    metadata = {"floor": 2, "name": "O'Brien's lobby", "note": 'a "b" </svg> <c/>'}
+    output = tmp_path / "metadata.svg"
+    write_metadata_desc_tag(metadata, SVG_PATH, output, chunk_size=7)
+
+    assert read_svg_metadata(output) == metadata
+    assert parse_svg(output)[1] == metadata
+
+    original = SVG_PATH.read_bytes()
+    written = output.read_bytes()
+    end = original.rfind(b"</svg>")
+    assert written.startswith(original[:end])
+    assert written.endswith(original[end:])
+    assert written.count(b"\n") == add_metadata_desc_tag({}, SVG_PATH).count("\n")
+
+
+def test_write_metadata_replaces_existing(tmp_path):
+    svg_path = tmp_path / "metadata.svg"
+    svg_path.write_text(add_metadata_desc_tag({"version": 1}, SVG_PATH))
+    svg_path.chmod(0o644)
+
+    write_metadata_desc_tag({"version": 2}, svg_path)
+    write_metadata_desc_tag({"version": 3}, svg_path)
+
+    assert read_svg_metadata(svg_path) == {"version": 3}
+    assert svg_path.read_bytes().count(b"SVG_METADATA") == 1
+    assert svg_path.stat().st_mode & 0o777 == 0o644
+    assert list(tmp_path.iterdir()) == [svg_path]
+
+    stream = io.BytesIO()
+    write_metadata_desc_tag({"version": 4}, svg_path, stream)
+    assert read_svg_metadata(stream.getvalue()) == {"version": 4}
+
+
+@pytest.mark.parametrize(
+    "existing",
+    [
+        '<desc id="SVG_METADATA" desc="{&quot;version&quot;: 1}"></desc>',
+        "<desc id='SVG_METADATA' desc='{\"version\": 1}'/>",
+        "<desc\n  id='SVG_METADATA'\n  desc='{\"version\": 1}'>\n  Floor plan metadata\n</desc >",
+    ],
+)
+def test_write_metadata_replaces_existing_forms(tmp_path, existing):
+    svg_path = tmp_path / "metadata.svg"
+    svg = SVG_PATH.read_text()
+    end = svg.rfind("</svg>")
+    svg_path.write_text(
+        svg[:end] + '<desc id="kept">Kept</desc>' + existing + svg[end:]
+    )
+    assert read_svg_metadata(svg_path) == {"version": 1}
+
+    write_metadata_desc_tag({"version": 2}, svg_path)
+
+    written = svg_path.read_text()
+    assert read_svg_metadata(svg_path) == {"version": 2}
+    assert written.count("SVG_METADATA") == 1
+    assert written.startswith(svg[:end] + '<desc id="kept">Kept</desc><desc id=')
+    assert written.endswith("/>" + svg[end:])
+
+
+@pytest.mark.parametrize(
+    "existing",
+    [
+        '<desc id="SVG_METADATA" desc="{}">',
+        "<desc id='SVG_METADATA' desc={}/>",
+    ],
+)
+def test_write_metadata_rejects_broken_existing(tmp_path, existing):
+    svg_path = tmp_path / "metadata.svg"
+    svg = SVG_PATH.read_text()
+    end = svg.rfind("</svg>")
+    svg_path.write_text(svg[:end] + existing + svg[end:])
+
+    with pytest.raises(ValueError):
+        write_metadata_desc_tag({"version": 2}, svg_path)
+    assert svg_path.read_text() == svg[:end] + existing + svg[end:]
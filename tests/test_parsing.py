@@ -1,6 +1,33 @@
+import os
+import pickle
+import random
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from svaguely import parse_svg
+import numpy
+import shapely
+import svgelements
+from warg import flatten_mapping
+
+import svaguely.conversion.bounds
+from svaguely import (
+    DEFAULT_CONVERTERS,
+    ConverterRegistry,
+    LazySvgElement,
+    ParseCache,
+    SvgElementTable,
+    _pool_context,
+    add_metadata_desc_tag,
+    convert_elements,
+    iter_svg,
+    parse_svg,
+    read_svg_metadata,
+)
+
+from .helpers import leaves
+
+FIXTURES = Path(__file__).parent / "fixtures"
 
 
 def test_string_parse():
@@ -23,3 +50,294 @@ def test_file_parse_use_2():
 
 def test_file_parse_single_path():
     print(parse_svg(Path.home() / "Downloads" / "ricoh-logo-2005-neu.svg"))
+
+
+def test_file_parse_workers_matches_serial():
+    svg_path = FIXTURES / "svg_logo.svg"
+
+    serial, serial_metadata = parse_svg(svg_path)
+    parallel, parallel_metadata = parse_svg(svg_path, workers=2)
+
+    serial, parallel = flatten_mapping(serial), flatten_mapping(parallel)
+    assert list(serial) == list(parallel)
+    assert all(serial[k].geometry.equals_exact(parallel[k].geometry, 0) for k in serial)
+    assert serial_metadata == parallel_metadata
+
+
+def test_parse_workers_from_threads():
+    svg_paths = [FIXTURES / "svg_logo.svg", FIXTURES / "svaguely.svg"]
+    serial = [SvgElementTable.from_mapping(parse_svg(p)[0]) for p in svg_paths]
+
+    with ThreadPoolExecutor(len(svg_paths)) as threads:
+        # Never forked from a process with several threads
+        assert threads.submit(_pool_context).result().get_start_method() != "fork"
+        parallel = list(
+            threads.map(
+                lambda p: SvgElementTable.from_mapping(parse_svg(p, workers=2)[0]),
+                svg_paths,
+            )
+        )
+
+    for s, p in zip(serial, parallel):
+        assert s.key_path.tolist() == p.key_path.tolist()
+        assert all(shapely.equals_exact(s.geometry, p.geometry, 0))
+
+
+def test_iter_svg_matches_parse_svg():
+    svg_path = FIXTURES / "svg_logo.svg"
+
+    parsed, _ = parse_svg(svg_path)
+
+    expected = list(leaves(parsed))
+    streamed = list(iter_svg(svg_path))
+
+    assert [k for k, _ in streamed] == [k for k, _ in expected]
+    assert all(
+        a.geometry.equals_exact(b.geometry, 0)
+        for (_, a), (_, b) in zip(streamed, expected)
+    )
+
+
+def test_iter_svg_early_termination():
+    svg_path = FIXTURES / "svg_logo.svg"
+
+    calls = []
+
+    def counting(converter):
+        def count_calls(element, **kwargs):
+            calls.append(element.id)
+            return converter(element, **kwargs)
+
+        return count_calls
+
+    converters = ConverterRegistry(
+        {t: counting(c) for t, c in DEFAULT_CONVERTERS.converters.items()}
+    )
+
+    num_elements = sum(1 for _ in iter_svg(svg_path, converters=converters))
+    assert num_elements > 1 and len(calls) == num_elements
+    calls.clear()
+
+    for key_path, element in iter_svg(svg_path, converters=converters):
+        assert element.geometry is not None
+        break
+
+    assert calls == [element.element_id]
+
+
+def test_lazy_parse_matches_eager():
+    svg_path = FIXTURES / "svg_logo.svg"
+
+    lazy = list(iter_svg(svg_path, lazy=True))
+    eager = list(iter_svg(svg_path))
+
+    assert any(isinstance(e, LazySvgElement) for _, e in lazy)
+    assert not any(e.is_converted for _, e in lazy if isinstance(e, LazySvgElement))
+
+    assert [k for k, _ in lazy] == [k for k, _ in eager]
+    for (_, a), (_, b) in zip(lazy, eager):
+        assert a.element_id == b.element_id
+        assert a.geometry.equals_exact(b.geometry, 0)
+        if isinstance(a, LazySvgElement):
+            assert a.is_converted
+
+
+def test_parse_as_table():
+    svg_path = FIXTURES / "svg_logo.svg"
+
+    parsed, _ = parse_svg(svg_path)
+    table, _ = parse_svg(svg_path, as_table=True)
+
+    assert isinstance(table, SvgElementTable)
+    assert len(table) == len(table.geometry) == len(table.stroke_width)
+
+    assert list(table) == list(leaves(parsed))
+    assert list(leaves(table.to_mapping())) == list(leaves(parsed))
+    assert pickle.loads(pickle.dumps(table[0])) == table[0]
+
+    filled = table[numpy.not_equal(table.fill_color, None)]
+    assert 0 < len(filled) <= len(table)
+    assert all(e.has_filled for _, e in filled)
+
+
+def test_convert_deeply_nested_groups():
+    depth = sys.getrecursionlimit() + 100
+
+    root = group = svgelements.Group(id="g0")
+    for i in range(1, depth):
+        group.append(
+            svgelements.Rect(0, 0, 1, 1, id=f"r{i}", fill="black", stroke="none")
+        )
+        child = svgelements.Group(id=f"g{i}")
+        group.append(child)
+        group = child
+
+    converted = convert_elements(root)
+
+    nested, level = converted, 1
+    while f"g{level}" in nested:
+        assert f"r{level}" in nested
+        nested, level = nested[f"g{level}"], level + 1
+    assert level == depth
+
+    assert len(SvgElementTable.from_mapping(converted)) == depth - 1
+
+
+def test_parse_leaves_recursion_limit(monkeypatch):
+    def setrecursionlimit(limit):
+        raise AssertionError("The recursion limit is process wide")
+
+    monkeypatch.setattr(sys, "setrecursionlimit", setrecursionlimit)
+
+    converted, _ = parse_svg(FIXTURES / "svg_logo.svg")
+    assert converted
+
+
+def test_parse_sources_match(tmp_path, monkeypatch):
+    path = FIXTURES / "svg_logo.svg"
+    content = path.read_bytes()
+
+    expected, _ = parse_svg(path, as_table=True)
+
+    def no_probe(_):
+        raise AssertionError("documents must not be probed as paths")
+
+    monkeypatch.setattr(os.path, "isfile", no_probe)
+
+    with open(path, "rb") as binary, open(path) as text:
+        sources = [
+            str(path),
+            content,
+            bytearray(content),
+            memoryview(content),
+            content.decode(),
+            binary,
+            text,
+        ]
+        for source in sources:
+            table, _ = parse_svg(source, as_table=True)
+            assert list(table.key_path) == list(expected.key_path)
+            for a, b in zip(table.geometry, expected.geometry):
+                assert a is b is None or a.equals_exact(b, 0)
+
+    cache = ParseCache(tmp_path)
+    for _ in range(2):  # Miss and hit through the memory mapped file
+        table, _ = parse_svg(path, as_table=True, cache=cache)
+        assert list(table.key_path) == list(expected.key_path)
+
+
+def test_read_svg_metadata(tmp_path):
+    svg_path = FIXTURES / "svg_logo.svg"
+    assert read_svg_metadata(svg_path) is None
+
+    metadata = {"floor": 2, "name": "lobby", "tags": ["a", "b"]}
+    with_metadata = add_metadata_desc_tag(metadata, svg_path)
+    metadata_path = tmp_path / "metadata.svg"
+    metadata_path.write_text(with_metadata)
+
+    assert read_svg_metadata(metadata_path) == metadata
+    assert read_svg_metadata(with_metadata) == metadata
+    assert read_svg_metadata(with_metadata.encode()) == metadata
+    assert read_svg_metadata(metadata_path) == parse_svg(metadata_path)[1]
+
+
+def test_parse_bbox_matches_filtered_full_parse():
+    svg = (
+        '<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink"'
+        ' width="100" height="100" viewBox="0 0 100 100">'
+        '<g id="west"><rect id="a" x="0" y="0" width="10" height="10"/>'
+        '<g transform="rotate(30 20 80)"><circle cx="20" cy="80" r="5"/>'
+        '<path d="M 5 60 a 10 5 0 1 1 20 0 z"/></g></g>'
+        '<g id="east"><rect id="b" x="80" y="80" width="10" height="10"/>'
+        '<use id="u" xlink:href="#b" transform="translate(-70 0)"/>'
+        '<line x1="60" y1="0" x2="100" y2="40" stroke="black"/></g>'
+        "</svg>"
+    )
+    full, _ = parse_svg(svg, output_space=100, explicit_names=True)
+
+    for box in ((0, 0, 30, 30), (15, 0, 25, 100), (70, 55, 100, 100), (40, 40, 50, 50)):
+        clipped = {
+            key
+            for key, element in flatten_mapping(full).items()
+            if element.geometry.intersects(shapely.box(*box))
+        }
+        elements, _ = parse_svg(svg, output_space=100, explicit_names=True, bbox=box)
+        assert set(flatten_mapping(elements)) == clipped
+
+    # Skipped by the bounds of the layer, not only emptied
+    elements, _ = parse_svg(svg, output_space=100, bbox=(0, 50, 9, 100))
+    assert set(elements) == {"west"}
+
+
+def test_parse_bbox_measures_elements_once(monkeypatch):
+    svg = (
+        '<svg xmlns="http://www.w3.org/2000/svg" width="100" height="100" viewBox="0 0 100 100">'
+        '<g id="west"><rect id="a" x="0" y="0" width="10" height="10"/>'
+        '<g><circle cx="20" cy="80" r="5"/><rect x="40" y="40" width="5" height="5"/></g></g>'
+        '<rect id="b" x="80" y="80" width="10" height="10"/>'
+        "</svg>"
+    )
+    measured = []
+    element_bounds = svaguely.conversion.bounds.element_bounds
+
+    def counting_element_bounds(element):
+        measured.append(id(element))
+        return element_bounds(element)
+
+    monkeypatch.setattr(
+        svaguely.conversion.bounds, "element_bounds", counting_element_bounds
+    )
+
+    elements, _ = parse_svg(svg, output_space=100, bbox=(0, 0, 50, 100))
+    assert measured and len(measured) == len(set(measured))
+
+    measured.clear()
+    assert [
+        key_path
+        for key_path, _ in iter_svg(svg, output_space=100, bbox=(0, 0, 50, 100))
+    ]
+    assert measured and len(measured) == len(set(measured))
+
+
+def test_parse_bbox_arcs_under_transforms():
+    random.seed(7)
+    groups = []
+    for i in range(120):
+        transforms = " ".join(
+            random.choice(
+                (
+                    f"scale({random.uniform(0.3, 2):.2f},{random.uniform(0.3, 2):.2f})",
+                    f"rotate({random.uniform(-180, 180):.1f} 50 50)",
+                    f"skewX({random.uniform(-40, 40):.1f})",
+                    f"skewY({random.uniform(-40, 40):.1f})",
+                )
+            )
+            for _ in range(2)
+        )
+        arc = (
+            f"M{random.uniform(0, 100):.2f},{random.uniform(0, 100):.2f} "
+            f"a {random.uniform(1, 20):.2f} {random.uniform(1, 20):.2f} {random.uniform(0, 90):.0f} "
+            f"{random.randint(0, 1)} {random.randint(0, 1)} "
+            f"{random.uniform(-15, 15):.2f} {random.uniform(-15, 15):.2f}"
+        )
+        groups.append(
+            f'<g id="g{i}" transform="{transforms}"><g transform="scale(0.5,1.4)">'
+            f'<path id="a{i}" d="{arc}" stroke="black" fill="none"/></g></g>'
+        )
+    svg = (
+        '<svg xmlns="http://www.w3.org/2000/svg" width="100" height="100" viewBox="0 0 100 100">'
+        + "".join(groups)
+        + "</svg>"
+    )
+
+    full = flatten_mapping(parse_svg(svg, output_space=100)[0])
+    for _ in range(40):
+        x, y = random.uniform(-50, 120), random.uniform(-50, 120)
+        box = (x, y, x + random.uniform(1, 30), y + random.uniform(1, 30))
+        clipped = {
+            key
+            for key, element in full.items()
+            if element.geometry.intersects(shapely.box(*box))
+        }
+        elements, _ = parse_svg(svg, output_space=100, bbox=box)
+        assert set(flatten_mapping(elements)) == clipped
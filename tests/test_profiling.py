@@ -0,0 +1,36 @@
+from pathlib import Path
+
+from svaguely import ParseProfiler, iter_svg, parse_svg
+
+SVG_PATH = Path(__file__).parent / "fixtures" / "svg_logo.svg"
+
+
+def test_profiler_collects_stages_and_elements():
+    profiler = ParseProfiler(num_slowest=3)
+    table, _ = parse_svg(SVG_PATH, as_table=True, profiler=profiler)
+
+    assert {"parse", "convert", "table", "flatten"} <= set(profiler.stages)
+    assert sum(t.count for t in profiler.element_types.values()) == sum(
+        g is not None for g in table.geometry
+    )
+
+    slowest = profiler.slowest
+    assert len(slowest) == 3
+    assert [s for _, _, s in slowest] == sorted(
+        (s for _, _, s in slowest), reverse=True
+    )
+    assert set(profiler.to_dict()) == {"stages", "element_types", "slowest"}
+
+
+def test_profiler_hooks_receive_every_element():
+    received = []
+
+    class Recorder(ParseProfiler):
+        def on_element(self, element_type, element_id, seconds, num_vertices):
+            received.append((element_type, element_id, num_vertices))
+
+    elements = list(iter_svg(SVG_PATH, profiler=Recorder()))
+
+    with_geometry = [e for _, e in elements if e.geometry is not None]
+    assert [i for _, i, _ in received] == [e.element_id for e in with_geometry]
+    assert all(n > 0 for _, _, n in received)
@@ -0,0 +1,51 @@
+import pickle
+
+import shapely
+
+from svaguely import ParseCache, SvgElementIndex, parse_svg
+
+SVG = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="100" height="100" viewBox="0 0 100 100">'
+    '<g id="floor"><rect id="room" x="0" y="0" width="50" height="50"/>'
+    '<rect id="desk" x="10" y="10" width="10" height="10"/></g>'
+    '<g id="walls"><line id="wall" x1="60" y1="0" x2="60" y2="100" stroke="black"/></g>'
+    '<circle id="lamp" cx="90" cy="90" r="5"/>'
+    "</svg>"
+)
+
+
+def test_query_point_and_bbox():
+    index = SvgElementIndex()
+    elements, _ = parse_svg(SVG, output_space=100, spatial_index=index)
+
+    assert len(index) == 4
+    assert index.query_point(15, 85) == [("floor", "room"), ("floor", "desk")]
+    assert index.query_point(60.5, 50) == []
+    assert index.query_point(60.5, 50, tolerance=1) == [("walls", "wall")]
+
+    assert index.query_bbox(55, 0, 100, 100) == [("walls", "wall"), ("lamp", "lamp")]
+    assert index.query_bbox(0, 70, 30, 100, predicate="contains") == [("floor", "desk")]
+
+    assert index.nearest(80, 10) == (("lamp", "lamp"), 5.0)
+    assert index.nearest(80, 10, max_distance=1) is None
+    assert index.nearest(15, 85)[0] == ("floor", "desk")
+
+    # Key paths index the nested result
+    (key_path,) = index.query_point(90, 10)
+    assert key_path == ("lamp", "lamp")
+    assert elements[key_path[0]][key_path[1]].geometry.contains(shapely.Point(90, 10))
+
+
+def test_index_from_table_and_cache(tmp_path):
+    cache = ParseCache(tmp_path)
+    parse_svg(SVG, output_space=100, cache=cache)
+
+    index = SvgElementIndex()
+    table, _ = parse_svg(
+        SVG, output_space=100, cache=cache, as_table=True, spatial_index=index
+    )
+    assert index.geometries is table.geometry
+
+    loaded = pickle.loads(pickle.dumps(index))
+    for i in (index, loaded, SvgElementIndex.from_table(table)):
+        assert i.query_point(15, 85) == [("floor", "room"), ("floor", "desk")]
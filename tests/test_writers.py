@@ -0,0 +1,279 @@
+import math
+import sqlite3
+import struct
+from pathlib import Path
+
+import numpy
+import pytest
+import shapely
+
+from svaguely import (
+    export_columns,
+    iter_svg,
+    parse_svg,
+    write_flatgeobuf,
+    write_geopackage,
+    write_geoparquet,
+)
+from svaguely.writers import FGB_MAGIC
+
+FIXTURES = Path(__file__).parent / "fixtures"
+SVG_PATH = FIXTURES / "svg_logo.svg"
+
+SHAPES_SVG = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="20" height="20" viewBox="0 0 20 20">'
+    '<g id="g"><polyline id="line" points="1,1 5,2 3,6" fill="none" stroke="#00ff00"/>'
+    '<path id="holes" fill-rule="evenodd" d="M0 0H8V8H0Z M2 2H6V6H2Z M10 10H12V12H10Z"/></g>'
+    '<text id="label" x="4" y="15" font-size="3">Hi \u00e6\u00f8</text>'
+    "</svg>"
+)
+
+
+def test_geopackage_roundtrip(tmp_path):
+    table, _ = parse_svg(SVG_PATH, as_table=True)
+    path = tmp_path / "logo.gpkg"
+
+    write_geopackage(table, path, batch_size=4)
+
+    with sqlite3.connect(path) as connection:
+        (num_rows,) = connection.execute("SELECT count(*) FROM svg_elements").fetchone()
+        blobs = [
+            b
+            for (b,) in connection.execute("SELECT geom FROM svg_elements ORDER BY fid")
+        ]
+        (table_name,) = connection.execute(
+            "SELECT table_name FROM gpkg_contents"
+        ).fetchone()
+
+    assert table_name == "svg_elements"
+    assert num_rows == len(table)
+
+    for blob, geometry in zip(blobs, table.geometry):
+        if geometry is None:
+            assert blob is None
+            continue
+        assert blob[:2] == b"GP"
+        envelope_size = {0: 0, 1: 32, 2: 48, 3: 48, 4: 64}[(blob[3] >> 1) & 0b111]
+        assert shapely.from_wkb(blob[8 + envelope_size :]).equals_exact(geometry, 0)
+
+
+def test_geopackage_quotes_layer(tmp_path):
+    table, _ = parse_svg(SHAPES_SVG, as_table=True)
+    path = tmp_path / "layer.gpkg"
+    layer = 'a" (x); DROP TABLE gpkg_contents; --'
+
+    write_geopackage(table, path, layer=layer)
+
+    with sqlite3.connect(path) as connection:
+        (table_name,) = connection.execute(
+            "SELECT table_name FROM gpkg_contents"
+        ).fetchone()
+        (num_rows,) = connection.execute(
+            "SELECT count(*) FROM " + '"a"" (x); DROP TABLE gpkg_contents; --"'
+        ).fetchone()
+
+    assert table_name == layer
+    assert num_rows == len(table)
+
+    with pytest.raises(ValueError):
+        write_geopackage(table, path, layer="a\0b")
+
+
+def test_flatgeobuf_streams_iter_svg(tmp_path):
+    table, _ = parse_svg(SVG_PATH, as_table=True)
+    path = tmp_path / "logo.fgb"
+
+    write_flatgeobuf(iter_svg(SVG_PATH), path, batch_size=4)
+
+    data = path.read_bytes()
+    assert data[:8] == FGB_MAGIC
+    (header_size,) = struct.unpack_from("<I", data, 8)
+
+    offset, num_features = 12 + header_size, 0
+    while offset < len(data):
+        (feature_size,) = struct.unpack_from("<I", data, offset)
+        offset += 4 + feature_size
+        num_features += 1
+
+    assert offset == len(data)
+    assert num_features == sum(g is not None and not g.is_empty for g in table.geometry)
+
+
+class _FlatBuffer:
+    """Reads the flatbuffer tables of FlatGeobuf, without the flatbuffers package"""
+
+    def __init__(self, data, start=0):
+        self.data, self.root = data, start + struct.unpack_from("<I", data, start)[0]
+
+    def field(self, table, slot, fmt=None):
+        vtable = table - struct.unpack_from("<i", self.data, table)[0]
+        vtable_size = struct.unpack_from("<H", self.data, vtable)[0]
+        offset = (
+            struct.unpack_from("<H", self.data, vtable + 4 + 2 * slot)[0]
+            if 4 + 2 * slot < vtable_size
+            else 0
+        )
+        if not offset:
+            return None
+        if fmt is not None:
+            return struct.unpack_from(fmt, self.data, table + offset)[0]
+        return table + offset + struct.unpack_from("<I", self.data, table + offset)[0]
+
+    def length(self, vector):
+        return struct.unpack_from("<I", self.data, vector)[0]
+
+    def string(self, vector):
+        return bytes(self.data[vector + 4 : vector + 4 + self.length(vector)]).decode()
+
+    def array(self, vector, dtype):
+        return numpy.frombuffer(self.data, dtype, self.length(vector), vector + 4)
+
+    def tables(self, vector):
+        return [
+            p + struct.unpack_from("<I", self.data, p)[0]
+            for p in range(vector + 4, vector + 4 + 4 * self.length(vector), 4)
+        ]
+
+
+def _fgb_geometry(buffer, table):
+    geometry_type = buffer.field(table, 6, "<B")
+    if geometry_type in (6, 7):
+        parts = [
+            _fgb_geometry(buffer, p) for p in buffer.tables(buffer.field(table, 7))
+        ]
+        return (
+            shapely.MultiPolygon(parts)
+            if geometry_type == 6
+            else shapely.GeometryCollection(parts)
+        )
+
+    xy = buffer.array(buffer.field(table, 1), "<f8").reshape(-1, 2)
+    ends = buffer.field(table, 0)
+    ends = [len(xy)] if ends is None else buffer.array(ends, "<u4").tolist()
+    lines = [xy[start:end] for start, end in zip([0] + ends[:-1], ends)]
+    if geometry_type == 1:
+        return shapely.Point(xy[0])
+    if geometry_type == 2:
+        return shapely.LineString(xy)
+    if geometry_type == 3:
+        return shapely.Polygon(lines[0], lines[1:])
+    if geometry_type == 4:
+        return shapely.MultiPoint(xy)
+    return shapely.MultiLineString(lines)
+
+
+def _fgb_properties(buffer, vector, columns):
+    blob, properties, offset = buffer.array(vector, "u1").tobytes(), {}, 0
+    while offset < len(blob):
+        (i,) = struct.unpack_from("<H", blob, offset)
+        name, column_type = columns[i]
+        if column_type == 10:
+            (properties[name],) = struct.unpack_from("<d", blob, offset + 2)
+            offset += 10
+        else:
+            (size,) = struct.unpack_from("<I", blob, offset + 2)
+            properties[name] = blob[offset + 6 : offset + 6 + size].decode()
+            offset += 6 + size
+    return properties
+
+
+@pytest.mark.parametrize("svg", [SHAPES_SVG, FIXTURES / "svaguely.svg", SVG_PATH])
+def test_flatgeobuf_decodes(tmp_path, svg):
+    table, _ = parse_svg(svg, as_table=True)
+    path = tmp_path / "out.fgb"
+
+    write_flatgeobuf(table, path, layer="layer", batch_size=2)
+
+    data = path.read_bytes()
+    (header_size,) = struct.unpack_from("<I", data, 8)
+    header = _FlatBuffer(data, 12)
+    assert header.string(header.field(header.root, 0)) == "layer"
+    columns = [
+        (header.string(header.field(c, 0)), header.field(c, 1, "<B"))
+        for c in header.tables(header.field(header.root, 7))
+    ]
+
+    features, offset = [], 12 + header_size
+    while offset < len(data):
+        (feature_size,) = struct.unpack_from("<I", data, offset)
+        feature = _FlatBuffer(data, offset + 4)
+        features.append(
+            (
+                _fgb_geometry(feature, feature.field(feature.root, 0)),
+                _fgb_properties(feature, feature.field(feature.root, 1), columns),
+            )
+        )
+        offset += 4 + feature_size
+
+    assert header.field(header.root, 8, "<Q") == len(features)
+
+    exported = export_columns(table)
+    assert sorted(name for name, _ in columns) == sorted(exported)
+    rows = [i for i, g in enumerate(table.geometry) if g is not None and not g.is_empty]
+    assert len(features) == len(rows)
+    for (geometry, properties), row in zip(features, rows):
+        assert geometry.equals_exact(table.geometry[row], 0)
+        assert properties == {
+            name: values[row]
+            for name, values in exported.items()
+            if values[row] is not None
+            and not (name == "stroke_width" and math.isnan(values[row]))
+        }
+
+
+def test_geoparquet_roundtrip(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    table, _ = parse_svg(SVG_PATH, as_table=True)
+    path = tmp_path / "logo.parquet"
+
+    write_geoparquet(table, path, batch_size=4)
+
+    read = pq.read_table(path)
+    assert b"geo" in read.schema.metadata
+    assert read.num_rows == len(table)
+    for wkb, geometry in zip(read.column("geometry").to_pylist(), table.geometry):
+        if geometry is None:
+            assert wkb is None
+        else:
+            assert shapely.from_wkb(wkb).equals_exact(geometry, 0)
+
+
+@pytest.mark.parametrize("writer", [write_geopackage, write_flatgeobuf])
+@pytest.mark.parametrize(
+    "svg",
+    [SVG_PATH, FIXTURES / "svaguely.svg", SHAPES_SVG],
+    ids=["logo", "text", "shapes"],
+)
+def test_written_features_decode(tmp_path, writer, svg):
+    raw = pytest.importorskip("pyogrio.raw")
+    table, _ = parse_svg(svg, as_table=True)
+    path = tmp_path / ("out.gpkg" if writer is write_geopackage else "out.fgb")
+
+    writer(table, path, batch_size=3)
+
+    meta, _, wkbs, fields = raw.read(path)
+    read_columns = dict(zip(meta["fields"], fields))
+    columns = export_columns(table)
+    assert set(read_columns) == set(columns)
+
+    # FlatGeobuf features require a geometry
+    rows = [
+        i
+        for i, g in enumerate(table.geometry)
+        if writer is write_geopackage or (g is not None and not g.is_empty)
+    ]
+    assert len(wkbs) == len(rows)
+
+    for read_row, row in enumerate(rows):
+        geometry = table.geometry[row]
+        if geometry is None:
+            assert wkbs[read_row] is None
+        else:
+            assert shapely.from_wkb(wkbs[read_row]).equals_exact(geometry, 0)
+
+        for name, values in columns.items():
+            expected, read = values[row], read_columns[name][read_row]
+            if name == "stroke_width" and math.isnan(expected):
+                assert read is None or math.isnan(read)
+            else:
+                assert read == expected, name